@@ -7,7 +7,7 @@ from alembic import context
 
 # Importa a Base e os modelos para o Alembic detectar
 from app.infrastructure.postgres_database import Base
-from app.infrastructure.models import RoverModel  # noqa: F401
+from app.infrastructure.models import CoverageTileModel, ObstacleModel, PlateauModel, RoverModel, TrajectoryModel  # noqa: F401
 from app.config import Config
 
 # this is the Alembic Config object, which provides
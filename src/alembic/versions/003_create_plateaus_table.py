@@ -0,0 +1,86 @@
+"""Create plateaus table shared by rovers
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+from uuid import uuid4
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+plateaus = sa.table('plateaus',
+    sa.column('id', sa.String),
+    sa.column('max_x', sa.Integer),
+    sa.column('max_y', sa.Integer),
+)
+
+rovers = sa.table('rovers',
+    sa.column('plateau_id', sa.String),
+    sa.column('plateau_max_x', sa.Integer),
+    sa.column('plateau_max_y', sa.Integer),
+)
+
+
+def upgrade() -> None:
+    op.create_table('plateaus',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('max_x', sa.Integer(), nullable=False),
+    sa.Column('max_y', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.add_column('rovers', sa.Column('plateau_id', sa.String(length=36), nullable=True))
+
+    # Cria um planalto para cada par de dimensões já usado pelas sondas
+    conn = op.get_bind()
+    dimensions = conn.execute(
+        sa.select(rovers.c.plateau_max_x, rovers.c.plateau_max_y).distinct()
+    ).fetchall()
+    for max_x, max_y in dimensions:
+        plateau_id = str(uuid4())
+        conn.execute(plateaus.insert().values(id=plateau_id, max_x=max_x, max_y=max_y))
+        conn.execute(
+            rovers.update()
+            .where(rovers.c.plateau_max_x == max_x, rovers.c.plateau_max_y == max_y)
+            .values(plateau_id=plateau_id)
+        )
+
+    with op.batch_alter_table('rovers') as batch_op:
+        batch_op.alter_column('plateau_id', existing_type=sa.String(length=36), nullable=False)
+        batch_op.create_foreign_key('fk_rovers_plateau_id', 'plateaus', ['plateau_id'], ['id'])
+        batch_op.create_index('ix_rovers_plateau_id', ['plateau_id'])
+        batch_op.drop_column('plateau_max_x')
+        batch_op.drop_column('plateau_max_y')
+
+
+def downgrade() -> None:
+    op.add_column('rovers', sa.Column('plateau_max_x', sa.Integer(), nullable=True))
+    op.add_column('rovers', sa.Column('plateau_max_y', sa.Integer(), nullable=True))
+
+    # Copia as dimensões do planalto de volta para cada sonda
+    conn = op.get_bind()
+    for plateau_id, max_x, max_y in conn.execute(sa.select(plateaus)).fetchall():
+        conn.execute(
+            rovers.update()
+            .where(rovers.c.plateau_id == plateau_id)
+            .values(plateau_max_x=max_x, plateau_max_y=max_y)
+        )
+
+    with op.batch_alter_table('rovers') as batch_op:
+        batch_op.alter_column('plateau_max_x', existing_type=sa.Integer(), nullable=False)
+        batch_op.alter_column('plateau_max_y', existing_type=sa.Integer(), nullable=False)
+        batch_op.drop_index('ix_rovers_plateau_id')
+        batch_op.drop_constraint('fk_rovers_plateau_id', type_='foreignkey')
+        batch_op.drop_column('plateau_id')
+
+    op.drop_table('plateaus')
@@ -0,0 +1,44 @@
+"""Create trajectories table
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('trajectories',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('rover_id', sa.String(length=36), nullable=False),
+    sa.Column('first_point', sa.BigInteger(), nullable=False),
+    sa.Column('points', sa.BigInteger(), nullable=False),
+    sa.Column('start_x', sa.Integer(), nullable=False),
+    sa.Column('start_y', sa.Integer(), nullable=False),
+    sa.Column('end_x', sa.Integer(), nullable=False),
+    sa.Column('end_y', sa.Integer(), nullable=False),
+    sa.Column('min_x', sa.Integer(), nullable=False),
+    sa.Column('max_x', sa.Integer(), nullable=False),
+    sa.Column('min_y', sa.Integer(), nullable=False),
+    sa.Column('max_y', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['rover_id'], ['rovers.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_trajectories_rover_id_first_point', 'trajectories', ['rover_id', 'first_point'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trajectories_rover_id_first_point', table_name='trajectories')
+    op.drop_table('trajectories')
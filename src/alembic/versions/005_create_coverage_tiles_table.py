@@ -0,0 +1,33 @@
+"""Create coverage tiles table
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('coverage_tiles',
+    sa.Column('plateau_id', sa.String(length=36), nullable=False),
+    sa.Column('tile_x', sa.Integer(), nullable=False),
+    sa.Column('tile_y', sa.Integer(), nullable=False),
+    sa.Column('data', sa.LargeBinary(), nullable=False),
+    sa.ForeignKeyConstraint(['plateau_id'], ['plateaus.id'], ),
+    sa.PrimaryKeyConstraint('plateau_id', 'tile_x', 'tile_y')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('coverage_tiles')
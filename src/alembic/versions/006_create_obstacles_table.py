@@ -0,0 +1,32 @@
+"""Create obstacles table
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '006'
+down_revision: Union[str, None] = '005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('obstacles',
+    sa.Column('plateau_id', sa.String(length=36), nullable=False),
+    sa.Column('x', sa.Integer(), nullable=False),
+    sa.Column('y', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['plateau_id'], ['plateaus.id'], ),
+    sa.PrimaryKeyConstraint('plateau_id', 'x', 'y')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('obstacles')
@@ -0,0 +1,31 @@
+"""Create cache_generations table for read cache invalidation
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    cache_generations = op.create_table('cache_generations',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('generation', sa.BigInteger(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(cache_generations, [{'name': 'rovers', 'generation': 0}])
+
+
+def downgrade() -> None:
+    op.drop_table('cache_generations')
@@ -0,0 +1,42 @@
+"""Create rover_events table for the event-sourced probe state
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('rover_events',
+    sa.Column('rover_id', sa.String(length=36), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('dx', sa.Integer(), nullable=False),
+    sa.Column('dy', sa.Integer(), nullable=False),
+    sa.Column('turns', sa.SmallInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['rover_id'], ['rovers.id'], ),
+    sa.PrimaryKeyConstraint('rover_id', 'seq')
+    )
+    # Estado atual de cada sonda como evento inicial (a partir de (0, 0, NORTH)),
+    # para que o log sozinho reconstrua as sondas criadas antes dele
+    op.execute(
+        "INSERT INTO rover_events (rover_id, seq, dx, dy, turns) "
+        "SELECT id, version, x, y, CASE direction "
+        "WHEN 'EAST' THEN 1 WHEN 'SOUTH' THEN 2 WHEN 'WEST' THEN 3 ELSE 0 END "
+        "FROM rovers"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('rover_events')
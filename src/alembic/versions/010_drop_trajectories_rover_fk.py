@@ -0,0 +1,26 @@
+"""Drop the trajectories -> rovers foreign key for sharded rover storage
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-18 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Com SHARD_URLS as sondas ficam em outros bancos, e o histórico continua neste
+    op.drop_constraint('trajectories_rover_id_fkey', 'trajectories', type_='foreignkey')
+
+
+def downgrade() -> None:
+    op.create_foreign_key('trajectories_rover_id_fkey', 'trajectories', 'rovers', ['rover_id'], ['id'])
@@ -15,3 +15,74 @@ class Config:
     SQL_ECHO = getenv("SQL_ECHO", "false").lower() == "true"
     SQL_POOL_SIZE = int(getenv("SQL_POOL_SIZE", "5"))
     SQL_MAX_OVERFLOW = int(getenv("SQL_MAX_OVERFLOW", "10"))
+    # Plain probe reads through prebuilt Core statements and row tuples
+    # instead of ORM instances; "false" falls back to the ORM path
+    SQL_CORE_READS = getenv("SQL_CORE_READS", "true").lower() == "true"
+    # Command cache configuration
+    COMMAND_CACHE_SIZE = int(getenv("COMMAND_CACHE_SIZE", "1024"))
+    COMMAND_CACHE_MAX_SEQUENCE_LENGTH = int(
+        getenv("COMMAND_CACHE_MAX_SEQUENCE_LENGTH", "10000")
+    )
+
+    # Occupancy index configuration
+    OCCUPANCY_DENSE_CELL_LIMIT = int(getenv("OCCUPANCY_DENSE_CELL_LIMIT", str(1 << 24)))
+
+    # Trajectory recording configuration
+    TRAJECTORY_RECORDING = getenv("TRAJECTORY_RECORDING", "false").lower() == "true"
+    TRAJECTORY_MAX_RUNS = int(getenv("TRAJECTORY_MAX_RUNS", "1000000"))
+
+    # Coverage map configuration
+    COVERAGE_TRACKING = getenv("COVERAGE_TRACKING", "false").lower() == "true"
+    COVERAGE_TILE_SIZE = int(getenv("COVERAGE_TILE_SIZE", "256"))
+
+    # The occupancy, obstacle and coverage state of each plateau is kept in
+    # process memory. With REGISTRY_SYNC, every write bumps a generation of
+    # its plateau shared through the database, and an instance that sees it
+    # move reloads the plateau; checked at most once per
+    # REGISTRY_SYNC_INTERVAL seconds (0 meaning every access), which bounds
+    # how stale the collision checks of one instance are. Off, the API
+    # presumes a single instance
+    REGISTRY_SYNC = getenv("REGISTRY_SYNC", "false").lower() == "true"
+    REGISTRY_SYNC_INTERVAL = float(getenv("REGISTRY_SYNC_INTERVAL", "1.0"))
+
+    # Path planner configuration
+    PLANNER_CACHE_SIZE = int(getenv("PLANNER_CACHE_SIZE", "1024"))
+    PLANNER_MAX_EXPANSIONS = int(getenv("PLANNER_MAX_EXPANSIONS", "250000"))
+
+    # Probe update concurrency: "optimistic" (version compare-and-swap with
+    # bounded retries) or "pessimistic" (SELECT ... FOR UPDATE)
+    ROVER_LOCKING = getenv("ROVER_LOCKING", "optimistic").lower()
+    ROVER_UPDATE_RETRIES = int(getenv("ROVER_UPDATE_RETRIES", "5"))
+
+    # Write-behind configuration: probe state is kept in memory and flushed
+    # at most WRITE_BEHIND_FLUSH_INTERVAL seconds (the staleness window) after
+    # it changes, or as soon as WRITE_BEHIND_MAX_DIRTY probes are pending
+    WRITE_BEHIND = getenv("WRITE_BEHIND", "false").lower() == "true"
+    WRITE_BEHIND_FLUSH_INTERVAL = float(getenv("WRITE_BEHIND_FLUSH_INTERVAL", "1.0"))
+    WRITE_BEHIND_MAX_DIRTY = int(getenv("WRITE_BEHIND_MAX_DIRTY", "1000"))
+    WRITE_BEHIND_MAX_CACHED = int(getenv("WRITE_BEHIND_MAX_CACHED", "100000"))
+
+    # Read-through cache of probe reads (by id and the full listing). Entries
+    # live at most READ_CACHE_TTL seconds and are checked against a generation
+    # counter shared through the database, so writes from other instances
+    # invalidate them; with READ_CACHE_CHECK_INTERVAL > 0 that check runs at
+    # most once per interval, which bounds how stale a foreign write can be
+    READ_CACHE = getenv("READ_CACHE", "false").lower() == "true"
+    READ_CACHE_SIZE = int(getenv("READ_CACHE_SIZE", "10000"))
+    READ_CACHE_TTL = float(getenv("READ_CACHE_TTL", "30.0"))
+    READ_CACHE_CHECK_INTERVAL = float(getenv("READ_CACHE_CHECK_INTERVAL", "0.0"))
+
+    # Event sourcing: each accepted batch is appended to the rover_events log
+    # and the rovers table only holds snapshots, refreshed every
+    # EVENT_SNAPSHOT_INTERVAL events; reads replay the events past them.
+    # Fold the log (rebuild_snapshots.py) before turning it off
+    EVENT_SOURCING = getenv("EVENT_SOURCING", "false").lower() == "true"
+    EVENT_SNAPSHOT_INTERVAL = int(getenv("EVENT_SNAPSHOT_INTERVAL", "100"))
+
+    # Hash sharding of the rovers table: comma-separated database URLs, one
+    # per shard, each migrated like DATABASE_URL (which keeps plateaus,
+    # trajectories and everything else). Empty keeps every rover in
+    # DATABASE_URL. Append new shards at the end of the list and run
+    # rebalance_shards.py after any change
+    SHARD_URLS = [url.strip() for url in getenv("SHARD_URLS", "").split(",") if url.strip()]
+    SHARD_VIRTUAL_NODES = int(getenv("SHARD_VIRTUAL_NODES", "64"))
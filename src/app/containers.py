@@ -1,17 +1,69 @@
 from dependency_injector import containers, providers
 
 from app.config import Config
+from app.domain.command_cache import CommandCache
+from app.domain.coverage import CoverageRegistry
+from app.domain.obstacles import ObstacleRegistry
+from app.domain.occupancy import OccupancyRegistry
+from app.domain.planner import PlanCache
+from app.domain.plateau import PlateauRegistry
 from app.infrastructure.logger import Logger
 from app.infrastructure.postgres_database import PostgresDatabase
-from app.repositories.rover_repository import RoverRepository
+from app.repositories.coverage_repository import CoverageRepository
+from app.repositories.generation_repository import GenerationRepository
+from app.repositories.obstacle_repository import ObstacleRepository
+from app.repositories.plateau_repository import PlateauRepository
+from app.repositories.read_through_repository import ReadThroughRepository
+from app.repositories.rover_repository import (
+    CoreRoverRepository,
+    EventSourcedRoverRepository,
+    RoverRepository,
+)
+from app.repositories.sharded_rover_repository import ShardedRoverRepository
+from app.repositories.trajectory_repository import TrajectoryRepository
+from app.repositories.write_behind_repository import WriteBehindRoverRepository
 from app.services.rover_service import RoverService
 
 
+# Repositório de sondas de cada banco (o principal ou cada shard)
+if Config.EVENT_SOURCING:
+    _ROVER_REPOSITORY = EventSourcedRoverRepository
+    _ROVER_REPOSITORY_OPTIONS = {
+        "snapshot_interval": Config.EVENT_SNAPSHOT_INTERVAL,
+        "retries": Config.ROVER_UPDATE_RETRIES,
+    }
+else:
+    _ROVER_REPOSITORY = CoreRoverRepository if Config.SQL_CORE_READS else RoverRepository
+    _ROVER_REPOSITORY_OPTIONS = {}
+
+
+def create_rover_shards(urls: list[str], logger: Logger) -> list[RoverRepository]:
+    """Creates one engine per shard URL and the rover repository on each."""
+    return [
+        _ROVER_REPOSITORY(
+            session_factory=PostgresDatabase(
+                url,
+                logger,
+                echo=Config.SQL_ECHO,
+                pool_size=Config.SQL_POOL_SIZE,
+                max_overflow=Config.SQL_MAX_OVERFLOW,
+            ).session,
+            logger=logger,
+            **_ROVER_REPOSITORY_OPTIONS,
+        )
+        for url in urls
+    ]
+
+
 class Container(containers.DeclarativeContainer):
     """Dependency injection container."""
 
     wiring_config = containers.WiringConfiguration(
-        modules=["app.endpoints.rover.controllers"]
+        modules=[
+            "app.endpoints.rover.controllers",
+            "app.endpoints.plateau.controllers",
+            "app.endpoints.health.controllers",
+        ]
     )
 
     # Logger singleton
@@ -27,14 +79,123 @@ class Container(containers.DeclarativeContainer):
         max_overflow=Config.SQL_MAX_OVERFLOW,
     )
 
-    rover_repository = providers.Singleton(
-        RoverRepository,
+    plateau_repository = providers.Singleton(
+        PlateauRepository,
+        session_factory=postgres_database.provided.session,
+        logger=logger
+    )
+
+    # Um engine e um repositório por URL de SHARD_URLS
+    rover_shards = providers.Singleton(create_rover_shards, urls=Config.SHARD_URLS, logger=logger)
+
+    if Config.SHARD_URLS:
+        rover_repository = providers.Singleton(
+            ShardedRoverRepository,
+            shards=rover_shards,
+            plateaus=plateau_repository,
+            logger=logger,
+            replicas=Config.SHARD_VIRTUAL_NODES,
+        )
+    else:
+        rover_repository = providers.Singleton(
+            _ROVER_REPOSITORY,
+            session_factory=postgres_database.provided.session,
+            logger=logger,
+            **_ROVER_REPOSITORY_OPTIONS,
+        )
+
+    rover_store = providers.Singleton(
+        WriteBehindRoverRepository,
+        repository=rover_repository,
+        logger=logger,
+        flush_interval=Config.WRITE_BEHIND_FLUSH_INTERVAL,
+        max_dirty=Config.WRITE_BEHIND_MAX_DIRTY,
+        max_cached=Config.WRITE_BEHIND_MAX_CACHED,
+    )
+
+    generation_repository = providers.Singleton(
+        GenerationRepository,
+        session_factory=postgres_database.provided.session,
+        logger=logger
+    )
+
+    rover_cache = providers.Singleton(
+        ReadThroughRepository,
+        repository=rover_repository,
+        generations=generation_repository,
+        logger=logger,
+        name="rovers",
+        max_size=Config.READ_CACHE_SIZE,
+        ttl=Config.READ_CACHE_TTL,
+        check_interval=Config.READ_CACHE_CHECK_INTERVAL,
+    )
+
+    trajectory_repository = providers.Singleton(
+        TrajectoryRepository,
         session_factory=postgres_database.provided.session,
         logger=logger
     )
 
+    coverage_repository = providers.Singleton(
+        CoverageRepository,
+        session_factory=postgres_database.provided.session,
+        logger=logger
+    )
+
+    obstacle_repository = providers.Singleton(
+        ObstacleRepository,
+        session_factory=postgres_database.provided.session,
+        logger=logger
+    )
+
+    plateau_registry = providers.Singleton(PlateauRegistry)
+
+    command_cache = providers.Singleton(
+        CommandCache,
+        max_size=Config.COMMAND_CACHE_SIZE,
+        max_sequence_length=Config.COMMAND_CACHE_MAX_SEQUENCE_LENGTH,
+    )
+
+    occupancy_registry = providers.Singleton(
+        OccupancyRegistry,
+        dense_cell_limit=Config.OCCUPANCY_DENSE_CELL_LIMIT,
+    )
+
+    coverage_registry = providers.Singleton(
+        CoverageRegistry,
+        tile_size=Config.COVERAGE_TILE_SIZE,
+    )
+
+    obstacle_registry = providers.Singleton(ObstacleRegistry)
+
+    plan_cache = providers.Singleton(
+        PlanCache,
+        max_size=Config.PLANNER_CACHE_SIZE,
+    )
+
     rover_service = providers.Factory(
         RoverService,
-        rover_repository=rover_repository,
-        logger=logger
+        rover_repository=(
+            rover_store if Config.WRITE_BEHIND
+            else rover_cache if Config.READ_CACHE
+            else rover_repository
+        ),
+        plateau_repository=plateau_repository,
+        logger=logger,
+        command_cache=command_cache,
+        occupancy_registry=occupancy_registry,
+        plateau_registry=plateau_registry,
+        trajectory_repository=trajectory_repository,
+        record_trajectories=Config.TRAJECTORY_RECORDING,
+        trajectory_max_runs=Config.TRAJECTORY_MAX_RUNS,
+        coverage_registry=coverage_registry if Config.COVERAGE_TRACKING else None,
+        coverage_repository=coverage_repository,
+        plan_cache=plan_cache,
+        planner_max_expansions=Config.PLANNER_MAX_EXPANSIONS,
+        obstacle_registry=obstacle_registry,
+        obstacle_repository=obstacle_repository,
+        locking=Config.ROVER_LOCKING,
+        update_retries=Config.ROVER_UPDATE_RETRIES,
+        generation_repository=generation_repository if Config.REGISTRY_SYNC else None,
+        registry_sync_interval=Config.REGISTRY_SYNC_INTERVAL,
     )
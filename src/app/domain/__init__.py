@@ -1,7 +1,23 @@
 from app.domain.direction import Direction
-from app.domain.plateau import Plateau
+from app.domain.plateau import Plateau, PlateauRegistry
 from app.domain.rover import Rover
-from app.domain.commands import execute_commands
+from app.domain.commands import (
+    compile_commands,
+    execute_commands,
+    execute_compiled,
+    iter_command_runs,
+)
+from app.domain.envelope import Envelope
 
-__all__ = ["Direction", "Plateau", "Rover", "execute_commands"]
+__all__ = [
+    "Direction",
+    "Envelope",
+    "Plateau",
+    "PlateauRegistry",
+    "Rover",
+    "compile_commands",
+    "execute_commands",
+    "execute_compiled",
+    "iter_command_runs",
+]
 
@@ -0,0 +1,302 @@
+import re
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
+from app.domain.direction import Direction
+from app.domain.obstacles import ObstacleMap
+from app.domain.occupancy import OccupancyIndex
+from app.domain.rover import Rover
+from app.infrastructure.exceptions import (
+    CollisionError,
+    InvalidCommandError,
+    ObstacleError,
+    OutOfBoundsError,
+    ProbeNotFoundError,
+)
+
+
+class BatchStatus(IntEnum):
+    """Per-rover outcome of a batch simulation."""
+    OK = 0
+    OUT_OF_BOUNDS = 1
+    INVALID_COMMAND = 2
+    COLLISION = 3
+    OBSTACLE = 4
+    NOT_FOUND = 5
+
+    @classmethod
+    def from_error(cls, error: Optional[Exception]) -> "BatchStatus":
+        """Maps the error raised for one rover to its outcome."""
+        if error is None:
+            return cls.OK
+        for error_type, status in (
+            (OutOfBoundsError, cls.OUT_OF_BOUNDS),
+            (InvalidCommandError, cls.INVALID_COMMAND),
+            (CollisionError, cls.COLLISION),
+            (ObstacleError, cls.OBSTACLE),
+            (ProbeNotFoundError, cls.NOT_FOUND),
+        ):
+            if isinstance(error, error_type):
+                return status
+        raise ValueError(f"Erro sem status de lote correspondente: {error!r}")
+
+
+# Códigos dos comandos na matriz (0 = preenchimento de sequências mais curtas)
+_PAD, _MOVE, _LEFT, _RIGHT, _INVALID = 0, 1, 2, 3, 4
+
+_CODES = np.full(256, _INVALID, dtype=np.uint8)
+_CODES[ord("M")] = _MOVE
+_CODES[ord("L")] = _LEFT
+_CODES[ord("R")] = _RIGHT
+
+_TURNS = np.array([0, 0, -1, 1, 0], dtype=np.int8)
+
+# Deltas indexados por Direction.code
+_DX = np.array([direction.movement_delta[0] for direction in Direction], dtype=np.int64)
+_DY = np.array([direction.movement_delta[1] for direction in Direction], dtype=np.int64)
+
+_COUNT_PATTERN = re.compile(r"([MLR])([0-9]+)")
+
+# Limite de células (rovers x comandos) materializadas por bloco de colunas
+_CHUNK_CELLS = 1 << 20
+
+# Passos por sonda após expandir a sintaxe compacta; além disso a sequência é cortada
+MAX_EXPANDED_STEPS = 1 << 20
+
+# Caractere sem comando correspondente, marcando onde uma sequência foi cortada
+_CUT = "?"
+_COUNT_DIGITS = len(str(MAX_EXPANDED_STEPS))
+
+
+@dataclass(frozen=True)
+class BatchResult:
+    """
+    Outcome of a batch simulation, one entry per rover.
+
+    `error_index` is the position in the sequence of the command that
+    failed (-1 on success). For OUT_OF_BOUNDS, COLLISION and OBSTACLE,
+    `error_x` and `error_y` hold the first offending coordinate, as
+    reported by OutOfBoundsError, CollisionError and ObstacleError.
+    """
+    status: np.ndarray
+    error_index: np.ndarray
+    error_x: np.ndarray
+    error_y: np.ndarray
+
+    @property
+    def succeeded(self) -> np.ndarray:
+        """Boolean mask of the rovers whose whole sequence was applied."""
+        return self.status == BatchStatus.OK
+
+
+@dataclass
+class Fleet:
+    """
+    Fleet state held as NumPy arrays for vectorized simulation.
+
+    Directions are stored as their compact `Direction.code` (0-3).
+    """
+    x: np.ndarray
+    y: np.ndarray
+    direction: np.ndarray
+    max_x: np.ndarray
+    max_y: np.ndarray
+
+    @classmethod
+    def from_rovers(cls, rovers: Sequence[Rover]) -> "Fleet":
+        """Builds the array representation of the given rovers."""
+        return cls(
+            x=np.fromiter((rover.x for rover in rovers), dtype=np.int32, count=len(rovers)),
+            y=np.fromiter((rover.y for rover in rovers), dtype=np.int32, count=len(rovers)),
+            direction=np.fromiter(
+                (rover.direction.code for rover in rovers),
+                dtype=np.int8,
+                count=len(rovers),
+            ),
+            max_x=np.fromiter((rover.plateau.max_x for rover in rovers), dtype=np.int32, count=len(rovers)),
+            max_y=np.fromiter((rover.plateau.max_y for rover in rovers), dtype=np.int32, count=len(rovers)),
+        )
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def get_direction(self, index: int) -> Direction:
+        """Returns the `Direction` of the rover at `index`."""
+        return Direction.from_code(int(self.direction[index]))
+
+    def execute(
+        self,
+        sequences: Union[str, Sequence[str]],
+        occupancy: Optional[OccupancyIndex] = None,
+        obstacles: Optional[ObstacleMap] = None,
+    ) -> BatchResult:
+        """
+        Applies command sequences to every rover at once.
+
+        `sequences` is either one sequence shared by the whole fleet or one
+        sequence per rover (lengths may differ). Compact sequences
+        ("M10R2") are expanded, so `error_index` always counts single steps;
+        a sequence whose expansion passes MAX_EXPANDED_STEPS is cut there
+        and fails with INVALID_COMMAND at the cut, unless it failed before.
+        Each rover is updated atomically, exactly like
+        `validate_and_execute_commands`: either its whole sequence is
+        applied or its state is left untouched.
+
+        With `occupancy` (the index of the plateau all rovers are on), every
+        step is also checked against the occupied cells with one vectorized
+        lookup. The index is a snapshot: rovers see each other at the cells
+        recorded there, and only collide with their own starting cell when
+        another probe shares it.
+        `obstacles` (the map of that plateau) is checked the same way,
+        with a sorted-key lookup.
+        """
+        size = len(self)
+        codes, lengths = _encode(sequences, size)
+
+        x = self.x.astype(np.int64)
+        y = self.y.astype(np.int64)
+        heading = self.direction.astype(np.int64)
+        max_x = self.max_x.astype(np.int64)[:, None]
+        max_y = self.max_y.astype(np.int64)[:, None]
+
+        status = np.zeros(size, dtype=np.int8)
+        error_index = np.full(size, -1, dtype=np.int64)
+        error_x = np.zeros(size, dtype=np.int64)
+        error_y = np.zeros(size, dtype=np.int64)
+
+        width = codes.shape[1]
+        chunk = max(1, _CHUNK_CELLS // max(size, 1))
+
+        if occupancy is not None:
+            height = occupancy.plateau.max_y + 1
+            own_keys = x * height + y
+            # Célula de partida dividida com outra sonda também conta como colisão
+            shared = np.fromiter((occupancy.count(key) > 1 for key in own_keys.tolist()), dtype=bool, count=size)
+            if occupancy.bitmap is not None:
+                bitmap = np.frombuffer(occupancy.bitmap, dtype=np.uint8)
+            else:
+                occupied_keys = np.fromiter(occupancy.keys(), dtype=np.int64, count=len(occupancy))
+
+        if obstacles is not None:
+            obstacle_height = obstacles.plateau.max_y + 1
+            obstacle_keys = np.sort(np.fromiter(obstacles.keys(), dtype=np.int64, count=len(obstacles)))
+
+        for start in range(0, width, chunk):
+            alive = np.flatnonzero((status == BatchStatus.OK) & (lengths > start))
+            if alive.size == 0:
+                break
+            block = codes[alive, start:start + chunk]
+
+            headings = (heading[alive, None] + np.cumsum(_TURNS[block], axis=1)) % 4
+            moves = block == _MOVE
+            xs = x[alive, None] + np.cumsum(np.where(moves, _DX[headings], 0), axis=1)
+            ys = y[alive, None] + np.cumsum(np.where(moves, _DY[headings], 0), axis=1)
+
+            out_of_bounds = moves & (
+                (xs < 0) | (xs > max_x[alive]) | (ys < 0) | (ys > max_y[alive])
+            )
+            collisions = np.zeros_like(moves)
+            if occupancy is not None:
+                inside = moves & ~out_of_bounds
+                keys = np.where(inside, xs * height + ys, 0)
+                if occupancy.bitmap is not None:
+                    taken = bitmap[keys] == 1
+                else:
+                    taken = np.isin(keys, occupied_keys)
+                collisions = inside & taken & ((keys != own_keys[alive, None]) | shared[alive, None])
+            blocked_cells = np.zeros_like(moves)
+            if obstacles is not None and obstacle_keys.size:
+                inside = moves & ~out_of_bounds
+                keys = np.where(inside, xs * obstacle_height + ys, -1)
+                positions = np.minimum(np.searchsorted(obstacle_keys, keys), obstacle_keys.size - 1)
+                blocked_cells = inside & (obstacle_keys[positions] == keys)
+
+            failures = out_of_bounds | collisions | blocked_cells | (block == _INVALID)
+            failed = failures.any(axis=1)
+
+            rows = np.flatnonzero(failed)
+            columns = failures[rows].argmax(axis=1)
+            failed_rovers = alive[rows]
+            blocked = (
+                out_of_bounds[rows, columns] | collisions[rows, columns] | blocked_cells[rows, columns]
+            )
+            status[failed_rovers] = np.select(
+                [out_of_bounds[rows, columns], blocked_cells[rows, columns], collisions[rows, columns]],
+                [BatchStatus.OUT_OF_BOUNDS, BatchStatus.OBSTACLE, BatchStatus.COLLISION],
+                BatchStatus.INVALID_COMMAND,
+            )
+            error_index[failed_rovers] = start + columns
+            error_x[failed_rovers] = np.where(blocked, xs[rows, columns], 0)
+            error_y[failed_rovers] = np.where(blocked, ys[rows, columns], 0)
+
+            passed = ~failed
+            x[alive[passed]] = xs[passed, -1]
+            y[alive[passed]] = ys[passed, -1]
+            heading[alive[passed]] = headings[passed, -1]
+
+        succeeded = status == BatchStatus.OK
+        self.x[succeeded] = x[succeeded]
+        self.y[succeeded] = y[succeeded]
+        self.direction[succeeded] = heading[succeeded]
+
+        return BatchResult(
+            status=status,
+            error_index=error_index,
+            error_x=error_x,
+            error_y=error_y,
+        )
+
+
+def _encode(sequences: Union[str, Sequence[str]], size: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Encodes sequences into a (rovers x longest sequence) matrix of command
+    codes, padded with no-ops, plus the length of each sequence.
+    """
+    if isinstance(sequences, str):
+        sequences = [sequences] * size
+    if len(sequences) != size:
+        raise ValueError("Deve haver uma sequência de comandos por sonda")
+
+    encoded = [_expand(sequence).encode("latin-1", errors="replace") for sequence in sequences]
+    lengths = np.fromiter((len(sequence) for sequence in encoded), dtype=np.int64, count=size)
+    width = int(lengths.max()) if size else 0
+
+    codes = np.full((size, width), _PAD, dtype=np.uint8)
+    if width:
+        flat = _CODES[np.frombuffer(b"".join(encoded), dtype=np.uint8)]
+        rows = np.repeat(np.arange(size), lengths)
+        offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        codes[rows, np.arange(flat.size) - offsets] = flat
+
+    return codes, lengths
+
+
+def _expand(sequence: str) -> str:
+    """
+    Expands the compact syntax into one command per step ("M3R" -> "MMMR"),
+    cutting it with an invalid command where it would pass MAX_EXPANDED_STEPS.
+    """
+    sequence = sequence.upper()
+    parts: list[str] = []
+    budget = MAX_EXPANDED_STEPS
+    position = 0
+    for match in _COUNT_PATTERN.finditer(sequence):
+        literal = sequence[position:match.start()]
+        # Contagens com mais dígitos que o limite nem são convertidas
+        count = int(match[2]) if len(match[2]) <= _COUNT_DIGITS else budget + 1
+        parts.append(literal[:budget])
+        budget -= len(literal)
+        parts.append(match[1] * max(0, min(budget, count)))
+        budget -= count
+        if budget < 0:
+            return "".join(parts) + _CUT
+        position = match.end()
+
+    tail = sequence[position:]
+    parts.append(tail[:budget])
+    if len(tail) > budget:
+        parts.append(_CUT)
+    return "".join(parts)
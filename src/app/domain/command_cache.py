@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple
+
+from app.domain.commands import CompiledCommands, compile_commands
+from app.domain.direction import Direction
+from app.domain.envelope import Envelope, trace_envelope
+
+
+class CommandTransform(NamedTuple):
+    """Relative transform of a sequence for one starting direction."""
+    compiled: CompiledCommands
+    envelope: Envelope
+
+
+class CommandCache:
+    """
+    Bounded LRU cache of compiled command transforms.
+
+    Entries are keyed by the normalized (upper-cased) sequence and the
+    starting direction, so repeated scripts skip interpretation entirely.
+    Sequences longer than `max_sequence_length` are compiled on every call
+    and never stored, which caps the memory held by a single entry.
+    """
+
+    def __init__(self, max_size: int = 1024, max_sequence_length: int = 10_000) -> None:
+        self._max_size = max_size
+        self._max_sequence_length = max_sequence_length
+        self._entries: OrderedDict[tuple[str, Direction], CommandTransform] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._bypasses = 0
+
+    def get(self, sequence: str, direction: Direction) -> CommandTransform:
+        """Returns the transform for the sequence, compiling it on a miss."""
+        normalized = sequence.upper()
+
+        if self._max_size <= 0 or len(normalized) > self._max_sequence_length:
+            with self._lock:
+                self._bypasses += 1
+            return self._compile(normalized, direction)
+
+        key = (normalized, direction)
+        with self._lock:
+            transform = self._entries.get(key)
+            if transform is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return transform
+            self._misses += 1
+
+        transform = self._compile(normalized, direction)
+
+        with self._lock:
+            self._entries[key] = transform
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+        return transform
+
+    def stats(self) -> dict:
+        """Returns the cache counters."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "bypasses": self._bypasses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        """Drops every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = self._bypasses = 0
+
+    @staticmethod
+    def _compile(sequence: str, direction: Direction) -> CommandTransform:
+        compiled = compile_commands(sequence)
+        return CommandTransform(compiled, trace_envelope(compiled.runs, direction))
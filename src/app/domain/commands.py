@@ -1,8 +1,14 @@
-from dataclasses import replace
-from typing import Callable
+import re
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, NamedTuple, Optional, Union
 
+from app.domain.direction import Direction
+from app.domain.envelope import Envelope, trace_envelope
 from app.domain.rover import Rover
-from app.infrastructure.exceptions import InvalidCommandError
+from app.infrastructure.exceptions import InvalidCommandError, TrajectoryTooLongError
+
+if TYPE_CHECKING:
+    from app.domain.trajectory import TrajectoryRecorder
 
 
 # Factory de comandos: mapeia caracteres para métodos do Rover
@@ -39,13 +45,352 @@ def execute_commands(rover: Rover, sequence: str) -> None:
         handlers[command]()
 
 
+class CommandRun(NamedTuple):
+    """
+    A run of identical effects produced by the compiler.
+
+    `command` is "M" (move `count` steps) or "R" (rotate `count` quarter
+    turns to the right; left turns are folded in as negative turns).
+    """
+    command: str
+    count: int
+
+
+@dataclass(frozen=True)
+class CompiledCommands:
+    """
+    A command sequence collapsed into runs.
+
+    If the source contains an invalid command, compilation stops there and
+    `invalid_command` holds it; the error is raised only after the preceding
+    runs are executed, so an earlier out-of-bounds move still wins.
+    """
+    runs: tuple[CommandRun, ...]
+    invalid_command: Optional[str] = None
+
+
+# Maior contagem aceita, em dígitos, bem abaixo do limite de conversão de inteiros do Python
+MAX_COUNT_DIGITS = 18
+
+# Runs de M, runs de L/R, contagens, ou um único caractere inválido
+_TOKEN_PATTERN = re.compile(r"M+|[LR]+|[0-9]+|.", re.DOTALL)
+
+
+class CommandStreamParser:
+    """
+    Incremental parser that turns chunks of a command sequence into runs.
+
+    Besides the plain syntax ("MMRMM") a compact syntax is accepted, where a
+    command may be followed by a repeat count ("M1000R2M50"). Counts are
+    never expanded: "M1000" is read as a single run of 1000 moves.
+
+    Consecutive L/R commands become a single net rotation (dropped when it
+    cancels out) and consecutive M commands become a single move, also
+    across rotations that cancel out. Runs are yielded as soon as they are
+    complete, so the engine can consume them one by one, and chunks may be
+    split anywhere (even in the middle of a count). Only one pending move,
+    one pending rotation and a partial count (at most MAX_COUNT_DIGITS
+    digits) are held between chunks.
+    """
+
+    def __init__(self) -> None:
+        self._pending_moves = 0
+        self._pending_turns = 0
+        self._last_command: Optional[str] = None
+        self._partial_count = ""
+
+    def feed(self, chunk: str) -> Iterator[CommandRun]:
+        """
+        Parses the next chunk, yielding the runs it completes.
+
+        Raises:
+            InvalidCommandError: When the invalid command (or a count longer
+                than MAX_COUNT_DIGITS) is reached, after every run before it
+                has been yielded
+        """
+        text = self._partial_count + chunk.upper()
+        self._partial_count = ""
+        pending_moves = self._pending_moves
+        pending_turns = self._pending_turns
+        last_command = self._last_command
+        error = None
+
+        try:
+            for match in _TOKEN_PATTERN.finditer(text):
+                token = match.group()
+                head = token[0]
+
+                if head == "M":
+                    if pending_turns % 4:
+                        if pending_moves:
+                            yield CommandRun("M", pending_moves)
+                        yield CommandRun("R", pending_turns % 4)
+                        pending_moves = 0
+                    pending_turns = 0
+                    pending_moves += len(token)
+                elif head == "L" or head == "R":
+                    pending_turns += 2 * token.count("R") - len(token)
+                elif "0" <= head <= "9" and last_command is not None:
+                    if len(token) > MAX_COUNT_DIGITS:
+                        error = InvalidCommandError(token[:MAX_COUNT_DIGITS + 1])
+                        break
+                    if match.end() == len(text):
+                        # A contagem pode continuar no próximo chunk
+                        self._partial_count = token
+                        break
+                    pending_moves, pending_turns = _repeat_last(
+                        last_command, int(token), pending_moves, pending_turns
+                    )
+                    last_command = None
+                    continue
+                else:
+                    error = InvalidCommandError(head)
+                    break
+
+                last_command = token[-1]
+        finally:
+            self._pending_moves = pending_moves
+            self._pending_turns = pending_turns
+            self._last_command = last_command
+
+        if error is not None:
+            yield from self._flush()
+            raise error
+
+    def close(self) -> Iterator[CommandRun]:
+        """
+        Signals the end of the sequence, yielding the remaining runs.
+
+        Raises:
+            InvalidCommandError: If the sequence ends in an invalid command
+        """
+        if self._partial_count:
+            self._pending_moves, self._pending_turns = _repeat_last(
+                self._last_command,
+                int(self._partial_count),
+                self._pending_moves,
+                self._pending_turns,
+            )
+            self._partial_count = ""
+        yield from self._flush()
+
+    def _flush(self) -> Iterator[CommandRun]:
+        pending_moves, pending_turns = self._pending_moves, self._pending_turns % 4
+        self._pending_moves = self._pending_turns = 0
+        if pending_moves:
+            yield CommandRun("M", pending_moves)
+        if pending_turns:
+            yield CommandRun("R", pending_turns)
+
+
+def _repeat_last(command: str, count: int, moves: int, turns: int) -> tuple[int, int]:
+    """Applies a repeat count to the last command ("LR3" = L + 3R)."""
+    extra = count - 1
+    if command == "M":
+        return moves + extra, turns
+    return moves, turns + (extra if command == "R" else -extra)
+
+
+def iter_command_runs(sequence: str) -> Iterator[CommandRun]:
+    """
+    Streams the runs of a whole command sequence (plain or compact syntax).
+
+    Raises:
+        InvalidCommandError: When the invalid command is reached, after every
+            run before it has been yielded
+    """
+    parser = CommandStreamParser()
+    yield from parser.feed(sequence)
+    yield from parser.close()
+
+
+def compile_commands(sequence: str) -> CompiledCommands:
+    """
+    Compiles a command sequence (plain or compact syntax) into move and
+    rotation runs.
+    """
+    runs: list[CommandRun] = []
+    try:
+        for run in iter_command_runs(sequence):
+            runs.append(run)
+    except InvalidCommandError as e:
+        return CompiledCommands(tuple(runs), invalid_command=e.command)
+
+    return CompiledCommands(tuple(runs))
+
+
+def execute_runs(rover: Rover, runs: Iterable[CommandRun]) -> None:
+    """
+    Executes runs on the probe as they are produced.
+
+    Raises:
+        OutOfBoundsError: If a movement leaves the plateau bounds
+    """
+    for command, count in runs:
+        if command == "M":
+            rover.move(count)
+        else:
+            rover.rotate(count)
+
+
+def execute_compiled(rover: Rover, compiled: CompiledCommands) -> None:
+    """
+    Executes a compiled sequence on the probe.
+
+    Produces the same final state and raises the same errors as
+    `execute_commands` on the source sequence, with one bounds check per
+    run instead of per step.
+
+    Raises:
+        InvalidCommandError: If the source sequence had an invalid command
+        OutOfBoundsError: If a movement leaves the plateau bounds
+        CollisionError: If a movement runs into another probe
+        ObstacleError: If a movement runs into an obstacle
+    """
+    execute_runs(rover, compiled.runs)
+
+    if compiled.invalid_command is not None:
+        raise InvalidCommandError(compiled.invalid_command)
+
+
+class CommandStream:
+    """
+    Applies a command sequence that arrives in chunks to a probe atomically.
+
+    Chunks are parsed and executed on a copy of the probe as they arrive,
+    so memory stays constant regardless of the sequence length. The
+    original probe is only updated by `finish`, once the whole sequence
+    has been accepted.
+
+    When a `recorder` is given, every executed run is also recorded on it,
+    and the stream is rejected as soon as the recorder overflows.
+    """
+
+    def __init__(self, rover: Rover, recorder: Optional["TrajectoryRecorder"] = None) -> None:
+        self.rover = rover
+        self.recorder = recorder
+        self._simulation_rover = replace(rover)
+        self._parser = CommandStreamParser()
+
+    def _execute(self, runs: Iterable[CommandRun]) -> None:
+        if self.recorder is not None:
+            runs = self.recorder.tap(runs)
+        execute_runs(self._simulation_rover, runs)
+        if self.recorder is not None and self.recorder.overflowed:
+            raise TrajectoryTooLongError(self.recorder.max_runs)
+
+    def feed(self, chunk: str) -> None:
+        """
+        Parses and executes the next chunk on the simulation copy.
+
+        Raises:
+            InvalidCommandError: If an invalid command is found
+            OutOfBoundsError: If a movement leaves the plateau bounds
+            TrajectoryTooLongError: If the recorder overflowed
+        """
+        self._execute(self._parser.feed(chunk))
+
+    def finish(self) -> Rover:
+        """
+        Executes the remaining runs and applies the final state to the probe.
+
+        Raises:
+            InvalidCommandError: If an invalid command is found
+            OutOfBoundsError: If a movement leaves the plateau bounds
+            TrajectoryTooLongError: If the recorder overflowed
+        """
+        self._execute(self._parser.close())
+
+        self.rover.x = self._simulation_rover.x
+        self.rover.y = self._simulation_rover.y
+        self.rover.direction = self._simulation_rover.direction
+        return self.rover
+
+
+@dataclass(frozen=True)
+class TrajectoryEnvelope:
+    """
+    A compiled sequence together with its envelope for each of the four
+    starting directions (indexed by `Direction.code`).
+    """
+    compiled: CompiledCommands
+    envelopes: tuple[Envelope, ...]
+
+    def for_direction(self, direction: Direction) -> Envelope:
+        """Returns the envelope for a probe starting with the given direction."""
+        return self.envelopes[direction.code]
+
+
+def build_envelope(sequence: str) -> TrajectoryEnvelope:
+    """
+    Precomputes the trajectory envelope of a command sequence.
+
+    Only the part before an invalid command (if any) is summarized. The
+    envelope is traced once from NORTH and rotated for the other headings.
+    """
+    compiled = compile_commands(sequence)
+    north = trace_envelope(compiled.runs, Direction.NORTH)
+    return TrajectoryEnvelope(
+        compiled=compiled,
+        envelopes=tuple(north.rotate(turns) for turns in range(4)),
+    )
+
+
+def _is_clear(rover: Rover, envelope: Envelope) -> bool:
+    """
+    Checks that no other probe and no obstacle is inside the box of an
+    envelope rotated to the rover.
+    """
+    min_x, max_x = rover.x + envelope.min_x, rover.x + envelope.max_x
+    min_y, max_y = rover.y + envelope.min_y, rover.y + envelope.max_y
+    if rover.obstacles is not None and rover.obstacles.any_in_box(min_x, max_x, min_y, max_y):
+        return False
+    if rover.occupancy is None:
+        return True
+    return not rover.occupancy.any_in_box(rover.id, min_x, max_x, min_y, max_y)
+
+
+def apply_envelope(rover: Rover, compiled: CompiledCommands, envelope: Envelope) -> None:
+    """
+    Applies a precomputed envelope to the probe atomically.
+
+    Accepting or rejecting the sequence takes a handful of comparisons. Only
+    when the envelope does not fit (or another probe or an obstacle is
+    inside its bounding box) is the compiled sequence replayed on a copy,
+    to recover the first failing step for the error message.
+
+    Raises:
+        InvalidCommandError: If an invalid command is found
+        OutOfBoundsError: If a movement leaves the plateau bounds
+        CollisionError: If a movement runs into another probe
+        ObstacleError: If a movement runs into an obstacle
+    """
+    if envelope.fits(rover.plateau, rover.x, rover.y) and _is_clear(rover, envelope):
+        if compiled.invalid_command is not None:
+            raise InvalidCommandError(compiled.invalid_command)
+        rover.x += envelope.dx
+        rover.y += envelope.dy
+        rover.direction = envelope.direction
+        return
+
+    simulation_rover = replace(rover)
+    execute_compiled(simulation_rover, compiled)
+
+    # Só chega aqui se a caixa tinha outra sonda ou obstáculo fora do caminho percorrido,
+    # ou se a sonda começou fora do planalto e voltou para dentro
+    rover.x = simulation_rover.x
+    rover.y = simulation_rover.y
+    rover.direction = simulation_rover.direction
+
+
 def validate_and_execute_commands(rover: Rover, sequence: str) -> None:
     """
     Validates and executes a command sequence atomically.
     
-    It first simulates the entire sequence on a copy of the rover.
-    If the simulation succeeds, the changes are applied to the original rover.
-    If it fails at any point, the original rover remains untouched.
+    The sequence is checked against the plateau through its trajectory
+    envelope, without a per-step loop. If it fits, the net transform is
+    applied to the original rover. If it fails at any point, the original
+    rover remains untouched.
     
     Args:
         rover: The probe that will run the commands
@@ -59,16 +404,197 @@ def validate_and_execute_commands(rover: Rover, sequence: str) -> None:
         This is an atomic operation: either all commands run,
         or none do.
     """
-    simulation_rover = replace(
-        rover,
-        x=rover.x,
-        y=rover.y,
-        direction=rover.direction,
+    trajectory = build_envelope(sequence)
+    apply_envelope(
+        rover, trajectory.compiled, trajectory.for_direction(rover.direction)
     )
 
-    execute_commands(simulation_rover, sequence)
+
+@dataclass(frozen=True)
+class CommandBlock:
+    """
+    A command program: runs and nested blocks, repeated `count` times.
+
+    `body` is the envelope of a single iteration and `envelope` the one of
+    all iterations, both traced from NORTH. They are computed by composing
+    transforms, so a block costs O(log count) compositions regardless of
+    its expanded length.
+    """
+    items: tuple[Union[CommandRun, "CommandBlock"], ...]
+    count: int
+    body: Envelope
+    envelope: Envelope
+
+
+# Limite de aninhamento de blocos de repetição
+MAX_PROGRAM_DEPTH = 32
+
+# Abertura de bloco, fechamento com contagem opcional, ou trecho sem parênteses
+_PROGRAM_PATTERN = re.compile(r"\(|\)[0-9]*|[^()]+")
+
+
+def make_block(items: Iterable[Union[CommandRun, CommandBlock]], count: int = 1) -> CommandBlock:
+    """Builds a block, composing the transforms of its items."""
+    items = tuple(items)
+    body = Envelope.identity()
+    pending_runs: list[CommandRun] = []
+
+    for item in items:
+        if isinstance(item, CommandRun):
+            pending_runs.append(item)
+            continue
+        if pending_runs:
+            body = body.then(trace_envelope(pending_runs, Direction.NORTH))
+            pending_runs = []
+        body = body.then(item.envelope)
+    if pending_runs:
+        body = body.then(trace_envelope(pending_runs, Direction.NORTH))
+
+    return CommandBlock(items=items, count=count, body=body, envelope=body.repeat(count))
+
+
+def compile_program(text: str) -> CommandBlock:
+    """
+    Compiles a command program with (nested) repeat blocks.
+
+    Programs extend the compact syntax with blocks: "(MMRMMR)50000" repeats
+    the block 50,000 times and blocks may be nested ("(M2(RM)3)10"). The
+    whole program is parsed before anything runs, so syntax errors are
+    reported even if an earlier move would leave the plateau.
+
+    Raises:
+        InvalidCommandError: If an invalid command or unbalanced parenthesis
+            is found, a count is longer than MAX_COUNT_DIGITS, or blocks are
+            nested deeper than MAX_PROGRAM_DEPTH
+    """
+    tokens = _PROGRAM_PATTERN.findall(text.upper())
+    items, _, _ = _parse_block(tokens, 0, depth=0)
+    return make_block(items)
+
+
+def _parse_block(
+    tokens: list[str], position: int, depth: int
+) -> tuple[list[Union[CommandRun, CommandBlock]], int, int]:
+    """Parses items until the closing parenthesis of the current block."""
+    items: list[Union[CommandRun, CommandBlock]] = []
+
+    while position < len(tokens):
+        token = tokens[position]
+        if token == "(":
+            if depth >= MAX_PROGRAM_DEPTH:
+                raise InvalidCommandError("(")
+            inner, count, position = _parse_block(tokens, position + 1, depth + 1)
+            items.append(make_block(inner, count))
+        elif token[0] == ")":
+            if depth == 0:
+                raise InvalidCommandError(")")
+            if len(token) - 1 > MAX_COUNT_DIGITS:
+                raise InvalidCommandError(token[1:MAX_COUNT_DIGITS + 2])
+            return items, int(token[1:] or 1), position + 1
+        else:
+            compiled = compile_commands(token)
+            if compiled.invalid_command is not None:
+                raise InvalidCommandError(compiled.invalid_command)
+            items.extend(compiled.runs)
+            position += 1
+
+    if depth > 0:
+        raise InvalidCommandError("(")
+    return items, 1, position
+
+
+def execute_program(rover: Rover, program: CommandBlock) -> None:
+    """
+    Executes a command program on the probe atomically.
+
+    Accepting the program is a bounds comparison on its envelope. When it
+    does not fit, the program is replayed on a copy: blocks that fit are
+    applied wholesale, the number of whole iterations of a repeat block
+    that fit is found by binary search, and only the failing iteration is
+    descended into, down to the run that raises.
+
+    Raises:
+        OutOfBoundsError: If a movement leaves the plateau bounds
+        CollisionError: If a movement runs into another probe
+        ObstacleError: If a movement runs into an obstacle
+    """
+    if _fits(rover, program.envelope):
+        _advance(rover, program.envelope)
+        return
+
+    simulation_rover = replace(rover)
+    _replay_block(simulation_rover, program)
 
     rover.x = simulation_rover.x
     rover.y = simulation_rover.y
     rover.direction = simulation_rover.direction
 
+
+def _fits(rover: Rover, envelope: Envelope) -> bool:
+    """Checks a NORTH-traced envelope from the rover's current state."""
+    rotated = envelope.rotate(rover.direction.code)
+    return rotated.fits(rover.plateau, rover.x, rover.y) and _is_clear(rover, rotated)
+
+
+def _advance(rover: Rover, envelope: Envelope) -> None:
+    """Applies a NORTH-traced envelope from the rover's current state."""
+    rotated = envelope.rotate(rover.direction.code)
+    rover.x += rotated.dx
+    rover.y += rotated.dy
+    rover.direction = rotated.direction
+
+
+def _replay_block(rover: Rover, block: CommandBlock) -> None:
+    remaining = block.count
+    # Após 4 iterações o corpo volta ao mesmo estado se o deslocamento for nulo
+    period = block.body.repeat(4)
+    periodic = period.dx == 0 and period.dy == 0
+
+    while remaining:
+        # Maior número de iterações completas que cabem no planalto
+        low, high = _iteration_bounds(rover, period, remaining)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if _fits(rover, block.body.repeat(middle)):
+                low = middle
+            else:
+                high = middle - 1
+        if low:
+            _advance(rover, block.body.repeat(low))
+            remaining -= low
+        if not remaining:
+            return
+
+        if periodic:
+            # Um ciclo completo validado passo a passo cobre todas as iterações
+            for _ in range(min(remaining, 4)):
+                _replay_items(rover, block.items)
+                remaining -= 1
+            _advance(rover, block.body.repeat(remaining))
+            return
+
+        _replay_items(rover, block.items)
+        remaining -= 1
+
+
+def _iteration_bounds(rover: Rover, period: Envelope, remaining: int) -> tuple[int, int]:
+    """Bounds for the binary search over the iterations of a block that fit."""
+    if period.dx == 0 and period.dy == 0:
+        # Sem deslocamento, da quarta iteração em diante a caixa não cresce mais
+        if remaining >= 4 and _fits(rover, period):
+            return remaining, remaining
+        return 0, min(remaining, 3)
+    # Cada 4 iterações afastam a sonda ao menos uma célula, então no máximo
+    # 4 * (max_x + max_y + 1) - 1 iterações seguidas ficam no planalto
+    plateau = rover.plateau
+    return 0, min(remaining, 4 * (plateau.max_x + plateau.max_y) + 3)
+
+
+def _replay_items(rover: Rover, items: Iterable[Union[CommandRun, CommandBlock]]) -> None:
+    for item in items:
+        if isinstance(item, CommandRun):
+            execute_runs(rover, (item,))
+        elif _fits(rover, item.envelope):
+            _advance(rover, item.envelope)
+        else:
+            _replay_block(rover, item)
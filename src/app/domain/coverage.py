@@ -0,0 +1,258 @@
+import zlib
+from threading import Lock, RLock
+from typing import Callable, Iterable
+
+import numpy as np
+
+from app.domain.plateau import Plateau
+from app.domain.trajectory import Trajectory
+
+# Lado (em células) de cada bloco do mapa de cobertura
+TILE_SIZE = 256
+
+# Trajetórias com até este número de passos são marcadas de uma vez, ponto a ponto
+_EXPAND_LIMIT = 1 << 20
+
+
+class CoverageMap:
+    """
+    Cells of one plateau that have ever been visited by a probe.
+
+    The plateau is split into square tiles of `tile_size` cells, each a
+    NumPy bool array allocated on first visit, so small plateaus hold one
+    dense array and huge ones only pay for the regions actually explored.
+    Trajectories are marked one straight segment (an array slice) at a time,
+    or all points at once when they are short, never with a Python loop per
+    step. Tiles changed since the last `pop_dirty` are tracked so only
+    those need to be persisted.
+    """
+
+    def __init__(self, plateau: Plateau, tile_size: int = TILE_SIZE) -> None:
+        self.plateau = plateau
+        self.lock = RLock()
+        self.tile_size = tile_size
+        self._width = plateau.max_x + 1
+        self._height = plateau.max_y + 1
+        self._tiles: dict[tuple[int, int], np.ndarray] = {}
+        self._dirty: set[tuple[int, int]] = set()
+        self._visited = 0
+
+    @property
+    def visited_cells(self) -> int:
+        return self._visited
+
+    @property
+    def total_cells(self) -> int:
+        return self._width * self._height
+
+    @property
+    def ratio(self) -> float:
+        """Fraction of the plateau that has been visited."""
+        return self._visited / self.total_cells
+
+    def __len__(self) -> int:
+        """Number of allocated tiles."""
+        return len(self._tiles)
+
+    def is_visited(self, x: int, y: int) -> bool:
+        tile = self._tiles.get((x // self.tile_size, y // self.tile_size))
+        return tile is not None and bool(tile[x % self.tile_size, y % self.tile_size])
+
+    def mark_cell(self, x: int, y: int) -> None:
+        self._mark_box(x, x, y, y)
+
+    def mark(self, trajectory: Trajectory) -> None:
+        """Marks every cell of the trajectory, start included."""
+        if trajectory.points <= _EXPAND_LIMIT:
+            self._mark_points([trajectory])
+            return
+
+        x, y = trajectory.start_x, trajectory.start_y
+        self.mark_cell(x, y)
+        for dx, dy, steps in trajectory.segments():
+            end_x, end_y = x + dx * steps, y + dy * steps
+            self._mark_box(min(x + dx, end_x), max(x + dx, end_x), min(y + dy, end_y), max(y + dy, end_y))
+            x, y = end_x, end_y
+
+    def mark_many(self, trajectories: Iterable[Trajectory]) -> None:
+        """
+        Marks many trajectories, with the short ones expanded and marked
+        together in one vectorized pass.
+        """
+        short: list[Trajectory] = []
+        points = 0
+        for trajectory in trajectories:
+            if not trajectory.points:
+                self.mark_cell(trajectory.start_x, trajectory.start_y)
+                continue
+            if trajectory.points > _EXPAND_LIMIT:
+                self.mark(trajectory)
+                continue
+            if points + trajectory.points > _EXPAND_LIMIT:
+                self._mark_points(short)
+                short, points = [], 0
+            short.append(trajectory)
+            points += trajectory.points
+        if short:
+            self._mark_points(short)
+
+    def load_tile(self, tile_x: int, tile_y: int, data: bytes) -> None:
+        """Loads a tile produced by `dump_tile`, replacing the one in memory."""
+        width, height = self._tile_shape(tile_x, tile_y)
+        packed = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+        tile = np.unpackbits(packed, count=width * height).reshape(width, height).astype(bool)
+
+        previous = self._tiles.get((tile_x, tile_y))
+        if previous is not None:
+            self._visited -= int(np.count_nonzero(previous))
+        self._tiles[(tile_x, tile_y)] = tile
+        self._visited += int(np.count_nonzero(tile))
+
+    def dump_tile(self, tile_x: int, tile_y: int) -> bytes:
+        """Serializes a tile as zlib-compressed packed bits."""
+        return zlib.compress(np.packbits(self._tiles[(tile_x, tile_y)]).tobytes())
+
+    def pop_dirty(self) -> list[tuple[int, int, bytes]]:
+        """Returns the serialized tiles changed since the last call."""
+        tiles = [(tile_x, tile_y, self.dump_tile(tile_x, tile_y)) for tile_x, tile_y in sorted(self._dirty)]
+        self._dirty.clear()
+        return tiles
+
+    def downsample(self, width: int, height: int) -> np.ndarray:
+        """
+        Returns a (height, width) grid with the visited fraction of each
+        block of the plateau; row 0 holds the lowest y.
+        """
+        width = min(width, self._width)
+        height = min(height, self._height)
+        counts = np.zeros(width * height, dtype=np.int64)
+
+        for (tile_x, tile_y), tile in self._tiles.items():
+            xs, ys = np.nonzero(tile)
+            if not len(xs):
+                continue
+            columns = (xs + tile_x * self.tile_size) * width // self._width
+            rows = (ys + tile_y * self.tile_size) * height // self._height
+            counts += np.bincount(rows * width + columns, minlength=width * height)
+
+        column_sizes = np.diff(-(-np.arange(width + 1) * self._width // width))
+        row_sizes = np.diff(-(-np.arange(height + 1) * self._height // height))
+        return counts.reshape(height, width) / np.outer(row_sizes, column_sizes)
+
+    def _tile_shape(self, tile_x: int, tile_y: int) -> tuple[int, int]:
+        return (
+            min(self.tile_size, self._width - tile_x * self.tile_size),
+            min(self.tile_size, self._height - tile_y * self.tile_size),
+        )
+
+    def _tile(self, tile_x: int, tile_y: int) -> np.ndarray:
+        tile = self._tiles.get((tile_x, tile_y))
+        if tile is None:
+            tile = np.zeros(self._tile_shape(tile_x, tile_y), dtype=bool)
+            self._tiles[(tile_x, tile_y)] = tile
+        return tile
+
+    def _mark_box(self, min_x: int, max_x: int, min_y: int, max_y: int) -> None:
+        size = self.tile_size
+        for tile_x in range(min_x // size, max_x // size + 1):
+            origin_x = tile_x * size
+            for tile_y in range(min_y // size, max_y // size + 1):
+                origin_y = tile_y * size
+                tile = self._tile(tile_x, tile_y)
+                cells = tile[
+                    max(min_x - origin_x, 0):max_x - origin_x + 1,
+                    max(min_y - origin_y, 0):max_y - origin_y + 1,
+                ]
+                new = cells.size - int(np.count_nonzero(cells))
+                if new:
+                    cells[...] = True
+                    self._visited += new
+                    self._dirty.add((tile_x, tile_y))
+
+    def _mark_points(self, trajectories: list[Trajectory]) -> None:
+        # Cada trajetória contribui com o ponto inicial seguido dos deslocamentos unitários
+        segments = np.array(
+            [segment for trajectory in trajectories for segment in trajectory.segments()],
+            dtype=np.int64,
+        ).reshape(-1, 3)
+        counts = np.array([trajectory.points for trajectory in trajectories], dtype=np.int64)
+        starts = np.cumsum(counts + 1) - counts - 1
+        total = int(counts.sum()) + len(trajectories)
+
+        xs = np.zeros(total, dtype=np.int64)
+        ys = np.zeros(total, dtype=np.int64)
+        moves = np.ones(total, dtype=bool)
+        moves[starts] = False
+        steps = segments[:, 2]
+        xs[moves] = np.repeat(segments[:, 0], steps)
+        ys[moves] = np.repeat(segments[:, 1], steps)
+
+        # Reinicia a soma acumulada no início de cada trajetória
+        start_x = np.array([trajectory.start_x for trajectory in trajectories], dtype=np.int64)
+        start_y = np.array([trajectory.start_y for trajectory in trajectories], dtype=np.int64)
+        np.cumsum(xs, out=xs)
+        np.cumsum(ys, out=ys)
+        offset_x = start_x - np.concatenate(([0], xs[starts[1:] - 1]))
+        offset_y = start_y - np.concatenate(([0], ys[starts[1:] - 1]))
+        xs += np.repeat(offset_x, counts + 1)
+        ys += np.repeat(offset_y, counts + 1)
+
+        size = self.tile_size
+        tile_keys = (xs // size) * (self._height // size + 1) + ys // size
+        order = np.argsort(tile_keys, kind="stable")
+        tile_keys = tile_keys[order]
+        boundaries = np.flatnonzero(np.diff(tile_keys)) + 1
+
+        for group in np.split(order, boundaries):
+            tile_x, tile_y = int(xs[group[0]]) // size, int(ys[group[0]]) // size
+            tile = self._tile(tile_x, tile_y)
+            local_x = xs[group] - tile_x * size
+            local_y = ys[group] - tile_y * size
+            unseen = ~tile[local_x, local_y]
+            if not unseen.any():
+                continue
+            new = np.unique(local_x[unseen] * tile.shape[1] + local_y[unseen])
+            tile[local_x, local_y] = True
+            self._visited += len(new)
+            self._dirty.add((tile_x, tile_y))
+
+
+def merge_tiles(stored: bytes, data: bytes) -> bytes:
+    """Returns the union of two serializations (`dump_tile`) of the same tile."""
+    union = (
+        np.frombuffer(zlib.decompress(stored), dtype=np.uint8)
+        | np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+    )
+    return zlib.compress(union.tobytes())
+
+
+class CoverageRegistry:
+    """In-process registry holding one coverage map per plateau."""
+
+    def __init__(self, tile_size: int = TILE_SIZE) -> None:
+        self._tile_size = tile_size
+        self._maps: dict[Plateau, CoverageMap] = {}
+        self._lock = Lock()
+
+    def get(self, plateau: Plateau, loader: Callable[[CoverageMap], None]) -> CoverageMap:
+        """
+        Returns the map of the plateau, letting `loader` fill it (persisted
+        tiles, known positions) the first time it is requested.
+        """
+        with self._lock:
+            coverage = self._maps.get(plateau)
+            if coverage is None:
+                coverage = CoverageMap(plateau, self._tile_size)
+                loader(coverage)
+                self._maps[plateau] = coverage
+            return coverage
+
+    def discard(self, plateau: Plateau) -> None:
+        """Drops the map of the plateau; it is reloaded on the next request."""
+        with self._lock:
+            self._maps.pop(plateau, None)
+
+    def clear(self) -> None:
+        """Drops every map; they are reloaded on the next request."""
+        with self._lock:
+            self._maps.clear()
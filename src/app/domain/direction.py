@@ -1,44 +1,54 @@
 from enum import Enum
 
+# Valores das direções no sentido horário; a posição de cada uma é o seu código
+_CLOCKWISE = ("NORTH", "EAST", "SOUTH", "WEST")
+
 
 class Direction(Enum):
     """
     Enum representing the cardinal directions with rotation behavior (State Pattern).
     Each direction knows how to rotate left/right and what the movement delta is.
+
+    Internally every direction carries a compact code from 0 to 3, in
+    clockwise order (NORTH, EAST, SOUTH, WEST), used to index the
+    precomputed rotation and delta tables below.
     """
     NORTH = "NORTH"
     EAST = "EAST"
     SOUTH = "SOUTH"
     WEST = "WEST"
 
+    def __init__(self, value: str) -> None:
+        self.code = _CLOCKWISE.index(value)
+
+    @classmethod
+    def from_code(cls, code: int) -> "Direction":
+        """Returns the direction encoded by `code` (taken modulo 4)."""
+        return _DIRECTIONS[code % 4]
+
     def turn_left(self) -> "Direction":
         """Returns the direction after rotating 90° to the left."""
-        rotations = {
-            Direction.NORTH: Direction.WEST,
-            Direction.WEST: Direction.SOUTH,
-            Direction.SOUTH: Direction.EAST,
-            Direction.EAST: Direction.NORTH,
-        }
-        return rotations[self]
+        return _TURN_LEFT[self.code]
 
     def turn_right(self) -> "Direction":
         """Returns the direction after rotating 90° to the right."""
-        rotations = {
-            Direction.NORTH: Direction.EAST,
-            Direction.EAST: Direction.SOUTH,
-            Direction.SOUTH: Direction.WEST,
-            Direction.WEST: Direction.NORTH,
-        }
-        return rotations[self]
+        return _TURN_RIGHT[self.code]
+
+    def rotate(self, quarter_turns: int) -> "Direction":
+        """
+        Returns the direction after the given number of 90° rotations.
+        Positive values rotate to the right, negative values to the left.
+        """
+        return _DIRECTIONS[(self.code + quarter_turns) % 4]
 
     @property
     def movement_delta(self) -> tuple[int, int]:
         """Returns (dx, dy) to move one step in the current direction."""
-        deltas = {
-            Direction.NORTH: (0, 1),
-            Direction.EAST: (1, 0),
-            Direction.SOUTH: (0, -1),
-            Direction.WEST: (-1, 0),
-        }
-        return deltas[self]
+        return _DELTAS[self.code]
+
 
+# Tabelas pré-computadas, indexadas pelo código da direção
+_DIRECTIONS = tuple(Direction(value) for value in _CLOCKWISE)
+_TURN_LEFT = tuple(_DIRECTIONS[(code - 1) % 4] for code in range(4))
+_TURN_RIGHT = tuple(_DIRECTIONS[(code + 1) % 4] for code in range(4))
+_DELTAS = ((0, 1), (1, 0), (0, -1), (-1, 0))
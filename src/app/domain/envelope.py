@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from typing import Iterable
+
+from app.domain.direction import Direction
+from app.domain.plateau import Plateau
+
+
+@dataclass(frozen=True)
+class Envelope:
+    """
+    Position-independent summary of a command sequence for one starting direction.
+
+    Holds the net displacement, the final heading and the bounding box of
+    every cell visited, all relative to the starting cell (which is always
+    part of the box).
+    """
+    dx: int
+    dy: int
+    direction: Direction
+    min_x: int = 0
+    max_x: int = 0
+    min_y: int = 0
+    max_y: int = 0
+
+    def fits(self, plateau: Plateau, x: int, y: int) -> bool:
+        """Checks whether the whole trajectory stays on the plateau when started at (x, y)."""
+        return (
+            0 <= x + self.min_x
+            and x + self.max_x <= plateau.max_x
+            and 0 <= y + self.min_y
+            and y + self.max_y <= plateau.max_y
+        )
+
+    @classmethod
+    def identity(cls) -> "Envelope":
+        """Returns the envelope of an empty sequence started facing NORTH."""
+        return cls(dx=0, dy=0, direction=Direction.NORTH)
+
+    def then(self, other: "Envelope") -> "Envelope":
+        """
+        Composes this envelope with `other` executed right after it.
+
+        `other` must have been traced from NORTH; it is rotated to the
+        heading this envelope ends in and shifted by its displacement.
+        """
+        moved = other.rotate(self.direction.code)
+        return Envelope(
+            dx=self.dx + moved.dx,
+            dy=self.dy + moved.dy,
+            direction=moved.direction,
+            min_x=min(self.min_x, self.dx + moved.min_x),
+            max_x=max(self.max_x, self.dx + moved.max_x),
+            min_y=min(self.min_y, self.dy + moved.min_y),
+            max_y=max(self.max_y, self.dy + moved.max_y),
+        )
+
+    def repeat(self, count: int) -> "Envelope":
+        """
+        Returns the envelope of this sequence (traced from NORTH) repeated
+        `count` times, by repeated squaring: O(log count) compositions.
+        """
+        result = Envelope.identity()
+        base = self
+        while count > 0:
+            if count & 1:
+                result = result.then(base)
+            count >>= 1
+            if count:
+                base = base.then(base)
+        return result
+
+    def rotate(self, quarter_turns: int) -> "Envelope":
+        """
+        Returns the envelope of the same sequence started after the given
+        number of 90° right rotations.
+        """
+        envelope = self
+        for _ in range(quarter_turns % 4):
+            # Girar 90° à direita: (x, y) -> (y, -x)
+            envelope = Envelope(
+                dx=envelope.dy,
+                dy=-envelope.dx,
+                direction=envelope.direction.rotate(1),
+                min_x=envelope.min_y,
+                max_x=envelope.max_y,
+                min_y=-envelope.max_x,
+                max_y=-envelope.min_x,
+            )
+        return envelope
+
+
+def trace_envelope(runs: Iterable[tuple[str, int]], direction: Direction) -> Envelope:
+    """
+    Builds the envelope of compiled runs ("M", steps) / ("R", quarter turns)
+    started facing `direction`. Costs one update per run, not per step.
+    """
+    x = y = min_x = max_x = min_y = max_y = 0
+
+    for command, count in runs:
+        if command == "R":
+            direction = direction.rotate(count)
+            continue
+        dx, dy = direction.movement_delta
+        x += dx * count
+        y += dy * count
+        min_x, max_x = min(min_x, x), max(max_x, x)
+        min_y, max_y = min(min_y, y), max(max_y, y)
+
+    return Envelope(x, y, direction, min_x, max_x, min_y, max_y)
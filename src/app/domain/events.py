@@ -0,0 +1,46 @@
+from typing import Iterable, NamedTuple
+
+from app.domain.direction import Direction
+
+
+class RoverEvent(NamedTuple):
+    """
+    Net effect of one accepted command batch on a probe: a displacement
+    and a number of right quarter turns (0-3), in the plateau's frame.
+
+    Unlike a batch's envelope, which is relative to the heading it starts
+    on, events are absolute, so any run of them composes by plain addition:
+    a probe is rebuilt from a snapshot and the sums of the events after it,
+    whether those are folded here or by a `SUM` in the database.
+    """
+    dx: int
+    dy: int
+    turns: int
+
+    @classmethod
+    def between(
+        cls,
+        before: tuple[int, int, Direction],
+        after: tuple[int, int, Direction],
+    ) -> "RoverEvent":
+        """The event that takes a probe from the `before` (x, y, direction) to `after`."""
+        return cls(after[0] - before[0], after[1] - before[1], (after[2].code - before[2].code) % 4)
+
+    @classmethod
+    def launch(cls, x: int, y: int, direction: Direction) -> "RoverEvent":
+        """First event of a probe, taking it from (0, 0, NORTH) to where it was launched."""
+        return cls(x, y, direction.code)
+
+    def apply(self, x: int, y: int, direction: Direction) -> tuple[int, int, Direction]:
+        """Returns the (x, y, direction) after the event."""
+        return x + self.dx, y + self.dy, direction.rotate(self.turns)
+
+
+def fold(events: Iterable[RoverEvent]) -> RoverEvent:
+    """Composes events, in any order, into one."""
+    dx = dy = turns = 0
+    for event in events:
+        dx += event.dx
+        dy += event.dy
+        turns += event.turns
+    return RoverEvent(dx, dy, turns % 4)
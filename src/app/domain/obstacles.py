@@ -0,0 +1,188 @@
+from bisect import bisect_left, bisect_right, insort
+from threading import Lock, RLock
+from typing import Callable, Iterable, Iterator, Sequence
+
+from app.domain.plateau import Plateau
+from app.infrastructure.exceptions import OutOfBoundsError
+
+# Acima desta quantidade de novos obstáculos numa linha, ela é reordenada de uma vez
+_INSORT_LIMIT = 32
+
+
+class ObstacleMap:
+    """
+    Fixed obstacles (rocks, craters) of one plateau.
+
+    Obstacles are kept in sorted arrays per row (the x of every obstacle on
+    that y) and per column (the y of every obstacle on that x). A straight
+    run of N moves is checked with a single bisect on the array of its
+    line, and a bounding box with one bisect per row it spans (or per
+    non-empty row, whichever is fewer), never one lookup per cell.
+
+    `lock` serializes uploads on the same plateau, and `version` changes
+    whenever an obstacle is added, so results derived from the map (e.g.
+    planned paths) can be cached against it.
+    """
+
+    def __init__(self, plateau: Plateau) -> None:
+        self.plateau = plateau
+        self.lock = RLock()
+        self._height = plateau.max_y + 1
+        self._cells: set[tuple[int, int]] = set()
+        self._rows: dict[int, list[int]] = {}
+        self._columns: dict[int, list[int]] = {}
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def __contains__(self, cell: tuple[int, int]) -> bool:
+        return cell in self._cells
+
+    def cells(self) -> Iterable[tuple[int, int]]:
+        """Returns every obstacle as an (x, y) cell."""
+        return self._cells
+
+    def keys(self) -> Iterator[int]:
+        """Returns the keys (x * (max_y + 1) + y) of every obstacle."""
+        return (x * self._height + y for x, y in self._cells)
+
+    def row(self, y: int) -> Sequence[int]:
+        """Returns the sorted x of the obstacles on row y."""
+        return self._rows.get(y, ())
+
+    def column(self, x: int) -> Sequence[int]:
+        """Returns the sorted y of the obstacles on column x."""
+        return self._columns.get(x, ())
+
+    def is_blocked(self, x: int, y: int) -> bool:
+        """Checks whether (x, y) holds an obstacle."""
+        return (x, y) in self._cells
+
+    def add(self, x: int, y: int) -> bool:
+        """
+        Adds an obstacle, returning False if it was already there.
+
+        Raises:
+            OutOfBoundsError: If the cell is outside the plateau
+        """
+        return bool(self.add_many([(x, y)]))
+
+    def add_many(self, cells: Iterable[tuple[int, int]]) -> list[tuple[int, int]]:
+        """
+        Adds obstacles in bulk and returns the ones that were new.
+
+        Every cell is validated before any is added. Lines receiving a few
+        obstacles take them by binary insertion; lines receiving many are
+        extended and sorted once.
+
+        Raises:
+            OutOfBoundsError: If a cell is outside the plateau
+        """
+        new: list[tuple[int, int]] = []
+        seen: set[tuple[int, int]] = set()
+        for x, y in cells:
+            if not self.plateau.is_within_bounds(x, y):
+                raise OutOfBoundsError(x, y, self.plateau.max_x, self.plateau.max_y)
+            if (x, y) not in self._cells and (x, y) not in seen:
+                seen.add((x, y))
+                new.append((x, y))
+        if not new:
+            return new
+
+        by_row: dict[int, list[int]] = {}
+        by_column: dict[int, list[int]] = {}
+        for x, y in new:
+            by_row.setdefault(y, []).append(x)
+            by_column.setdefault(x, []).append(y)
+        _merge(self._rows, by_row)
+        _merge(self._columns, by_column)
+
+        self._cells.update(new)
+        self.version += 1
+        return new
+
+    def first_obstacle(self, x: int, y: int, dx: int, dy: int, steps: int) -> int:
+        """
+        Returns the first step (1..steps) of a straight run from (x, y) that
+        lands on an obstacle, or 0 if the run is clear. One bisect.
+        """
+        if steps <= 0 or not self._cells:
+            return 0
+        if dx:
+            line, position, delta = self._rows.get(y), x, dx
+        else:
+            line, position, delta = self._columns.get(x), y, dy
+        if not line:
+            return 0
+
+        if delta > 0:
+            index = bisect_right(line, position)
+            if index < len(line) and line[index] - position <= steps:
+                return line[index] - position
+        else:
+            index = bisect_left(line, position) - 1
+            if index >= 0 and position - line[index] <= steps:
+                return position - line[index]
+        return 0
+
+    def any_in_box(self, min_x: int, max_x: int, min_y: int, max_y: int) -> bool:
+        """Checks whether any obstacle is inside the box."""
+        if not self._cells or min_x > max_x or min_y > max_y:
+            return False
+
+        if max_y - min_y + 1 <= len(self._rows):
+            lines = (self._rows.get(y) for y in range(min_y, max_y + 1))
+        else:
+            lines = (line for y, line in self._rows.items() if min_y <= y <= max_y)
+
+        for line in lines:
+            if line:
+                index = bisect_left(line, min_x)
+                if index < len(line) and line[index] <= max_x:
+                    return True
+        return False
+
+
+def _merge(lines: dict[int, list[int]], additions: dict[int, list[int]]) -> None:
+    for key, values in additions.items():
+        line = lines.get(key)
+        if line is None:
+            lines[key] = sorted(values)
+        elif len(values) <= _INSORT_LIMIT:
+            for value in values:
+                insort(line, value)
+        else:
+            line.extend(values)
+            line.sort()
+
+
+class ObstacleRegistry:
+    """In-process registry holding one obstacle map per plateau."""
+
+    def __init__(self) -> None:
+        self._maps: dict[Plateau, ObstacleMap] = {}
+        self._lock = Lock()
+
+    def get(self, plateau: Plateau, loader: Callable[[], Iterable[tuple[int, int]]]) -> ObstacleMap:
+        """
+        Returns the map of the plateau, filling it from `loader` (the
+        persisted obstacles) the first time it is requested.
+        """
+        with self._lock:
+            obstacles = self._maps.get(plateau)
+            if obstacles is None:
+                obstacles = ObstacleMap(plateau)
+                obstacles.add_many(loader())
+                self._maps[plateau] = obstacles
+            return obstacles
+
+    def discard(self, plateau: Plateau) -> None:
+        """Drops the map of the plateau; it is reloaded on the next request."""
+        with self._lock:
+            self._maps.pop(plateau, None)
+
+    def clear(self) -> None:
+        """Drops every map; they are reloaded on the next request."""
+        with self._lock:
+            self._maps.clear()
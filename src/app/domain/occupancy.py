@@ -0,0 +1,241 @@
+from bisect import bisect_left, bisect_right, insort
+from threading import RLock
+from typing import Callable, Iterable, Iterator, Optional
+
+from app.domain.plateau import Plateau
+from app.infrastructure.exceptions import CollisionError
+
+# Planaltos com até este número de células usam um bitmap (1 byte por célula)
+DENSE_CELL_LIMIT = 1 << 24
+
+
+class OccupancyIndex:
+    """
+    Index of the cells occupied by probes on one plateau.
+
+    Cells are keyed as x * (max_y + 1) + y. Plateaus with up to
+    `dense_cell_limit` cells also keep a bitmap of the taken cells (one
+    byte per cell, e.g. for the batch simulator); every plateau keeps the
+    number of probes on each taken cell, so "is this cell taken?" is O(1)
+    either way. Several probes may share a cell (launches all land on
+    (0, 0), and older data may hold stacked probes); the cell is released
+    when the last of them leaves. The taken cells are also kept in sorted
+    arrays per row and per column, so a straight run or a bounding box is
+    checked with bisects instead of a scan of every probe. A probe never
+    collides with the cell it is recorded on unless another probe shares
+    it, so simulations of its own moves can be checked against the index
+    without removing it first.
+
+    `lock` serializes check-then-commit sequences (e.g. a move that is
+    validated, persisted and then recorded) on the same plateau, and
+    `version` changes whenever a cell is taken or released, so results
+    derived from the index (e.g. planned paths) can be cached against it.
+    """
+
+    def __init__(self, plateau: Plateau, dense_cell_limit: int = DENSE_CELL_LIMIT) -> None:
+        self.plateau = plateau
+        self.lock = RLock()
+        self._height = plateau.max_y + 1
+        cells = (plateau.max_x + 1) * self._height
+        self._bitmap: Optional[bytearray] = bytearray(cells) if cells <= dense_cell_limit else None
+        # Sondas em cada célula ocupada
+        self._counts: dict[int, int] = {}
+        self._positions: dict[str, int] = {}
+        self._rows: dict[int, list[int]] = {}
+        self._columns: dict[int, list[int]] = {}
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, rover_id: str) -> bool:
+        return rover_id in self._positions
+
+    @property
+    def bitmap(self) -> Optional[bytearray]:
+        """The dense bitmap (one byte per cell), or None for sparse indexes."""
+        return self._bitmap
+
+    def keys(self) -> Iterable[int]:
+        """Returns the key of the cell of every probe (shared cells repeat)."""
+        return self._positions.values()
+
+    def count(self, key: int) -> int:
+        """Returns how many probes are on the cell `key`."""
+        return self._counts.get(key, 0)
+
+    def key(self, x: int, y: int) -> int:
+        """Returns the key of cell (x, y)."""
+        return x * self._height + y
+
+    def is_occupied(self, x: int, y: int, rover_id: Optional[str] = None) -> bool:
+        """Checks whether (x, y) is taken by a probe other than `rover_id`."""
+        if not self.plateau.is_within_bounds(x, y):
+            return False
+        key = x * self._height + y
+        own = 1 if self._positions.get(rover_id) == key else 0
+        return self._counts.get(key, 0) > own
+
+    def place(self, rover_id: str, x: int, y: int, stack: bool = False) -> None:
+        """
+        Records the probe on (x, y), releasing the cell it was on before.
+        With `stack`, the probe may share the cell (e.g. a launch).
+
+        Raises:
+            CollisionError: If the cell is taken by another probe
+        """
+        if not stack and self.is_occupied(x, y, rover_id):
+            raise CollisionError(x, y)
+        self.remove(rover_id)
+        self._set(rover_id, x * self._height + y)
+
+    def load(self, rovers: Iterable) -> None:
+        """Records already persisted probes without collision checks."""
+        for rover in rovers:
+            self.remove(rover.id)
+            self._set(rover.id, rover.x * self._height + rover.y)
+
+    def remove(self, rover_id: str) -> None:
+        """Releases the cell of the probe, if it is recorded."""
+        key = self._positions.pop(rover_id, None)
+        if key is None:
+            return
+        self.version += 1
+        count = self._counts.pop(key) - 1
+        if count:
+            self._counts[key] = count
+            return
+        if self._bitmap is not None:
+            self._bitmap[key] = 0
+        x, y = divmod(key, self._height)
+        _discard(self._rows, y, x)
+        _discard(self._columns, x, y)
+
+    def first_collision(
+        self, rover_id: str, x: int, y: int, dx: int, dy: int, steps: int
+    ) -> int:
+        """
+        Returns the first step (1..steps) of a straight run from (x, y) that
+        lands on a cell taken by another probe, or 0 if the run is clear.
+
+        One bisect on the occupied cells of the run's row or column.
+        """
+        if steps <= 0 or not self._positions:
+            return 0
+        if dx:
+            line, position, delta = self._rows.get(y), x, dx
+        else:
+            line, position, delta = self._columns.get(x), y, dy
+        if not line:
+            return 0
+
+        own = self._positions.get(rover_id)
+        if delta > 0:
+            index = bisect_right(line, position)
+            candidates = (line[i] - position for i in range(index, min(index + 2, len(line))))
+        else:
+            index = bisect_left(line, position) - 1
+            candidates = (position - line[i] for i in range(index, max(index - 2, -1), -1))
+
+        for step in candidates:
+            if step > steps:
+                break
+            cell = (x + dx * step) * self._height + y + dy * step
+            if cell != own or self._counts[cell] > 1:
+                return step
+        return 0
+
+    def any_in_box(
+        self, rover_id: str, min_x: int, max_x: int, min_y: int, max_y: int
+    ) -> bool:
+        """
+        Checks whether any probe other than `rover_id` is inside the box.
+
+        Costs one bisect per occupied row (or column, whichever is fewer)
+        crossing the box.
+        """
+        min_x, max_x = max(min_x, 0), min(max_x, self.plateau.max_x)
+        min_y, max_y = max(min_y, 0), min(max_y, self.plateau.max_y)
+        if min_x > max_x or min_y > max_y or not self._positions:
+            return False
+
+        # Percorre o eixo com menos linhas a verificar
+        if min(max_x - min_x + 1, len(self._columns)) < min(max_y - min_y + 1, len(self._rows)):
+            lines, low, high, transposed = _box_lines(self._columns, min_x, max_x), min_y, max_y, True
+        else:
+            lines, low, high, transposed = _box_lines(self._rows, min_y, max_y), min_x, max_x, False
+
+        own = self._positions.get(rover_id)
+        for key, line in lines:
+            index = bisect_left(line, low)
+            # A própria sonda ocupa no máximo uma célula: bastam duas candidatas
+            for value in line[index:index + 2]:
+                if value > high:
+                    break
+                x, y = (key, value) if transposed else (value, key)
+                cell = x * self._height + y
+                if cell != own or self._counts[cell] > 1:
+                    return True
+        return False
+
+    def _set(self, rover_id: str, key: int) -> None:
+        self._positions[rover_id] = key
+        self.version += 1
+        count = self._counts.get(key, 0)
+        self._counts[key] = count + 1
+        if count:
+            return
+        if self._bitmap is not None:
+            self._bitmap[key] = 1
+        x, y = divmod(key, self._height)
+        insort(self._rows.setdefault(y, []), x)
+        insort(self._columns.setdefault(x, []), y)
+
+
+def _box_lines(lines: dict[int, list[int]], low: int, high: int) -> Iterator[tuple[int, list[int]]]:
+    """Yields the non-empty lines between `low` and `high`, scanning whichever side is shorter."""
+    if high - low + 1 <= len(lines):
+        return ((key, lines[key]) for key in range(low, high + 1) if key in lines)
+    return ((key, line) for key, line in lines.items() if low <= key <= high)
+
+
+def _discard(lines: dict[int, list[int]], key: int, value: int) -> None:
+    line = lines[key]
+    del line[bisect_left(line, value)]
+    if not line:
+        del lines[key]
+
+
+class OccupancyRegistry:
+    """
+    In-process registry holding one occupancy index per plateau, keyed by
+    the plateau itself (its id, for persisted plateaus).
+    """
+
+    def __init__(self, dense_cell_limit: int = DENSE_CELL_LIMIT) -> None:
+        self._dense_cell_limit = dense_cell_limit
+        self._indexes: dict[Plateau, OccupancyIndex] = {}
+        self._lock = RLock()
+
+    def get(self, plateau: Plateau, loader: Callable[[], Iterable]) -> OccupancyIndex:
+        """
+        Returns the index of the plateau, building it from `loader` (the
+        probes already on it) the first time it is requested.
+        """
+        with self._lock:
+            index = self._indexes.get(plateau)
+            if index is None:
+                index = OccupancyIndex(plateau, self._dense_cell_limit)
+                index.load(loader())
+                self._indexes[plateau] = index
+            return index
+
+    def discard(self, plateau: Plateau) -> None:
+        """Drops the index of the plateau; it is rebuilt on the next request."""
+        with self._lock:
+            self._indexes.pop(plateau, None)
+
+    def clear(self) -> None:
+        """Drops every index; they are rebuilt on the next request."""
+        with self._lock:
+            self._indexes.clear()
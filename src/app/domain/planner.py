@@ -0,0 +1,355 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Callable, Hashable, Optional
+
+from app.domain.commands import CommandRun
+from app.domain.direction import Direction
+from app.domain.rover import Rover
+from app.infrastructure.exceptions import NoPathError, OutOfBoundsError
+
+# Deslocamento unitário de cada direção, indexado por Direction.code
+_STEPS = tuple(Direction.from_code(code).movement_delta for code in range(4))
+
+# Limite padrão de estados expandidos pelo A*
+MAX_EXPANSIONS = 250_000
+
+
+@dataclass(frozen=True)
+class Plan:
+    """
+    A minimal command sequence to a target cell, as runs ("M" steps or
+    "R" quarter turns, negative for left).
+    """
+    runs: tuple[CommandRun, ...]
+
+    @property
+    def length(self) -> int:
+        """Number of M/L/R commands in the plan."""
+        return sum(abs(count) for _, count in self.runs)
+
+    @property
+    def commands(self) -> str:
+        """The plan in plain syntax."""
+        return "".join(_render(command, count, compact=False) for command, count in self.runs)
+
+    @property
+    def compact(self) -> str:
+        """The plan in compact syntax, e.g. RM9999LM50."""
+        return "".join(_render(command, count, compact=True) for command, count in self.runs)
+
+
+def _render(command: str, count: int, compact: bool) -> str:
+    if command == "R":
+        return "L" * -count if count < 0 else "R" * count
+    if compact and count > 1:
+        return f"M{count}"
+    return "M" * count
+
+
+def _turn(current: int, target: int) -> tuple[CommandRun, ...]:
+    """Fewest turns from one direction code to another."""
+    quarter_turns = (target - current) % 4
+    if quarter_turns == 0:
+        return ()
+    return (CommandRun("R", -1 if quarter_turns == 3 else quarter_turns),)
+
+
+def _turn_cost(current: int, target: int) -> int:
+    return (0, 1, 2, 1)[(target - current) % 4]
+
+
+def _lower_bound(x: int, y: int, code: int, target_x: int, target_y: int) -> int:
+    """
+    Exact cost to the target on an empty plateau: the Manhattan distance
+    plus the fewest turns that face every axis the path must cover. It is
+    the optimum of a relaxed problem, hence a consistent A* heuristic.
+    """
+    dx, dy = target_x - x, target_y - y
+    turns = 0
+    if dx and dy:
+        horizontal = 1 if dx > 0 else 3
+        vertical = 0 if dy > 0 else 2
+        turns = 1 if code in (horizontal, vertical) else 2
+    elif dx:
+        turns = _turn_cost(code, 1 if dx > 0 else 3)
+    elif dy:
+        turns = _turn_cost(code, 0 if dy > 0 else 2)
+    return abs(dx) + abs(dy) + turns
+
+
+def _closed_form(rover: Rover, target_x: int, target_y: int) -> list[tuple[CommandRun, ...]]:
+    """
+    Optimal plans on an empty plateau, cheapest first: one straight leg,
+    or the two L-shaped paths (horizontal then vertical, and the reverse).
+    Both stay inside the rectangle spanned by start and target.
+    """
+    dx, dy = target_x - rover.x, target_y - rover.y
+    legs = []
+    if dx:
+        legs.append((1 if dx > 0 else 3, abs(dx)))
+    if dy:
+        legs.append((0 if dy > 0 else 2, abs(dy)))
+
+    orders = [legs] if len(legs) < 2 else [legs, legs[::-1]]
+    plans = []
+    for order in orders:
+        runs: list[CommandRun] = []
+        code = rover.direction.code
+        for leg_code, steps in order:
+            runs.extend(_turn(code, leg_code))
+            runs.append(CommandRun("M", steps))
+            code = leg_code
+        plans.append(tuple(runs))
+    return sorted(plans, key=lambda runs: sum(abs(count) for _, count in runs))
+
+
+def _is_clear(rover: Rover, runs: tuple[CommandRun, ...]) -> bool:
+    """Checks a plan against other probes and obstacles, one run at a time."""
+    if rover.occupancy is None and rover.obstacles is None:
+        return True
+    x, y, code = rover.x, rover.y, rover.direction.code
+    for command, count in runs:
+        if command == "R":
+            code = (code + count) % 4
+            continue
+        dx, dy = _STEPS[code]
+        if rover.occupancy is not None and rover.occupancy.first_collision(rover.id, x, y, dx, dy, count):
+            return False
+        if rover.obstacles is not None and rover.obstacles.first_obstacle(x, y, dx, dy, count):
+            return False
+        x, y = x + dx * count, y + dy * count
+    return True
+
+
+def _is_blocked(rover: Rover, x: int, y: int) -> bool:
+    """Checks whether the rover cannot enter (x, y)."""
+    if rover.obstacles is not None and rover.obstacles.is_blocked(x, y):
+        return True
+    return rover.occupancy is not None and rover.occupancy.is_occupied(x, y, rover.id)
+
+
+def _blocked_cells(rover: Rover) -> set[tuple[int, int]]:
+    """Cells the rover cannot enter: obstacles and those taken by other probes."""
+    blocked: set[tuple[int, int]] = set()
+    if rover.obstacles is not None:
+        blocked.update(rover.obstacles.cells())
+    if rover.occupancy is not None:
+        height = rover.plateau.max_y + 1
+        own = rover.occupancy.key(rover.x, rover.y)
+        blocked.update(
+            divmod(key, height)
+            for key in rover.occupancy.keys()
+            if key != own or rover.occupancy.count(key) > 1
+        )
+    return blocked
+
+
+def _crosses_blocked(line: list[int], start: int, stop: int) -> bool:
+    """Checks whether moving from start to stop enters a blocked coordinate of a sorted line."""
+    low, high = (start, stop) if start < stop else (stop, start)
+    if start < stop:
+        index = bisect_right(line, low)
+        return index < len(line) and line[index] <= high
+    index = bisect_left(line, low)
+    return index < len(line) and line[index] < high
+
+
+def _search(rover: Rover, target_x: int, target_y: int, max_expansions: int) -> tuple[CommandRun, ...]:
+    """
+    A* over (x, y, heading) states with unit cost per command, on a
+    compressed grid.
+
+    A shortest path can always be slid sideways, without getting longer,
+    until its turns sit on a row or column holding the start, the target,
+    a plateau edge, or a free cell next to a blocked one. Searching only
+    those lines bounds the state count by the blocked cells instead of the
+    plateau area (a wall adds two lines, not one per cell). Each move
+    between neighbouring lines is checked against the blocked cells of its
+    row or column with a single bisect.
+
+    Ties on f are broken towards deeper states, so on open ground the
+    search runs straight at the target instead of flooding equal-cost
+    states.
+    """
+    plateau = rover.plateau
+    blocked = _blocked_cells(rover)
+
+    x_lines = {0, plateau.max_x, rover.x, target_x}
+    y_lines = {0, plateau.max_y, rover.y, target_y}
+    blocked_by_row: dict[int, list[int]] = {}
+    blocked_by_column: dict[int, list[int]] = {}
+    for x, y in blocked:
+        blocked_by_row.setdefault(y, []).append(x)
+        blocked_by_column.setdefault(x, []).append(y)
+        for side in (x - 1, x + 1):
+            if (side, y) not in blocked:
+                x_lines.add(side)
+        for side in (y - 1, y + 1):
+            if (x, side) not in blocked:
+                y_lines.add(side)
+    for line in (*blocked_by_row.values(), *blocked_by_column.values()):
+        line.sort()
+
+    xs = sorted(x for x in x_lines if 0 <= x <= plateau.max_x)
+    ys = sorted(y for y in y_lines if 0 <= y <= plateau.max_y)
+    rows = len(ys)
+    column_of = {x: i for i, x in enumerate(xs)}
+    row_of = {y: j for j, y in enumerate(ys)}
+
+    start = (column_of[rover.x] * rows + row_of[rover.y]) * 4 + rover.direction.code
+    goal_node = column_of[target_x] * rows + row_of[target_y]
+    costs = {start: 0}
+    parents: dict[int, tuple[int, CommandRun]] = {}
+    frontier = [(_lower_bound(rover.x, rover.y, rover.direction.code, target_x, target_y), 0, start)]
+    expansions = 0
+
+    while frontier:
+        _, negative_cost, state = heapq.heappop(frontier)
+        cost = -negative_cost
+        if cost > costs[state]:
+            continue
+
+        node, code = divmod(state, 4)
+        if node == goal_node:
+            return _runs_to(parents, state)
+
+        expansions += 1
+        if expansions > max_expansions:
+            break
+
+        column, row = divmod(node, rows)
+        x, y = xs[column], ys[row]
+        successors = [
+            (node * 4 + (code + 1) % 4, CommandRun("R", 1), 1),
+            (node * 4 + (code - 1) % 4, CommandRun("R", -1), 1),
+        ]
+        dx, dy = _STEPS[code]
+        next_column, next_row = column + dx, row + dy
+        if 0 <= next_column < len(xs) and 0 <= next_row < rows:
+            next_x, next_y = xs[next_column], ys[next_row]
+            if dx:
+                crossed = _crosses_blocked(blocked_by_row.get(y, []), x, next_x)
+            else:
+                crossed = _crosses_blocked(blocked_by_column.get(x, []), y, next_y)
+            if not crossed:
+                steps = abs(next_x - x) + abs(next_y - y)
+                successors.append(((next_column * rows + next_row) * 4 + code, CommandRun("M", steps), steps))
+
+        for successor, run, step_cost in successors:
+            successor_cost = cost + step_cost
+            if successor_cost >= costs.get(successor, successor_cost + 1):
+                continue
+            costs[successor] = successor_cost
+            parents[successor] = (state, run)
+            successor_node, successor_code = divmod(successor, 4)
+            successor_column, successor_row = divmod(successor_node, rows)
+            estimate = successor_cost + _lower_bound(
+                xs[successor_column], ys[successor_row], successor_code, target_x, target_y
+            )
+            heapq.heappush(frontier, (estimate, -successor_cost, successor))
+
+    raise NoPathError(target_x, target_y)
+
+
+def _runs_to(parents: dict[int, tuple[int, CommandRun]], state: int) -> tuple[CommandRun, ...]:
+    path = []
+    while state in parents:
+        state, run = parents[state]
+        path.append(run)
+    path.reverse()
+
+    runs: list[CommandRun] = []
+    for run in path:
+        if runs and runs[-1].command == run.command:
+            runs[-1] = CommandRun(run.command, runs[-1].count + run.count)
+        else:
+            runs.append(run)
+    return tuple(run for run in runs if run.count)
+
+
+def plan_path(
+    rover: Rover,
+    target_x: int,
+    target_y: int,
+    max_expansions: int = MAX_EXPANSIONS,
+) -> Plan:
+    """
+    Finds the shortest command sequence (fewest M/L/R commands) that takes
+    the rover to (target_x, target_y), ending in any direction.
+
+    On an empty plateau, or when one of the optimal L-shaped paths is free,
+    the answer is closed form. Otherwise obstacles (the rover's `obstacles`)
+    and cells taken by other probes (its `occupancy`) are routed around
+    with A*.
+
+    Raises:
+        OutOfBoundsError: If the target is outside the plateau
+        NoPathError: If the target is unreachable, or no path was found
+            within `max_expansions` expanded states
+    """
+    plateau = rover.plateau
+    if not plateau.is_within_bounds(target_x, target_y):
+        raise OutOfBoundsError(target_x, target_y, plateau.max_x, plateau.max_y)
+
+    if (rover.x, rover.y) != (target_x, target_y):
+        # Destino bloqueado, ou cercado por todos os lados
+        neighbours = [
+            (target_x + dx, target_y + dy)
+            for dx, dy in _STEPS
+            if plateau.is_within_bounds(target_x + dx, target_y + dy)
+        ]
+        if _is_blocked(rover, target_x, target_y) or all(
+            _is_blocked(rover, x, y) for x, y in neighbours
+        ):
+            raise NoPathError(target_x, target_y)
+
+    for runs in _closed_form(rover, target_x, target_y):
+        if _is_clear(rover, runs):
+            return Plan(runs)
+
+    return Plan(_search(rover, target_x, target_y, max_expansions))
+
+
+class PlanCache:
+    """
+    Bounded LRU cache of plans.
+
+    Keys are built by the caller and must identify the plateau, the start
+    state, the target and the version of whatever blocks cells on the
+    plateau, so a change in occupancy never serves a stale plan.
+    """
+
+    def __init__(self, max_size: int = 1024) -> None:
+        self._max_size = max_size
+        self._entries: OrderedDict[Hashable, Plan] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, planner: Callable[[], Plan]) -> Plan:
+        """Returns the cached plan for `key`, running `planner` on a miss."""
+        with self._lock:
+            plan: Optional[Plan] = self._entries.get(key)
+            if plan is not None:
+                self._entries.move_to_end(key)
+                return plan
+
+        plan = planner()
+        if self._max_size <= 0:
+            return plan
+
+        with self._lock:
+            self._entries[key] = plan
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+        return plan
+
+    def clear(self) -> None:
+        """Drops every entry."""
+        with self._lock:
+            self._entries.clear()
@@ -1,14 +1,20 @@
 from dataclasses import dataclass
+from threading import Lock
+from typing import Optional
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Plateau:
     """
     Represents the rectangular plateau where the probes operate.
     Defines the maximum grid limits from (0, 0) to (max_x, max_y).
+
+    Persisted plateaus carry their `id`; two plateaus with the same
+    dimensions but different ids are different plateaus.
     """
     max_x: int
     max_y: int
+    id: Optional[str] = None
 
     def __post_init__(self) -> None:
         if self.max_x < 0 or self.max_y < 0:
@@ -18,3 +24,63 @@ class Plateau:
         """Checks whether position (x, y) is within the plateau bounds."""
         return 0 <= x <= self.max_x and 0 <= y <= self.max_y
 
+    def steps_within_bounds(self, x: int, y: int, dx: int, dy: int) -> int:
+        """
+        Counts how many consecutive unit steps (dx, dy) can be taken from
+        (x, y) before the first one lands outside the plateau.
+
+        Step i lands on (x + i*dx, y + i*dy). The in-bounds steps along an
+        axis-aligned line form an interval, so the answer is found with a
+        couple of comparisons instead of walking the line.
+        """
+        first, last = 1, None
+        for position, delta, limit in ((x, dx, self.max_x), (y, dy, self.max_y)):
+            if delta == 0:
+                if not 0 <= position <= limit:
+                    return 0
+            elif delta > 0:
+                first = max(first, -position)
+                last = limit - position if last is None else min(last, limit - position)
+            else:
+                first = max(first, position - limit)
+                last = position if last is None else min(last, position)
+
+        if first > 1 or last is None:
+            return 0
+        return max(last, 0)
+
+
+class PlateauRegistry:
+    """
+    In-process registry interning plateaus by id, so every probe loaded
+    from the same plateau shares a single Plateau instance.
+    """
+
+    def __init__(self) -> None:
+        self._plateaus: dict[str, Plateau] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._plateaus)
+
+    def get(self, plateau_id: str) -> Optional[Plateau]:
+        """Returns the interned plateau, if it was already seen."""
+        return self._plateaus.get(plateau_id)
+
+    def intern(self, plateau_id: str, max_x: int, max_y: int) -> Plateau:
+        """Returns the shared instance for `plateau_id`, creating it on first use."""
+        plateau = self._plateaus.get(plateau_id)
+        if plateau is not None:
+            return plateau
+
+        with self._lock:
+            plateau = self._plateaus.get(plateau_id)
+            if plateau is None:
+                plateau = Plateau(max_x=max_x, max_y=max_y, id=plateau_id)
+                self._plateaus[plateau_id] = plateau
+            return plateau
+
+    def clear(self) -> None:
+        """Forgets every interned plateau."""
+        with self._lock:
+            self._plateaus.clear()
@@ -1,34 +1,82 @@
 from dataclasses import dataclass, field
+from typing import Optional
 
 from app.domain.direction import Direction
+from app.domain.obstacles import ObstacleMap
+from app.domain.occupancy import OccupancyIndex
 from app.domain.plateau import Plateau
-from app.infrastructure.exceptions import OutOfBoundsError
+from app.infrastructure.exceptions import CollisionError, ObstacleError, OutOfBoundsError
 
 
-@dataclass
+@dataclass(slots=True)
 class Rover:
     """
     Represents an exploratory probe on Mars.
     Tracks its position (x, y), direction, and the plateau where it operates.
+    Backed by __slots__ to keep large fleets compact in memory.
+
+    When `occupancy` is set, moves into cells taken by other probes on the
+    same plateau are rejected as well, and when `obstacles` is set, moves
+    into cells holding an obstacle.
     """
     id: str
     plateau: Plateau
     x: int = field(default=0)
     y: int = field(default=0)
     direction: Direction = field(default=Direction.NORTH)
+    occupancy: Optional[OccupancyIndex] = field(default=None, repr=False, compare=False)
+    obstacles: Optional[ObstacleMap] = field(default=None, repr=False, compare=False)
 
-    def move(self) -> None:
+    def move(self, steps: int = 1) -> None:
         """
-        Moves the probe one step in the current direction.
-        Raises OutOfBoundsError if the movement leaves the bounds (fail-fast).
+        Moves the probe `steps` steps in the current direction.
+        Raises OutOfBoundsError if the movement leaves the bounds,
+        CollisionError if it runs into another probe and ObstacleError if
+        it runs into an obstacle (fail-fast).
+
+        The whole run is checked at once: the plateau is convex, so if both
+        ends are inside every step in between is too, and the nearest
+        obstacle ahead is found with one bisect. When the run does fail, the
+        probe stops on the last valid cell and the error reports the first
+        offending coordinate, exactly as `steps` single moves would.
         """
         dx, dy = self.direction.movement_delta
-        new_x = self.x + dx
-        new_y = self.y + dy
+        new_x = self.x + dx * steps
+        new_y = self.y + dy * steps
+
+        available = steps
+        # Um único passo só depende da célula de destino
+        if not (
+            self.plateau.is_within_bounds(new_x, new_y)
+            and (steps == 1 or self.plateau.is_within_bounds(self.x, self.y))
+        ):
+            available = min(steps, self.plateau.steps_within_bounds(self.x, self.y, dx, dy))
+
+        collision = 0
+        if self.occupancy is not None:
+            collision = self.occupancy.first_collision(
+                self.id, self.x, self.y, dx, dy, available
+            )
 
-        if not self.plateau.is_within_bounds(new_x, new_y):
+        if self.obstacles is not None:
+            blocked = self.obstacles.first_obstacle(
+                self.x, self.y, dx, dy, collision - 1 if collision else available
+            )
+            if blocked:
+                self.x += dx * (blocked - 1)
+                self.y += dy * (blocked - 1)
+                raise ObstacleError(self.x + dx, self.y + dy)
+
+        if collision:
+            self.x += dx * (collision - 1)
+            self.y += dy * (collision - 1)
+            raise CollisionError(self.x + dx, self.y + dy)
+
+        if steps > available:
+            self.x += dx * available
+            self.y += dy * available
             raise OutOfBoundsError(
-                new_x, new_y, self.plateau.max_x, self.plateau.max_y
+                self.x + dx, self.y + dy, self.plateau.max_x, self.plateau.max_y
             )
 
         self.x = new_x
@@ -42,6 +90,10 @@ class Rover:
         """Rotates the probe 90° to the right."""
         self.direction = self.direction.turn_right()
 
+    def rotate(self, quarter_turns: int) -> None:
+        """Rotates the probe by 90° steps (positive to the right, negative to the left)."""
+        self.direction = self.direction.rotate(quarter_turns)
+
     def get_position(self) -> dict:
         """Returns the probe's current state as a dictionary."""
         return {
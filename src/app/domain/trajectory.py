@@ -0,0 +1,212 @@
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Union
+
+from app.domain.commands import CommandBlock, CommandRun
+from app.domain.direction import Direction
+
+# Deslocamento unitário de cada direção, indexado por Direction.code
+_STEPS = tuple(Direction.from_code(code).movement_delta for code in range(4))
+
+# Limite padrão de segmentos (e de itens percorridos) gravados por lote
+MAX_TRAJECTORY_RUNS = 1_000_000
+
+
+def _encode_varint(value: int, buffer: bytearray) -> None:
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _iter_segments(data: bytes) -> Iterator[tuple[int, int, int]]:
+    """Decodes (dx, dy, steps) segments from varint-encoded bytes."""
+    value = shift = 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        dx, dy = _STEPS[value & 3]
+        yield dx, dy, value >> 2
+        value = shift = 0
+
+
+@dataclass(frozen=True)
+class Trajectory:
+    """
+    Path taken by a probe during one command batch.
+
+    The path is stored as straight segments, each one a varint holding
+    `steps << 2 | direction code`, so a run of a million moves costs a few
+    bytes. `points` is the number of cells entered (the start cell is not
+    counted) and the bounding box covers every visited cell, start included.
+    """
+    start_x: int
+    start_y: int
+    end_x: int
+    end_y: int
+    min_x: int
+    max_x: int
+    min_y: int
+    max_y: int
+    points: int
+    data: bytes = b""
+
+    @classmethod
+    def stationary(cls, x: int, y: int) -> "Trajectory":
+        """A batch that never left (x, y), e.g. a launch."""
+        return cls(x, y, x, y, x, x, y, y, 0)
+
+    def segments(self) -> Iterator[tuple[int, int, int]]:
+        """Yields the (dx, dy, steps) segments of the path."""
+        return _iter_segments(self.data)
+
+    def iter_points(self, skip: int = 0) -> Iterator[tuple[int, int]]:
+        """
+        Yields the cells entered, in order, after skipping the first `skip`.
+
+        Skipped segments are jumped over without expanding them.
+        """
+        x, y = self.start_x, self.start_y
+        for dx, dy, steps in self.segments():
+            if skip >= steps:
+                skip -= steps
+                x += dx * steps
+                y += dy * steps
+                continue
+            for step in range(skip + 1, steps + 1):
+                yield x + dx * step, y + dy * step
+            skip = 0
+            x += dx * steps
+            y += dy * steps
+
+    def visits(self, x: int, y: int) -> bool:
+        """Checks whether the path went through (x, y), one segment at a time."""
+        if not (self.min_x <= x <= self.max_x and self.min_y <= y <= self.max_y):
+            return False
+        cx, cy = self.start_x, self.start_y
+        if (cx, cy) == (x, y):
+            return True
+        for dx, dy, steps in self.segments():
+            if dx:
+                if y == cy and 0 < (x - cx) * dx <= steps:
+                    return True
+            elif x == cx and 0 < (y - cy) * dy <= steps:
+                return True
+            cx += dx * steps
+            cy += dy * steps
+        return False
+
+
+class TrajectoryRecorder:
+    """
+    Records the path of one command batch from the compiled runs that
+    produced it, one segment per straight run instead of one point per step.
+
+    Consecutive runs in the same direction are merged. Expanding a program
+    costs one unit of `max_runs` per traced item and segment; past that
+    the recorder gives up and `overflowed` is set, so pathological repeat
+    blocks cannot stall the request that recorded them. An overflowed
+    trajectory is incomplete and must not be persisted: the batch that
+    produced it is rejected instead.
+    """
+
+    def __init__(
+        self,
+        x: int,
+        y: int,
+        direction: Direction,
+        max_runs: int = MAX_TRAJECTORY_RUNS,
+    ) -> None:
+        self._start_x, self._start_y = x, y
+        self._x, self._y = x, y
+        self._code = direction.code
+        self._min_x = self._max_x = x
+        self._min_y = self._max_y = y
+        self._points = 0
+        self._pending_code: Optional[int] = None
+        self._pending_steps = 0
+        self._buffer = bytearray()
+        self._budget = max_runs
+        self.max_runs = max_runs
+        self.overflowed = False
+
+    def add_runs(self, runs: Iterable[CommandRun]) -> None:
+        """Records compiled runs."""
+        for command, count in runs:
+            if command == "M":
+                self._move(count)
+            else:
+                self._code = (self._code + count) % 4
+
+    def tap(self, runs: Iterable[CommandRun]) -> Iterator[CommandRun]:
+        """Records runs while passing them through, e.g. to `execute_runs`."""
+        for run in runs:
+            self.add_runs((run,))
+            yield run
+
+    def add_program(self, program: CommandBlock) -> None:
+        """Records a command program, expanding its repeat blocks."""
+        self._add_block(program)
+
+    def finish(self) -> Trajectory:
+        """Returns the recorded trajectory."""
+        self._flush()
+        return Trajectory(
+            start_x=self._start_x,
+            start_y=self._start_y,
+            end_x=self._x,
+            end_y=self._y,
+            min_x=self._min_x,
+            max_x=self._max_x,
+            min_y=self._min_y,
+            max_y=self._max_y,
+            points=self._points,
+            data=bytes(self._buffer),
+        )
+
+    def _add_block(self, block: CommandBlock) -> None:
+        envelope = block.envelope
+        if envelope.min_x == envelope.max_x == envelope.min_y == envelope.max_y == 0:
+            # Bloco que só gira: nenhuma célula é visitada
+            self._code = (self._code + envelope.direction.code) % 4
+            return
+
+        for _ in range(block.count):
+            for item in block.items:
+                self._budget -= 1
+                if self._budget < 0:
+                    self.overflowed = True
+                if self.overflowed:
+                    return
+                if isinstance(item, CommandRun):
+                    self.add_runs((item,))
+                else:
+                    self._add_block(item)
+
+    def _move(self, steps: int) -> None:
+        if steps <= 0:
+            return
+        if self._pending_code != self._code:
+            self._flush()
+            self._pending_code = self._code
+        self._pending_steps += steps
+
+        dx, dy = _STEPS[self._code]
+        self._x += dx * steps
+        self._y += dy * steps
+        self._points += steps
+        self._min_x = min(self._min_x, self._x)
+        self._max_x = max(self._max_x, self._x)
+        self._min_y = min(self._min_y, self._y)
+        self._max_y = max(self._max_y, self._y)
+
+    def _flush(self) -> None:
+        if self._pending_code is None:
+            return
+        _encode_varint(self._pending_steps << 2 | self._pending_code, self._buffer)
+        self._budget -= 1
+        if self._budget < 0:
+            self.overflowed = True
+        self._pending_code = None
+        self._pending_steps = 0
@@ -1,5 +1,11 @@
-from fastapi import APIRouter, FastAPI
+from fastapi import APIRouter, Depends, FastAPI
 from datetime import datetime
+from dependency_injector.wiring import inject, Provide
+
+from app.config import Config
+from app.containers import Container
+from app.domain.command_cache import CommandCache
+from app.repositories.read_through_repository import ReadThroughRepository
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -24,6 +30,43 @@ def health_check():
     }
 
 
+@router.get(
+    "/command-cache",
+    summary="Estatísticas do cache de comandos",
+    description="Retorna os contadores de acertos, falhas e remoções do cache de comandos compilados.",
+)
+@inject
+def command_cache_stats(
+    command_cache: CommandCache = Depends(Provide[Container.command_cache]),
+):
+    """
+    Exposes the command cache counters for scraping.
+
+    Returns:
+        dict: Cache size, hits, misses, evictions, bypasses and hit rate
+    """
+    return command_cache.stats()
+
+
+@router.get(
+    "/read-cache",
+    summary="Estatísticas do cache de leitura das sondas",
+    description="Retorna os contadores de acertos, falhas, expirações e invalidações do cache de leitura das sondas.",
+)
+@inject
+def read_cache_stats(
+    rover_cache: ReadThroughRepository = Depends(Provide[Container.rover_cache]),
+):
+    """
+    Exposes the probe read cache counters for scraping.
+
+    Returns:
+        dict: Whether the cache is enabled, its size, generation, hit and
+        miss counters and the hit rates of lookups by id and of the listing
+    """
+    return {"enabled": Config.READ_CACHE, **rover_cache.stats()}
+
+
 def configure(app: FastAPI) -> None:
     """Configures the health routes on the FastAPI app."""
     app.include_router(router)
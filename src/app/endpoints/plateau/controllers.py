@@ -0,0 +1,159 @@
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, status
+from dependency_injector.wiring import inject, Provide
+
+from app.containers import Container
+from app.infrastructure import Logger
+from app.infrastructure.exceptions import CollisionError, OutOfBoundsError, PlateauNotFoundError
+from app.services.rover_service import RoverService
+from app.endpoints.plateau.schemas import (
+    AddObstaclesRequest,
+    AddObstaclesResponse,
+    ObstacleSchema,
+    ObstaclesListResponse,
+    PlateauCoverageResponse,
+)
+from app.endpoints.rover.schemas import ProbeResponse, ProbesListResponse
+
+
+router = APIRouter(prefix="/plateaus", tags=["plateaus"])
+
+
+@router.get(
+    "/{plateau_id}/probes",
+    response_model=ProbesListResponse,
+    summary="Listar sondas do planalto",
+    description="Retorna o estado atual de todas as sondas lançadas no planalto especificado.",
+)
+@inject
+def list_plateau_probes(
+    plateau_id: str,
+    service: RoverService = Depends(Provide[Container.rover_service]),
+    logger: Logger = Depends(Provide[Container.logger]),
+) -> ProbesListResponse:
+    try:
+        rovers = service.get_plateau_probes(plateau_id)
+    except PlateauNotFoundError as e:
+        logger.error(f"Plateau {plateau_id} not found: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    logger.info(f"Listing {len(rovers)} probes on plateau {plateau_id}")
+    probes = [
+        ProbeResponse(
+            id=rover.id,
+            x=rover.x,
+            y=rover.y,
+            direction=rover.direction.value,
+            plateau_id=rover.plateau.id,
+        )
+        for rover in rovers
+    ]
+
+    return ProbesListResponse(probes=probes)
+
+
+@router.get(
+    "/{plateau_id}/coverage",
+    response_model=PlateauCoverageResponse,
+    summary="Cobertura do planalto",
+    description=(
+        "Retorna o percentual do planalto já explorado pelas sondas e um mapa "
+        "reduzido com a fração visitada de cada bloco."
+    ),
+)
+@inject
+def get_plateau_coverage(
+    plateau_id: str,
+    width: int = Query(64, ge=1, le=512, description="Colunas do mapa reduzido"),
+    height: int = Query(64, ge=1, le=512, description="Linhas do mapa reduzido"),
+    service: RoverService = Depends(Provide[Container.rover_service]),
+    logger: Logger = Depends(Provide[Container.logger]),
+) -> PlateauCoverageResponse:
+    try:
+        visited, total, coverage_map = service.get_plateau_coverage(plateau_id, width, height)
+    except PlateauNotFoundError as e:
+        logger.error(f"Plateau {plateau_id} not found: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    return PlateauCoverageResponse(
+        plateau_id=plateau_id,
+        visited_cells=visited,
+        total_cells=total,
+        coverage=round(100 * visited / total, 4),
+        map=coverage_map,
+    )
+
+
+@router.post(
+    "/{plateau_id}/obstacles",
+    response_model=AddObstaclesResponse,
+    summary="Adicionar obstáculos",
+    description=(
+        "Adiciona obstáculos ao planalto em lote. Obstáculos já existentes são ignorados; "
+        "retorna 400 se algum estiver fora dos limites e 409 se algum estiver sob uma sonda."
+    ),
+)
+@inject
+def add_obstacles(
+    plateau_id: str,
+    request: AddObstaclesRequest,
+    service: RoverService = Depends(Provide[Container.rover_service]),
+    logger: Logger = Depends(Provide[Container.logger]),
+) -> AddObstaclesResponse:
+    try:
+        added, total = service.add_obstacles(
+            plateau_id, [(obstacle.x, obstacle.y) for obstacle in request.obstacles]
+        )
+    except PlateauNotFoundError as e:
+        logger.error(f"Plateau {plateau_id} not found: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    except OutOfBoundsError as e:
+        logger.error(f"Obstacle out of bounds: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except CollisionError as e:
+        logger.error(f"Obstacle on a probe: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+    logger.info(f"{added} obstacles added to plateau {plateau_id}")
+    return AddObstaclesResponse(plateau_id=plateau_id, added=added, total=total)
+
+
+@router.get(
+    "/{plateau_id}/obstacles",
+    response_model=ObstaclesListResponse,
+    summary="Listar obstáculos",
+    description="Retorna os obstáculos do planalto, ordenados por (x, y).",
+)
+@inject
+def list_obstacles(
+    plateau_id: str,
+    service: RoverService = Depends(Provide[Container.rover_service]),
+    logger: Logger = Depends(Provide[Container.logger]),
+) -> ObstaclesListResponse:
+    try:
+        cells = service.get_obstacles(plateau_id)
+    except PlateauNotFoundError as e:
+        logger.error(f"Plateau {plateau_id} not found: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    return ObstaclesListResponse(
+        plateau_id=plateau_id,
+        obstacles=[ObstacleSchema(x=x, y=y) for x, y in cells],
+    )
+
+
+def configure(app: FastAPI) -> None:
+    app.include_router(router)
@@ -0,0 +1,62 @@
+from pydantic import BaseModel, Field
+
+
+class PlateauCoverageResponse(BaseModel):
+    plateau_id: str = Field(..., description="Identificador do planalto")
+    visited_cells: int = Field(..., description="Células já visitadas por alguma sonda")
+    total_cells: int = Field(..., description="Total de células do planalto")
+    coverage: float = Field(..., description="Percentual do planalto explorado")
+    map: list[list[float]] = Field(
+        ...,
+        description=(
+            "Mapa reduzido: cada linha é uma faixa de Y (da menor para a maior) e cada "
+            "valor é a fração de células visitadas no bloco"
+        ),
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "plateau_id": "f3c1e2d4",
+                    "visited_cells": 3,
+                    "total_cells": 4,
+                    "coverage": 75.0,
+                    "map": [[1.0, 1.0], [0.0, 1.0]],
+                }
+            ]
+        }
+    }
+
+
+class ObstacleSchema(BaseModel):
+    x: int = Field(..., ge=0, description="Coordenada X do obstáculo")
+    y: int = Field(..., ge=0, description="Coordenada Y do obstáculo")
+
+
+class AddObstaclesRequest(BaseModel):
+    obstacles: list[ObstacleSchema] = Field(
+        ...,
+        min_length=1,
+        max_length=100_000,
+        description="Obstáculos a adicionar ao planalto",
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {"obstacles": [{"x": 1, "y": 2}, {"x": 3, "y": 3}]}
+            ]
+        }
+    }
+
+
+class AddObstaclesResponse(BaseModel):
+    plateau_id: str = Field(..., description="Identificador do planalto")
+    added: int = Field(..., description="Obstáculos novos (os já existentes são ignorados)")
+    total: int = Field(..., description="Total de obstáculos do planalto")
+
+
+class ObstaclesListResponse(BaseModel):
+    plateau_id: str = Field(..., description="Identificador do planalto")
+    obstacles: list[ObstacleSchema] = Field(..., description="Obstáculos do planalto, ordenados por (x, y)")
@@ -1,20 +1,45 @@
-from fastapi import APIRouter, Depends, FastAPI, HTTPException, status
+import codecs
+import json
+from typing import Optional
+
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from dependency_injector.wiring import inject, Provide
+from starlette.concurrency import run_in_threadpool
 
 from app.containers import Container
+from app.domain.batch import BatchStatus
 from app.domain.direction import Direction
 from app.infrastructure import Logger
 from app.services.rover_service import RoverService
 from app.infrastructure.exceptions import (
+    CollisionError,
+    ConcurrentUpdateError,
     InvalidCommandError,
+    NoPathError,
+    ObstacleError,
     OutOfBoundsError,
     ProbeNotFoundError,
 )
 from app.endpoints.rover.schemas import (
     LaunchProbeRequest,
+    LaunchProbeResult,
+    LaunchProbesRequest,
+    LaunchProbesResponse,
+    MissionRequest,
+    MissionResponse,
+    MissionRoverResult,
     MoveProbeRequest,
+    MoveProbesRequest,
+    MoveProbesResponse,
+    PathPoint,
+    PlanRouteRequest,
+    PlanRouteResponse,
+    ProbeCommandsResult,
+    ProbePathResponse,
     ProbeResponse,
     ProbesListResponse,
+    ProbeVisitResponse,
 )
 
 
@@ -26,7 +51,11 @@ router = APIRouter(prefix="/probes", tags=["probes"])
     response_model=ProbeResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Lançar sonda",
-    description="Lança uma nova sonda e configura o planalto com as dimensões especificadas.",
+    description=(
+        "Lança uma nova sonda e configura o planalto com as dimensões especificadas. "
+        "Várias sondas podem ser lançadas na posição (0, 0) do mesmo planalto; "
+        "retorna 400 se houver um obstáculo nela."
+    ),
 )
 @inject
 def launch_probe(
@@ -35,16 +64,166 @@ def launch_probe(
     logger: Logger = Depends(Provide[Container.logger]),
 ) -> ProbeResponse:
     direction = Direction(request.direction.value)
-    rover = service.launch_probe(request.x, request.y, direction)
+    try:
+        rover = service.launch_probe(request.x, request.y, direction)
+    except ObstacleError as e:
+        logger.error(f"Probe launch blocked: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
     logger.info(f"Probe {rover.id} launched successfully")
     return ProbeResponse(
         id=rover.id,
         x=rover.x,
         y=rover.y,
         direction=rover.direction.value,
+        plateau_id=rover.plateau.id,
+    )
+
+
+@router.post(
+    "/batch",
+    response_model=LaunchProbesResponse,
+    summary="Lançar sondas em lote",
+    description=(
+        "Lança várias sondas, em planaltos iguais ou diferentes, gravando todas em uma única "
+        "transação. Cada sonda tem seu próprio resultado: como em `POST /probes`, as sondas de um "
+        "mesmo planalto dividem a posição (0, 0), e só um obstáculo ali impede o lançamento."
+    ),
+)
+@inject
+def launch_probes(
+    request: LaunchProbesRequest,
+    service: RoverService = Depends(Provide[Container.rover_service]),
+    logger: Logger = Depends(Provide[Container.logger]),
+) -> LaunchProbesResponse:
+    outcomes = service.launch_probes([
+        (probe.x, probe.y, Direction(probe.direction.value)) for probe in request.probes
+    ])
+
+    results = []
+    for rover, error in outcomes:
+        probe = None
+        if rover is not None:
+            probe = ProbeResponse(
+                id=rover.id,
+                x=rover.x,
+                y=rover.y,
+                direction=rover.direction.value,
+                plateau_id=rover.plateau.id,
+            )
+        results.append(LaunchProbeResult(
+            status=BatchStatus.from_error(error).name,
+            probe=probe,
+            detail=str(error) if error is not None else None,
+        ))
+
+    ids = [result.probe.id for result in results if result.probe is not None]
+    logger.info(f"Probe batch launched: {len(ids)} of {len(results)} probes")
+    return LaunchProbesResponse(launched=len(ids), ids=ids, results=results)
+
+
+@router.post(
+    "/missions",
+    response_model=MissionResponse,
+    summary="Executar missão",
+    description=(
+        "Lança as sondas em ordem no planalto especificado, cada uma executando seus "
+        "comandos antes do lançamento da próxima, e grava todos os estados finais de uma vez."
+    ),
+)
+@inject
+def run_mission(
+    request: MissionRequest,
+    service: RoverService = Depends(Provide[Container.rover_service]),
+    logger: Logger = Depends(Provide[Container.logger]),
+) -> MissionResponse:
+    plateau, outcomes = service.run_mission(
+        request.x,
+        request.y,
+        [(Direction(rover.direction.value), rover.commands) for rover in request.rovers],
+    )
+
+    results = []
+    for rover, error in outcomes:
+        probe = None
+        if rover is not None:
+            probe = ProbeResponse(
+                id=rover.id,
+                x=rover.x,
+                y=rover.y,
+                direction=rover.direction.value,
+                plateau_id=rover.plateau.id,
+            )
+        results.append(MissionRoverResult(
+            status=BatchStatus.from_error(error).name,
+            probe=probe,
+            detail=str(error) if error is not None else None,
+        ))
+
+    deployed = sum(result.probe is not None for result in results)
+    succeeded = sum(result.status == BatchStatus.OK.name for result in results)
+    logger.info(f"Mission ran: {deployed} probes deployed, {succeeded} succeeded")
+    return MissionResponse(
+        plateau_id=plateau.id,
+        deployed=deployed,
+        succeeded=succeeded,
+        results=results,
     )
 
 
+@router.put(
+    "/commands",
+    response_model=MoveProbesResponse,
+    summary="Mover sondas em lote",
+    description=(
+        "Executa os comandos de várias sondas, em ordem, lendo todas com uma consulta e "
+        "gravando os novos estados com uma atualização em lote. Com atomic=true, qualquer "
+        "falha descarta o lote inteiro."
+    ),
+)
+@inject
+def move_probes(
+    request: MoveProbesRequest,
+    service: RoverService = Depends(Provide[Container.rover_service]),
+    logger: Logger = Depends(Provide[Container.logger]),
+) -> MoveProbesResponse:
+    try:
+        applied, outcomes = service.move_probes(
+            [(move.probe_id, move.commands) for move in request.moves],
+            atomic=request.atomic,
+        )
+    except ConcurrentUpdateError as e:
+        logger.error(f"Probe batch lost an update race: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+
+    results = []
+    for move, (rover, error) in zip(request.moves, outcomes):
+        probe = None
+        if rover is not None:
+            probe = ProbeResponse(
+                id=rover.id,
+                x=rover.x,
+                y=rover.y,
+                direction=rover.direction.value,
+                plateau_id=rover.plateau.id,
+            )
+        results.append(ProbeCommandsResult(
+            probe_id=move.probe_id,
+            status=BatchStatus.from_error(error).name,
+            probe=probe,
+            detail=str(error) if error is not None else None,
+        ))
+
+    succeeded = sum(result.status == BatchStatus.OK.name for result in results)
+    logger.info(f"Probe batch moved: {succeeded} of {len(results)} succeeded, applied={applied}")
+    return MoveProbesResponse(applied=applied, succeeded=succeeded, results=results)
+
+
 @router.put(
     "/{probe_id}/commands",
     response_model=ProbeResponse,
@@ -66,6 +245,7 @@ def move_probe(
             x=rover.x,
             y=rover.y,
             direction=rover.direction.value,
+            plateau_id=rover.plateau.id,
         )
     except ProbeNotFoundError as e:
         logger.error(f"Probe {probe_id} not found: {e}")
@@ -85,20 +265,168 @@ def move_probe(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
+    except ObstacleError as e:
+        logger.error(f"Probe {probe_id} hit an obstacle: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except (CollisionError, ConcurrentUpdateError) as e:
+        logger.error(f"Probe {probe_id} collided: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+
+
+@router.post(
+    "/{probe_id}/plan",
+    response_model=PlanRouteResponse,
+    summary="Planejar rota",
+    description=(
+        "Calcula a menor sequência de comandos que leva a sonda até (x, y), desviando "
+        "dos obstáculos e das outras sondas do planalto, e opcionalmente a executa."
+    ),
+)
+@inject
+def plan_route(
+    probe_id: str,
+    request: PlanRouteRequest,
+    service: RoverService = Depends(Provide[Container.rover_service]),
+    logger: Logger = Depends(Provide[Container.logger]),
+) -> PlanRouteResponse:
+    try:
+        plan, rover = service.plan_route(probe_id, request.x, request.y, request.execute)
+        logger.info(f"Route planned for probe {probe_id}: {plan.length} commands")
+        return PlanRouteResponse(
+            commands=plan.compact,
+            length=plan.length,
+            executed=request.execute,
+            probe=ProbeResponse(
+                id=rover.id,
+                x=rover.x,
+                y=rover.y,
+                direction=rover.direction.value,
+                plateau_id=rover.plateau.id,
+            ),
+        )
+    except ProbeNotFoundError as e:
+        logger.error(f"Probe {probe_id} not found: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    except OutOfBoundsError as e:
+        logger.error(f"Route target out of bounds: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except (NoPathError, CollisionError, ObstacleError, ConcurrentUpdateError) as e:
+        logger.error(f"No route for probe {probe_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+
+
+@router.put(
+    "/{probe_id}/commands/stream",
+    response_model=ProbeResponse,
+    summary="Mover sonda (streaming)",
+    description=(
+        "Executa uma sequência de comandos enviada como texto puro no corpo da "
+        "requisição, lida e aplicada em blocos conforme chega. Nada é persistido "
+        "se qualquer comando falhar."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"text/plain": {"schema": {"type": "string", "example": "M1000R2M50"}}},
+        }
+    },
+)
+@inject
+async def stream_move_probe(
+    probe_id: str,
+    request: Request,
+    service: RoverService = Depends(Provide[Container.rover_service]),
+    logger: Logger = Depends(Provide[Container.logger]),
+) -> ProbeResponse:
+    try:
+        stream = await run_in_threadpool(service.open_command_stream, probe_id)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        received = 0
+
+        async for chunk in request.stream():
+            received += len(chunk)
+            await run_in_threadpool(stream.feed, decoder.decode(chunk))
+        await run_in_threadpool(stream.feed, decoder.decode(b"", final=True))
+
+        if not received:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Sequência de comandos vazia",
+            )
+
+        rover = await run_in_threadpool(service.commit_command_stream, stream)
+        logger.info(f"Probe {probe_id} moved successfully ({received} bytes streamed)")
+        return ProbeResponse(
+            id=rover.id,
+            x=rover.x,
+            y=rover.y,
+            direction=rover.direction.value,
+            plateau_id=rover.plateau.id,
+        )
+    except ProbeNotFoundError as e:
+        logger.error(f"Probe {probe_id} not found: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    except InvalidCommandError as e:
+        logger.error(f"Invalid command: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except OutOfBoundsError as e:
+        logger.error(f"Probe {probe_id} went out of bounds: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except ObstacleError as e:
+        logger.error(f"Probe {probe_id} hit an obstacle: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except (CollisionError, ConcurrentUpdateError) as e:
+        logger.error(f"Probe {probe_id} collided: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
 
 
 @router.get(
     "",
     response_model=ProbesListResponse,
     summary="Listar sondas",
-    description="Retorna o estado atual de todas as sondas lançadas.",
+    description=(
+        "Retorna o estado atual das sondas lançadas, em ordem de id, paginado por cursor: "
+        "envie em `after` o `next_after` da página anterior."
+    ),
 )
 @inject
 def list_probes(
+    after: Optional[str] = Query(None, description="Id da última sonda da página anterior"),
+    limit: int = Query(1000, ge=1, le=10000, description="Quantidade máxima de sondas"),
     service: RoverService = Depends(Provide[Container.rover_service]),
     logger: Logger = Depends(Provide[Container.logger]),
 ) -> ProbesListResponse:
-    rovers = service.get_all_probes()
+    rovers, next_after = service.get_probes_page(after, limit)
     logger.info(f"Listing {len(rovers)} probes")
     probes = [
         ProbeResponse(
@@ -106,11 +434,126 @@ def list_probes(
             x=rover.x,
             y=rover.y,
             direction=rover.direction.value,
+            plateau_id=rover.plateau.id,
         )
         for rover in rovers
     ]
     
-    return ProbesListResponse(probes=probes)
+    return ProbesListResponse(probes=probes, next_after=next_after)
+
+
+@router.get(
+    "/stream",
+    summary="Listar sondas (streaming)",
+    description=(
+        "Transmite o estado de todas as sondas como NDJSON, um objeto por linha, em ordem de id, "
+        "lendo o banco por um cursor no servidor, sem carregar a frota inteira em memória."
+    ),
+    response_class=StreamingResponse,
+)
+@inject
+def stream_probes(
+    service: RoverService = Depends(Provide[Container.rover_service]),
+) -> StreamingResponse:
+    chunks = service.iter_probe_states()
+    lines = (
+        "".join(
+            json.dumps({"id": id, "x": x, "y": y, "direction": direction, "plateau_id": plateau_id}) + "\n"
+            for id, x, y, direction, plateau_id in chunk
+        )
+        for chunk in chunks
+    )
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.get(
+    "/{probe_id}/path",
+    response_model=ProbePathResponse,
+    summary="Caminho da sonda",
+    description=(
+        "Retorna, paginadas, as células percorridas pela sonda desde o lançamento. "
+        "Somente os lotes de comandos que cobrem a página são lidos."
+    ),
+)
+@inject
+def get_probe_path(
+    probe_id: str,
+    offset: int = Query(0, ge=0, description="Índice do primeiro ponto"),
+    limit: int = Query(1000, ge=1, le=10000, description="Quantidade máxima de pontos"),
+    service: RoverService = Depends(Provide[Container.rover_service]),
+    logger: Logger = Depends(Provide[Container.logger]),
+) -> ProbePathResponse:
+    try:
+        points, total = service.get_probe_path(probe_id, offset, limit)
+    except ProbeNotFoundError as e:
+        logger.error(f"Probe {probe_id} not found: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    next_offset = offset + len(points)
+    return ProbePathResponse(
+        probe_id=probe_id,
+        offset=offset,
+        total=total,
+        points=[PathPoint(x=x, y=y) for x, y in points],
+        next_offset=next_offset if next_offset < total else None,
+    )
+
+
+@router.get(
+    "/{probe_id}/path/stream",
+    summary="Caminho da sonda (streaming)",
+    description=(
+        "Transmite todas as células percorridas pela sonda como NDJSON, "
+        "um objeto {\"x\", \"y\"} por linha, sem carregar o histórico inteiro em memória."
+    ),
+    response_class=StreamingResponse,
+)
+@inject
+def stream_probe_path(
+    probe_id: str,
+    service: RoverService = Depends(Provide[Container.rover_service]),
+    logger: Logger = Depends(Provide[Container.logger]),
+) -> StreamingResponse:
+    try:
+        chunks = service.iter_probe_path(probe_id)
+    except ProbeNotFoundError as e:
+        logger.error(f"Probe {probe_id} not found: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    lines = (
+        "".join(json.dumps({"x": x, "y": y}) + "\n" for x, y in chunk)
+        for chunk in chunks
+    )
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.get(
+    "/{probe_id}/visited",
+    response_model=ProbeVisitResponse,
+    summary="Sonda visitou posição",
+    description="Indica se a sonda já passou pela posição (x, y) em algum momento.",
+)
+@inject
+def probe_visited(
+    probe_id: str,
+    x: int = Query(..., description="Posição X"),
+    y: int = Query(..., description="Posição Y"),
+    service: RoverService = Depends(Provide[Container.rover_service]),
+    logger: Logger = Depends(Provide[Container.logger]),
+) -> ProbeVisitResponse:
+    try:
+        visited = service.has_visited(probe_id, x, y)
+    except ProbeNotFoundError as e:
+        logger.error(f"Probe {probe_id} not found: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e),
+        )
+    return ProbeVisitResponse(probe_id=probe_id, x=x, y=y, visited=visited)
 
 
 def configure(app: FastAPI) -> None:
@@ -1,5 +1,10 @@
 from enum import Enum
-from pydantic import BaseModel, Field
+from typing import Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+# Maior sequência aceita na sintaxe compacta ou de programas; a sintaxe simples não tem limite
+MAX_COMPACT_COMMANDS_LENGTH = 10_000
 
 
 class DirectionEnum(str, Enum):
@@ -23,19 +28,142 @@ class LaunchProbeRequest(BaseModel):
     }
 
 
+class LaunchProbesRequest(BaseModel):
+    probes: list[LaunchProbeRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=10_000,
+        description="Sondas a lançar, em ordem",
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "probes": [
+                        {"x": 5, "y": 5, "direction": "NORTH"},
+                        {"x": 10, "y": 10, "direction": "EAST"},
+                    ]
+                }
+            ]
+        }
+    }
+
+
 class MoveProbeRequest(BaseModel):
     commands: str = Field(
         ..., 
         min_length=1,
-        pattern=r"^[MLRmlr]+$",
-        description="Sequência de comandos (M=mover, L=esquerda, R=direita)"
+        pattern=r"^[MLRmlr(][MLRmlr0-9()]*$",
+        description=(
+            "Sequência de comandos (M=mover, L=esquerda, R=direita). "
+            "Aceita também a sintaxe compacta com repetições, ex.: M1000R2M50, "
+            "e blocos de repetição aninhados, ex.: (MMRMMR)50000 "
+            "(até 10.000 caracteres nessas duas sintaxes)"
+        )
     )
 
     model_config = {
         "json_schema_extra": {
             "examples": [
                 {"commands": "MRM"},
-                {"commands": "MMRMMRMRRM"}
+                {"commands": "MMRMMRMRRM"},
+                {"commands": "M3R2M2"},
+                {"commands": "(M2(RM)3)10"}
+            ]
+        }
+    }
+
+    @field_validator("commands")
+    @classmethod
+    def _limit_compact_syntax(cls, commands: str) -> str:
+        if len(commands) > MAX_COMPACT_COMMANDS_LENGTH and not commands.isalpha():
+            raise ValueError(
+                f"Sequências com contagens ou blocos têm no máximo {MAX_COMPACT_COMMANDS_LENGTH} caracteres"
+            )
+        return commands
+
+
+class ProbeCommandsRequest(BaseModel):
+    probe_id: str = Field(..., description="Identificador único da sonda")
+    commands: str = Field(
+        ...,
+        min_length=1,
+        max_length=10_000,
+        pattern=r"^[MLRmlr(][MLRmlr0-9()]*$",
+        description="Comandos da sonda, na mesma sintaxe de PUT /probes/{id}/commands",
+    )
+
+
+class MoveProbesRequest(BaseModel):
+    moves: list[ProbeCommandsRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=10_000,
+        description="Comandos executados em ordem; uma sonda pode aparecer mais de uma vez",
+    )
+    atomic: bool = Field(False, description="Aplica todos os comandos ou nenhum")
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "moves": [
+                        {"probe_id": "abc123", "commands": "MMRM"},
+                        {"probe_id": "def456", "commands": "M3LM"},
+                    ],
+                    "atomic": False,
+                }
+            ]
+        }
+    }
+
+
+class MissionRoverRequest(BaseModel):
+    direction: DirectionEnum = Field(..., description="Direção inicial da sonda")
+    commands: str = Field(
+        "",
+        max_length=10_000,
+        pattern=r"^([MLRmlr(][MLRmlr0-9()]*)?$",
+        description="Comandos executados logo após o lançamento, na mesma sintaxe de PUT /probes/{id}/commands",
+    )
+
+
+class MissionRequest(BaseModel):
+    x: int = Field(..., ge=0, description="Coordenada X máxima do planalto")
+    y: int = Field(..., ge=0, description="Coordenada Y máxima do planalto")
+    rovers: list[MissionRoverRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=10_000,
+        description="Sondas lançadas e movidas em ordem",
+    )
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "x": 5,
+                    "y": 5,
+                    "rovers": [
+                        {"direction": "NORTH", "commands": "MMRM"},
+                        {"direction": "EAST", "commands": "M3LM"},
+                    ],
+                }
+            ]
+        }
+    }
+
+
+class PlanRouteRequest(BaseModel):
+    x: int = Field(..., ge=0, description="Coordenada X de destino")
+    y: int = Field(..., ge=0, description="Coordenada Y de destino")
+    execute: bool = Field(False, description="Executa o plano na sonda após calculá-lo")
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {"x": 3, "y": 2, "execute": False}
             ]
         }
     }
@@ -46,11 +174,12 @@ class ProbeResponse(BaseModel):
     x: int = Field(..., description="Posição X atual")
     y: int = Field(..., description="Posição Y atual")
     direction: DirectionEnum = Field(..., description="Direção atual")
+    plateau_id: Optional[str] = Field(None, description="Identificador do planalto da sonda")
 
     model_config = {
         "json_schema_extra": {
             "examples": [
-                {"id": "abc123", "x": 1, "y": 1, "direction": "EAST"}
+                {"id": "abc123", "x": 1, "y": 1, "direction": "EAST", "plateau_id": "f3c1e2d4"}
             ]
         }
     }
@@ -58,4 +187,105 @@ class ProbeResponse(BaseModel):
 
 class ProbesListResponse(BaseModel):
     probes: list[ProbeResponse] = Field(..., description="Lista de sondas")
+    next_after: Optional[str] = Field(
+        None,
+        description="Cursor da próxima página (valor de `after`), se houver",
+    )
+
+
+class MissionRoverResult(BaseModel):
+    status: str = Field(
+        ...,
+        description="OK, OUT_OF_BOUNDS, INVALID_COMMAND, COLLISION ou OBSTACLE",
+    )
+    probe: Optional[ProbeResponse] = Field(None, description="Estado final da sonda, se ela foi lançada")
+    detail: Optional[str] = Field(None, description="Mensagem do erro, se houver")
+
+
+class MissionResponse(BaseModel):
+    plateau_id: str = Field(..., description="Identificador do planalto")
+    deployed: int = Field(..., description="Sondas lançadas")
+    succeeded: int = Field(..., description="Sondas que executaram todos os comandos")
+    results: list[MissionRoverResult] = Field(..., description="Resultado de cada sonda, na ordem do pedido")
+
+
+class LaunchProbeResult(BaseModel):
+    status: str = Field(..., description="OK ou OBSTACLE")
+    probe: Optional[ProbeResponse] = Field(None, description="Sonda criada, se ela foi lançada")
+    detail: Optional[str] = Field(None, description="Mensagem do erro, se houver")
+
+
+class LaunchProbesResponse(BaseModel):
+    launched: int = Field(..., description="Sondas lançadas")
+    ids: list[str] = Field(..., description="Identificadores das sondas lançadas, na ordem do pedido")
+    results: list[LaunchProbeResult] = Field(..., description="Resultado de cada sonda, na ordem do pedido")
+
+
+class ProbeCommandsResult(BaseModel):
+    probe_id: str = Field(..., description="Identificador da sonda")
+    status: str = Field(
+        ...,
+        description="OK, OUT_OF_BOUNDS, INVALID_COMMAND, COLLISION, OBSTACLE ou NOT_FOUND",
+    )
+    probe: Optional[ProbeResponse] = Field(None, description="Estado da sonda após os comandos, se ela existe")
+    detail: Optional[str] = Field(None, description="Mensagem do erro, se houver")
+
+
+class MoveProbesResponse(BaseModel):
+    applied: bool = Field(..., description="Se os novos estados foram gravados")
+    succeeded: int = Field(..., description="Itens cujos comandos foram todos executados")
+    results: list[ProbeCommandsResult] = Field(..., description="Resultado de cada item, na ordem do pedido")
+
+
+class PlanRouteResponse(BaseModel):
+    commands: str = Field(..., description="Menor sequência de comandos até o destino, em sintaxe compacta")
+    length: int = Field(..., description="Quantidade de comandos M/L/R do plano")
+    executed: bool = Field(..., description="Se o plano foi executado")
+    probe: ProbeResponse = Field(..., description="Estado da sonda (após a execução, se houver)")
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "commands": "RM3LM2",
+                    "length": 7,
+                    "executed": True,
+                    "probe": {"id": "abc123", "x": 3, "y": 2, "direction": "NORTH", "plateau_id": "f3c1e2d4"},
+                }
+            ]
+        }
+    }
+
+
+class PathPoint(BaseModel):
+    x: int = Field(..., description="Posição X")
+    y: int = Field(..., description="Posição Y")
+
+
+class ProbePathResponse(BaseModel):
+    probe_id: str = Field(..., description="Identificador único da sonda")
+    offset: int = Field(..., description="Índice do primeiro ponto da página")
+    total: int = Field(..., description="Total de pontos do caminho")
+    points: list[PathPoint] = Field(..., description="Células percorridas, em ordem")
+    next_offset: Optional[int] = Field(None, description="Offset da próxima página, se houver")
+
+    model_config = {
+        "json_schema_extra": {
+            "examples": [
+                {
+                    "probe_id": "abc123",
+                    "offset": 0,
+                    "total": 3,
+                    "points": [{"x": 0, "y": 0}, {"x": 0, "y": 1}, {"x": 1, "y": 1}],
+                    "next_offset": None,
+                }
+            ]
+        }
+    }
+
 
+class ProbeVisitResponse(BaseModel):
+    probe_id: str = Field(..., description="Identificador único da sonda")
+    x: int = Field(..., description="Posição X consultada")
+    y: int = Field(..., description="Posição Y consultada")
+    visited: bool = Field(..., description="Se a sonda já passou pela posição")
@@ -1,16 +1,26 @@
 from app.infrastructure.logger import Logger
 from app.infrastructure.exceptions import (
     MarsRoverError,
+    CollisionError,
+    ConcurrentUpdateError,
     InvalidCommandError,
+    NoPathError,
+    ObstacleError,
     OutOfBoundsError,
+    PlateauNotFoundError,
     ProbeNotFoundError,
 )
 
 __all__ = [
     "Logger",
     "MarsRoverError",
+    "CollisionError",
+    "ConcurrentUpdateError",
     "InvalidCommandError",
+    "NoPathError",
+    "ObstacleError",
     "OutOfBoundsError",
+    "PlateauNotFoundError",
     "ProbeNotFoundError",
 ]
 
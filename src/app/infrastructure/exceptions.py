@@ -8,6 +8,16 @@ class InvalidCommandError(MarsRoverError):
         super().__init__(f"Comando inválido: '{command}'. Comandos válidos: M, L, R")
 
 
+class TrajectoryTooLongError(InvalidCommandError):
+    def __init__(self, max_runs: int):
+        self.command = ""
+        self.max_runs = max_runs
+        MarsRoverError.__init__(
+            self,
+            f"Trajeto longo demais para registrar: mais de {max_runs} segmentos em um lote",
+        )
+
+
 class OutOfBoundsError(MarsRoverError):
     def __init__(self, x: int, y: int, max_x: int, max_y: int):
         self.x = x
@@ -17,7 +27,46 @@ class OutOfBoundsError(MarsRoverError):
         )
 
 
+class CollisionError(MarsRoverError):
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
+        super().__init__(
+            f"Movimento inválido: posição ({x}, {y}) já está ocupada por outra sonda"
+        )
+
+
+class ObstacleError(MarsRoverError):
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
+        super().__init__(
+            f"Movimento inválido: posição ({x}, {y}) está bloqueada por um obstáculo"
+        )
+
+
+class NoPathError(MarsRoverError):
+    def __init__(self, x: int, y: int):
+        self.x = x
+        self.y = y
+        super().__init__(f"Nenhum caminho encontrado até a posição ({x}, {y})")
+
+
+class ConcurrentUpdateError(MarsRoverError):
+    def __init__(self, probe_id: str):
+        self.probe_id = probe_id
+        super().__init__(
+            f"Conflito de concorrência: a sonda '{probe_id}' foi alterada por outra requisição"
+        )
+
+
 class ProbeNotFoundError(MarsRoverError):
     def __init__(self, probe_id: str):
         self.probe_id = probe_id
         super().__init__(f"Sonda não encontrada: '{probe_id}'")
+
+
+class PlateauNotFoundError(MarsRoverError):
+    def __init__(self, plateau_id: str):
+        self.plateau_id = plateau_id
+        super().__init__(f"Planalto não encontrado: '{plateau_id}'")
@@ -0,0 +1,37 @@
+from bisect import bisect_right
+from hashlib import blake2b
+from typing import Generic, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing(Generic[T]):
+    """
+    Consistent hash ring mapping string keys to nodes.
+
+    Each node is placed at `replicas` points of a 64-bit ring, hashed from
+    its name and the replica number, and a key belongs to the first point
+    past its own hash. Adding a node to N therefore moves only about
+    1/(N+1) of the keys, all of them to the new node. Names must stay
+    stable for a node across restarts, since they decide its points.
+    """
+
+    def __init__(self, nodes: Sequence[tuple[str, T]], replicas: int = 64) -> None:
+        if not nodes:
+            raise ValueError("A hash ring needs at least one node")
+        points = sorted(
+            (_hash(f"{name}#{replica}"), index)
+            for index, (name, _) in enumerate(nodes)
+            for replica in range(replicas)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [nodes[index][1] for _, index in points]
+
+    def get(self, key: str) -> T:
+        """Returns the node that owns `key`."""
+        index = bisect_right(self._hashes, _hash(key))
+        return self._owners[index % len(self._owners)]
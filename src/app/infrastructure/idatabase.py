@@ -17,6 +17,9 @@ class IDatabase(metaclass=abc.ABCMeta):
 
     @abc.abstractmethod
     @contextmanager
-    def session(self):
-        """Provides a database session."""
+    def session(self, shared: bool = False):
+        """
+        Provides a database session; calls made inside a `shared` one, in
+        the same context, join its transaction.
+        """
         raise NotImplementedError
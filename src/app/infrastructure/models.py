@@ -1,8 +1,20 @@
-from sqlalchemy import Column, String, Integer
+from sqlalchemy import BigInteger, Column, ForeignKey, Index, Integer, LargeBinary, SmallInteger, String
+from sqlalchemy.orm import relationship
 
 from app.infrastructure.postgres_database import Base
 
 
+class PlateauModel(Base):
+    __tablename__ = "plateaus"
+
+    id = Column(String(36), primary_key=True)
+    max_x = Column(Integer, nullable=False)
+    max_y = Column(Integer, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<PlateauModel(id={self.id}, max_x={self.max_x}, max_y={self.max_y})>"
+
+
 class RoverModel(Base):
     __tablename__ = "rovers"
 
@@ -10,9 +22,87 @@ class RoverModel(Base):
     x = Column(Integer, nullable=False, default=0)
     y = Column(Integer, nullable=False, default=0)
     direction = Column(String(10), nullable=False, default="NORTH")
-    plateau_max_x = Column(Integer, nullable=False)
-    plateau_max_y = Column(Integer, nullable=False)
+    plateau_id = Column(String(36), ForeignKey("plateaus.id"), nullable=False, index=True)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+
+    plateau = relationship(PlateauModel, lazy="joined")
 
     def __repr__(self) -> str:
         return f"<RoverModel(id={self.id}, x={self.x}, y={self.y}, direction={self.direction})>"
 
+
+class RoverEventModel(Base):
+    __tablename__ = "rover_events"
+
+    rover_id = Column(String(36), ForeignKey("rovers.id"), primary_key=True)
+    seq = Column(Integer, primary_key=True)
+    dx = Column(Integer, nullable=False)
+    dy = Column(Integer, nullable=False)
+    turns = Column(SmallInteger, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"<RoverEventModel(rover_id={self.rover_id}, seq={self.seq}, "
+            f"dx={self.dx}, dy={self.dy}, turns={self.turns})>"
+        )
+
+
+class TrajectoryModel(Base):
+    __tablename__ = "trajectories"
+    __table_args__ = (
+        Index("ix_trajectories_rover_id_first_point", "rover_id", "first_point"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    # Sem chave estrangeira: com SHARD_URLS as sondas ficam em outros bancos
+    rover_id = Column(String(36), nullable=False)
+    first_point = Column(BigInteger, nullable=False)
+    points = Column(BigInteger, nullable=False)
+    start_x = Column(Integer, nullable=False)
+    start_y = Column(Integer, nullable=False)
+    end_x = Column(Integer, nullable=False)
+    end_y = Column(Integer, nullable=False)
+    min_x = Column(Integer, nullable=False)
+    max_x = Column(Integer, nullable=False)
+    min_y = Column(Integer, nullable=False)
+    max_y = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+
+    def __repr__(self) -> str:
+        return (
+            f"<TrajectoryModel(id={self.id}, rover_id={self.rover_id}, "
+            f"first_point={self.first_point}, points={self.points})>"
+        )
+
+
+class CoverageTileModel(Base):
+    __tablename__ = "coverage_tiles"
+
+    plateau_id = Column(String(36), ForeignKey("plateaus.id"), primary_key=True)
+    tile_x = Column(Integer, primary_key=True)
+    tile_y = Column(Integer, primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<CoverageTileModel(plateau_id={self.plateau_id}, tile_x={self.tile_x}, tile_y={self.tile_y})>"
+
+
+class ObstacleModel(Base):
+    __tablename__ = "obstacles"
+
+    plateau_id = Column(String(36), ForeignKey("plateaus.id"), primary_key=True)
+    x = Column(Integer, primary_key=True)
+    y = Column(Integer, primary_key=True)
+
+    def __repr__(self) -> str:
+        return f"<ObstacleModel(plateau_id={self.plateau_id}, x={self.x}, y={self.y})>"
+
+
+class CacheGenerationModel(Base):
+    __tablename__ = "cache_generations"
+
+    name = Column(String(50), primary_key=True)
+    generation = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    def __repr__(self) -> str:
+        return f"<CacheGenerationModel(name={self.name}, generation={self.generation})>"
@@ -1,7 +1,9 @@
 from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import DeclarativeBase, Session, scoped_session, sessionmaker
+from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
 from app.infrastructure.idatabase import IDatabase
 from app.infrastructure.logger import Logger
@@ -21,13 +23,13 @@ class PostgresDatabase(IDatabase):
             pool_size=pool_size,
             max_overflow=max_overflow,
         )
-        self._session_factory = scoped_session(
-            sessionmaker(
-                self._engine,
-                expire_on_commit=False,
-                class_=Session,
-            )
+        self._session_factory = sessionmaker(
+            self._engine,
+            expire_on_commit=False,
+            class_=Session,
         )
+        # Sessão aberta com `shared=True` no contexto atual, à qual as chamadas aninhadas se juntam
+        self._shared: ContextVar[Optional[Session]] = ContextVar("shared_session", default=None)
         self._logger = logger
 
     def create_database(self) -> None:
@@ -37,8 +39,25 @@ class PostgresDatabase(IDatabase):
         self._engine.dispose()
 
     @contextmanager
-    def session(self):
+    def session(self, shared: bool = False):
+        """
+        Provides a new session, committed and closed on exit.
+
+        With `shared` (as `RoverRepository.modify` opens its transaction),
+        every call made inside the block in the same context (e.g. the
+        loaders run by the `change` callback) joins that session instead:
+        it neither commits nor closes it, so row locks taken by the outer
+        call are held until that one ends. Only such a block is joined,
+        through a context variable it sets and resets itself; nothing is
+        kept per thread, so a streaming generator resumed on another
+        thread still owns, and closes, the session it opened.
+        """
+        joined = self._shared.get()
+        if joined is not None:
+            yield joined
+            return
         session: Session = self._session_factory()
+        token = self._shared.set(session) if shared else None
         try:
             yield session
             session.commit()
@@ -47,5 +66,6 @@ class PostgresDatabase(IDatabase):
             session.rollback()
             raise
         finally:
+            if token is not None:
+                self._shared.reset(token)
             session.close()
-            self._session_factory.remove()
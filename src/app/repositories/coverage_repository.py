@@ -0,0 +1,66 @@
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
+
+from app.domain.coverage import merge_tiles
+from app.infrastructure.models import CoverageTileModel
+from app.repositories.sql_repository import SqlRepository
+
+# Blocos por SELECT, abaixo do limite de parâmetros do SQLite
+_TILES_PER_SELECT = 300
+
+
+class CoverageRepository(SqlRepository):
+    model = CoverageTileModel
+
+    def get_by_plateau(self, plateau_id: str):
+        with self.session_factory() as session:
+            stmt = select(self.model).where(self.model.plateau_id == plateau_id)
+            result = session.execute(stmt)
+            return result.scalars().all()
+
+    def save_tiles(self, plateau_id: str, tiles):
+        """Merges (tile_x, tile_y, data) tiles of the plateau into the stored ones in one transaction."""
+        self.save_tiles_many((plateau_id, tile_x, tile_y, data) for tile_x, tile_y, data in tiles)
+
+    def save_tiles_many(self, tiles):
+        """
+        Merges (plateau_id, tile_x, tile_y, data) tiles of many plateaus into
+        the stored ones in one transaction. Stored tiles are read with
+        `SELECT ... FOR UPDATE`, in key order, and OR-ed with the new bits,
+        so cells marked by another instance are never overwritten; the
+        missing ones are inserted with one executemany.
+        """
+        merged: dict[tuple[str, int, int], bytes] = {}
+        for plateau_id, tile_x, tile_y, data in tiles:
+            key = (plateau_id, tile_x, tile_y)
+            merged[key] = merge_tiles(merged[key], data) if key in merged else data
+        if not merged:
+            return
+        try:
+            self._merge(merged)
+        except IntegrityError:
+            # Outra instância inseriu um dos blocos ao mesmo tempo; agora ele é mesclado
+            self._merge(merged)
+
+    def _merge(self, tiles: dict[tuple[str, int, int], bytes]) -> None:
+        key = tuple_(self.model.plateau_id, self.model.tile_x, self.model.tile_y)
+        keys = sorted(tiles)
+        with self.session_factory() as session:
+            missing = set(keys)
+            for start in range(0, len(keys), _TILES_PER_SELECT):
+                stmt = (
+                    select(self.model)
+                    .where(key.in_(keys[start:start + _TILES_PER_SELECT]))
+                    .order_by(self.model.plateau_id, self.model.tile_x, self.model.tile_y)
+                    .with_for_update()
+                )
+                for model in session.execute(stmt).scalars():
+                    tile = (model.plateau_id, model.tile_x, model.tile_y)
+                    model.data = merge_tiles(model.data, tiles[tile])
+                    missing.discard(tile)
+            if missing:
+                session.execute(insert(self.model.__table__), [
+                    {"plateau_id": plateau_id, "tile_x": tile_x, "tile_y": tile_y, "data": tiles[plateau_id, tile_x, tile_y]}
+                    for plateau_id, tile_x, tile_y in sorted(missing)
+                ])
+            session.commit()
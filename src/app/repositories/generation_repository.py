@@ -0,0 +1,43 @@
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.infrastructure.models import CacheGenerationModel
+from app.repositories.sql_repository import SqlRepository
+
+
+class GenerationRepository(SqlRepository):
+    """
+    Named counters shared by every API instance through the database,
+    bumped after each write to a cached table so the caches of all
+    instances can tell when their entries went stale.
+    """
+    model = CacheGenerationModel
+
+    def current(self, name: str) -> int:
+        """Returns the generation of `name` (0 if it was never bumped)."""
+        with self.session_factory() as session:
+            stmt = select(self.model.generation).where(self.model.name == name)
+            return session.execute(stmt).scalar_one_or_none() or 0
+
+    def bump(self, name: str) -> int:
+        """Increments the generation of `name` and returns the new value."""
+        try:
+            return self._bump(name)
+        except IntegrityError:
+            # Outra instância criou o contador ao mesmo tempo
+            return self._bump(name)
+
+    def _bump(self, name: str) -> int:
+        with self.session_factory() as session:
+            stmt = (
+                update(self.model)
+                .where(self.model.name == name)
+                .values(generation=self.model.generation + 1)
+            )
+            if not session.execute(stmt).rowcount:
+                session.execute(insert(self.model).values(name=name, generation=1))
+            generation = session.execute(
+                select(self.model.generation).where(self.model.name == name)
+            ).scalar_one()
+            session.commit()
+            return generation
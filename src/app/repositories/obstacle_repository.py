@@ -0,0 +1,18 @@
+from sqlalchemy import select
+
+from app.infrastructure.models import ObstacleModel
+from app.repositories.sql_repository import SqlRepository
+
+
+class ObstacleRepository(SqlRepository):
+    model = ObstacleModel
+
+    def get_by_plateau(self, plateau_id: str):
+        with self.session_factory() as session:
+            stmt = select(self.model.x, self.model.y).where(self.model.plateau_id == plateau_id)
+            result = session.execute(stmt)
+            return [(x, y) for x, y in result]
+
+    def add_many(self, plateau_id: str, cells):
+        """Inserts new (x, y) obstacles of the plateau with one executemany."""
+        self.create_many([{"plateau_id": plateau_id, "x": x, "y": y} for x, y in cells])
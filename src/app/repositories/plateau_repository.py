@@ -0,0 +1,41 @@
+from sqlalchemy import select, tuple_
+
+from app.infrastructure.models import PlateauModel
+from app.repositories.sql_repository import SqlRepository
+
+# Pares de dimensões por consulta, abaixo do limite de parâmetros do SQLite
+_DIMENSIONS_PER_QUERY = 400
+
+
+class PlateauRepository(SqlRepository):
+    model = PlateauModel
+
+    def get_by_dimensions(self, max_x: int, max_y: int):
+        with self.session_factory() as session:
+            stmt = (
+                select(self.model)
+                .where(self.model.max_x == max_x, self.model.max_y == max_y)
+                .order_by(self.model.id)
+                .limit(1)
+            )
+            result = session.execute(stmt)
+            return result.scalar_one_or_none()
+
+    def get_by_dimensions_many(self, dimensions):
+        """
+        Returns the plateau of each (max_x, max_y) pair that has one, keyed
+        by the pair, with a few `IN` queries instead of one per pair.
+        """
+        dimensions = list(dict.fromkeys(dimensions))
+        plateaus = {}
+        with self.session_factory() as session:
+            for start in range(0, len(dimensions), _DIMENSIONS_PER_QUERY):
+                chunk = dimensions[start:start + _DIMENSIONS_PER_QUERY]
+                stmt = (
+                    select(self.model)
+                    .where(tuple_(self.model.max_x, self.model.max_y).in_(chunk))
+                    .order_by(self.model.id)
+                )
+                for model in session.execute(stmt).scalars():
+                    plateaus.setdefault((model.max_x, model.max_y), model)
+        return plateaus
@@ -0,0 +1,237 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+from typing import Callable, Iterable, Optional
+
+from app.infrastructure.logger import Logger
+from app.repositories.generation_repository import GenerationRepository
+from app.repositories.sql_repository import SqlRepository
+
+# Listagens (a tabela inteira ou uma página) guardadas ao mesmo tempo
+_MAX_SNAPSHOTS = 256
+
+
+class ReadThroughRepository:
+    """
+    Read-through cache in front of a SqlRepository.
+
+    `get_by_id` is served from a per-key LRU of up to `max_size` entries,
+    and `get_all` / `get_page` from snapshots of the listing (the whole
+    table, or one page of it); both expire `ttl` seconds after being
+    loaded. Writes made through this layer drop exactly the keys they
+    touched (and the snapshots, since any write can change a listing),
+    then bump the generation of the table in `generations`. `iter_states`
+    streams straight from the database and is never cached.
+
+    Every cached read first compares that shared generation with the one
+    the cache was filled on (at most once per `check_interval` seconds,
+    0 meaning every read): a jump other than this instance's own bumps
+    means another process wrote, and everything cached is dropped. The
+    generation is bumped after the write commits, so a reader can only
+    see a foreign write late during that gap.
+    """
+
+    def __init__(
+        self,
+        repository: SqlRepository,
+        generations: GenerationRepository,
+        logger: Logger,
+        name: str = "rovers",
+        max_size: int = 10_000,
+        ttl: float = 30.0,
+        check_interval: float = 0.0,
+    ) -> None:
+        self._repository = repository
+        self._generations = generations
+        self._logger = logger
+        self._name = name
+        self._max_size = max_size
+        self._ttl = ttl
+        self._check_interval = check_interval
+        self._entries: OrderedDict[str, tuple[object, float]] = OrderedDict()
+        self._snapshots: OrderedDict[Optional[tuple], tuple[list, float]] = OrderedDict()
+        self._generation: Optional[int] = None
+        self._checked_until = 0.0
+        # Protege apenas o estado acima; nunca é mantido durante I/O
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+        self._snapshot_hits = 0
+        self._snapshot_misses = 0
+
+    def get_by_id(self, id: str):
+        generation = self._sync()
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(id)
+            if entry is not None:
+                if entry[1] > now:
+                    self._entries.move_to_end(id)
+                    self._hits += 1
+                    return entry[0]
+                del self._entries[id]
+                self._expirations += 1
+            self._misses += 1
+
+        model = self._repository.get_by_id(id)
+        if model is None:
+            return None
+        with self._lock:
+            # Só guarda se nenhuma escrita invalidou o cache durante a leitura
+            if self._generation == generation:
+                self._entries[id] = (model, now + self._ttl)
+                self._entries.move_to_end(id)
+                while len(self._entries) > self._max_size:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return model
+
+    def get_all(self):
+        return self._listing(None, self._repository.get_all)
+
+    def get_page(self, after_id: Optional[str], limit: int):
+        return self._listing((after_id, limit), lambda: self._repository.get_page(after_id, limit))
+
+    def iter_states(self, batch_size: int = 10_000):
+        return self._repository.iter_states(batch_size)
+
+    def get_by_plateau(self, plateau_id: str):
+        return self._repository.get_by_plateau(plateau_id)
+
+    def get_many(self, ids):
+        return self._repository.get_many(ids)
+
+    def create(self, values):
+        try:
+            return self._repository.create(values)
+        finally:
+            self._written([values.get("id")])
+
+    def create_many(self, rows):
+        try:
+            self._repository.create_many(rows)
+        finally:
+            self._written(row.get("id") for row in rows)
+
+    def update(self, pk, values):
+        try:
+            self._repository.update(pk, values)
+        finally:
+            self._written([pk])
+
+    def update_many(self, rows):
+        try:
+            self._repository.update_many(rows)
+        finally:
+            self._written(row["id"] for row in rows)
+
+    def modify(self, ids, change, lock: bool = False) -> bool:
+        """Same contract as `RoverRepository.modify`; the probes of `ids` are invalidated when written."""
+        ids = list(ids)
+        written = False
+        try:
+            written = self._repository.modify(ids, change, lock=lock)
+            return written
+        finally:
+            if written:
+                self._written(ids)
+
+    def stats(self) -> dict:
+        """Returns the cache counters."""
+        with self._lock:
+            lookups = self._hits + self._misses
+            snapshot_lookups = self._snapshot_hits + self._snapshot_misses
+            return {
+                "size": len(self._entries),
+                "max_size": self._max_size,
+                "ttl": self._ttl,
+                "generation": self._generation,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "snapshot_hits": self._snapshot_hits,
+                "snapshot_misses": self._snapshot_misses,
+                "snapshot_hit_rate": self._snapshot_hits / snapshot_lookups if snapshot_lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        """Drops every entry; the counters are kept."""
+        with self._lock:
+            self._drop()
+
+    def _listing(self, key, loader: Callable[[], Iterable]) -> list:
+        """Serves a listing (the whole table, or one page of it) from its snapshot."""
+        generation = self._sync()
+        now = monotonic()
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot is not None:
+                if snapshot[1] > now:
+                    self._snapshots.move_to_end(key)
+                    self._snapshot_hits += 1
+                    return list(snapshot[0])
+                del self._snapshots[key]
+                self._expirations += 1
+            self._snapshot_misses += 1
+
+        models = list(loader())
+        with self._lock:
+            if self._generation == generation:
+                self._snapshots[key] = (models, now + self._ttl)
+                while len(self._snapshots) > _MAX_SNAPSHOTS:
+                    self._snapshots.popitem(last=False)
+                    self._evictions += 1
+        return list(models)
+
+    def _sync(self) -> Optional[int]:
+        """
+        Drops everything cached if the shared generation moved past the
+        one the cache holds, and returns the generation reads are stamped with.
+        """
+        now = monotonic()
+        with self._lock:
+            if self._generation is not None and now < self._checked_until:
+                return self._generation
+
+        generation = self._generations.current(self._name)
+        with self._lock:
+            if self._generation is None or generation > self._generation:
+                if self._generation is not None:
+                    self._invalidations += 1
+                self._drop()
+                self._generation = generation
+            self._checked_until = now + self._check_interval
+            return generation
+
+    def _written(self, ids: Iterable[Optional[str]]) -> None:
+        """Invalidates the written keys and publishes the write to the other instances."""
+        ids = list(ids)
+        try:
+            generation = self._generations.bump(self._name)
+        except Exception:
+            self._logger.exception("Cache generation bump failed; other instances may read stale rows until the TTL")
+            with self._lock:
+                self._drop()
+                self._generation = None
+            return
+
+        with self._lock:
+            self._snapshots.clear()
+            for id in ids:
+                self._entries.pop(id, None)
+            if self._generation is None or generation > self._generation:
+                if self._generation is not None and generation != self._generation + 1:
+                    # Houve outras escritas desde a última verificação
+                    self._invalidations += 1
+                    self._drop()
+                self._generation = generation
+
+    def _drop(self) -> None:
+        self._entries.clear()
+        self._snapshots.clear()
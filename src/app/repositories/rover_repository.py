@@ -1,6 +1,462 @@
-from app.infrastructure.models import RoverModel
+from typing import Iterator, NamedTuple, Optional
+
+from sqlalchemy import Integer, and_, bindparam, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.domain.direction import Direction
+from app.domain.events import RoverEvent
+from app.infrastructure.exceptions import ConcurrentUpdateError
+from app.infrastructure.models import PlateauModel, RoverEventModel, RoverModel
 from app.repositories.sql_repository import SqlRepository
 
 
+# Ids por consulta, abaixo do limite de parâmetros do SQLite
+_IDS_PER_QUERY = 500
+
+# Colunas de estado devolvidas por `iter_states`
+_STATE_COLUMNS = ("id", "x", "y", "direction", "plateau_id")
+
+
 class RoverRepository(SqlRepository):
     model = RoverModel
+
+    def get_by_plateau(self, plateau_id: str):
+        with self.session_factory() as session:
+            stmt = select(self.model).where(self.model.plateau_id == plateau_id)
+            result = session.execute(stmt)
+            return result.scalars().all()
+
+    def get_page(self, after_id: Optional[str], limit: int):
+        """Up to `limit` rovers in id order, starting after `after_id` (keyset pagination)."""
+        with self.session_factory() as session:
+            stmt = select(self.model).order_by(self.model.id).limit(limit)
+            if after_id is not None:
+                stmt = stmt.where(self.model.id > after_id)
+            return session.execute(stmt).scalars().all()
+
+    def iter_states(self, batch_size: int = 10_000) -> Iterator[list[tuple]]:
+        """
+        Yields the (id, x, y, direction, plateau_id) of every rover in id
+        order, in lists of up to `batch_size`, without building ORM objects.
+
+        Rows come from a server-side cursor on Postgres, so memory stays
+        bounded by one batch whatever the size of the table; the session
+        stays open until the iterator is exhausted or closed.
+        """
+        columns = [getattr(self.model, name) for name in _STATE_COLUMNS]
+        with self.session_factory() as session:
+            stmt = select(*columns).order_by(self.model.id).execution_options(yield_per=batch_size)
+            for partition in session.execute(stmt).partitions():
+                yield [tuple(row) for row in partition]
+
+    def get_many(self, ids):
+        """Returns the rovers with the given ids, with a few `IN` queries."""
+        ids = list(dict.fromkeys(ids))
+        models = []
+        with self.session_factory() as session:
+            for start in range(0, len(ids), _IDS_PER_QUERY):
+                stmt = select(self.model).where(self.model.id.in_(ids[start:start + _IDS_PER_QUERY]))
+                models.extend(session.execute(stmt).scalars().all())
+        return models
+
+    def modify(self, ids, change, lock: bool = False) -> bool:
+        """
+        Reads the rovers with the given ids and writes back the rows
+        returned by `change(models)` (dicts with `id` and the new values),
+        in one transaction on one connection.
+
+        With `lock`, the rovers are read with `SELECT ... FOR UPDATE`, in id
+        order. Without it, each row is written only if the rover is still
+        on the version that was read (compare-and-swap); if any of them
+        changed meanwhile, nothing is written and False is returned. Every
+        row written has its version incremented.
+
+        The session is opened `shared`, so reads that `change` makes
+        through the same database join this transaction.
+        """
+        with self.session_factory(shared=True) as session:
+            models = self._read_for_update(session, ids, lock)
+            if not self._write_back(session, models, change(models)):
+                session.rollback()
+                return False
+            session.commit()
+            return True
+
+    def _read_for_update(self, session, ids, lock: bool) -> list:
+        """Reads the rovers of `ids` for `modify`, in id order, in `session`."""
+        ids = sorted(set(ids))
+        models = []
+        for start in range(0, len(ids), _IDS_PER_QUERY):
+            stmt = (
+                select(self.model)
+                .where(self.model.id.in_(ids[start:start + _IDS_PER_QUERY]))
+                .order_by(self.model.id)
+            )
+            if lock:
+                stmt = stmt.with_for_update(of=self.model)
+            models.extend(session.execute(stmt).scalars().all())
+        return models
+
+    def _write_back(self, session, models, rows) -> bool:
+        """
+        Writes, in `session`, the `rows` that `change` returned for the
+        `models` read by `_read_for_update`; False if any of them lost
+        the compare-and-swap (the caller rolls back).
+        """
+        versions = {model.id: model.version for model in models}
+        rows = [{**row, "version": versions[row["id"]]} for row in rows]
+        return not rows or self._update_rows(session, rows, versioned=True) == len(rows)
+
+
+class PlateauRow(NamedTuple):
+    id: str
+    max_x: int
+    max_y: int
+
+
+class RoverRow(NamedTuple):
+    """
+    Rover read through Core as a plain row, with its plateau's dimensions
+    joined in. Exposes the same attributes as RoverModel (`plateau`
+    included) for read-only use.
+    """
+    id: str
+    x: int
+    y: int
+    direction: str
+    plateau_id: str
+    version: int
+    plateau_max_x: int
+    plateau_max_y: int
+
+    @property
+    def plateau(self) -> PlateauRow:
+        return PlateauRow(self.plateau_id, self.plateau_max_x, self.plateau_max_y)
+
+
+# Consultas de leitura montadas uma única vez; a cada execução só mudam os parâmetros
+_rovers = RoverModel.__table__
+_plateaus = PlateauModel.__table__
+_SELECT_ROWS = select(
+    _rovers.c.id,
+    _rovers.c.x,
+    _rovers.c.y,
+    _rovers.c.direction,
+    _rovers.c.plateau_id,
+    _rovers.c.version,
+    _plateaus.c.max_x,
+    _plateaus.c.max_y,
+).join_from(_rovers, _plateaus, _rovers.c.plateau_id == _plateaus.c.id)
+_ROW_BY_ID = _SELECT_ROWS.where(_rovers.c.id == bindparam("id"))
+_ROWS_BY_PLATEAU = _SELECT_ROWS.where(_rovers.c.plateau_id == bindparam("plateau_id"))
+_FIRST_PAGE = _SELECT_ROWS.order_by(_rovers.c.id).limit(bindparam("limit", type_=Integer))
+_NEXT_PAGE = (
+    _SELECT_ROWS.where(_rovers.c.id > bindparam("after_id"))
+    .order_by(_rovers.c.id)
+    .limit(bindparam("limit", type_=Integer))
+)
+_STATES = select(*(_rovers.c[name] for name in _STATE_COLUMNS)).order_by(_rovers.c.id)
+
+
+class CoreRoverRepository(RoverRepository):
+    """
+    RoverRepository whose plain reads (`get_by_id`, `get_all`, `get_page`,
+    `get_by_plateau`) skip the ORM: prebuilt Core statements (so nothing
+    is rebuilt per call and the compiled SQL is always a cache hit) are run
+    on the session's connection and each row becomes a RoverRow, with no
+    identity map or attribute instrumentation.
+
+    Everything that writes or hands out mutable models (`modify`,
+    `get_many`) still goes through the ORM.
+    """
+
+    def get_by_id(self, id: str) -> Optional[RoverRow]:
+        rows = self._rows(_ROW_BY_ID, {"id": id})
+        return rows[0] if rows else None
+
+    def get_all(self):
+        return self._rows(_SELECT_ROWS, {})
+
+    def get_page(self, after_id: Optional[str], limit: int):
+        if after_id is None:
+            return self._rows(_FIRST_PAGE, {"limit": limit})
+        return self._rows(_NEXT_PAGE, {"after_id": after_id, "limit": limit})
+
+    def get_by_plateau(self, plateau_id: str):
+        return self._rows(_ROWS_BY_PLATEAU, {"plateau_id": plateau_id})
+
+    def _rows(self, stmt, params: dict) -> list[RoverRow]:
+        with self.session_factory() as session:
+            return [RoverRow._make(row) for row in session.connection().execute(stmt, params)]
+
+
+# Leitura pelo log: cada snapshot junto com a soma dos eventos posteriores a ele
+_events = RoverEventModel.__table__
+_REPLAY_ROWS = (
+    select(
+        *_SELECT_ROWS.selected_columns,
+        func.coalesce(func.sum(_events.c.dx), 0),
+        func.coalesce(func.sum(_events.c.dy), 0),
+        func.coalesce(func.sum(_events.c.turns), 0),
+        func.coalesce(func.max(_events.c.seq), _rovers.c.version),
+    )
+    .join_from(_rovers, _plateaus, _rovers.c.plateau_id == _plateaus.c.id)
+    .outerjoin(_events, and_(_events.c.rover_id == _rovers.c.id, _events.c.seq > _rovers.c.version))
+    .group_by(*_SELECT_ROWS.selected_columns)
+)
+_REPLAY_BY_ID = _REPLAY_ROWS.where(_rovers.c.id == bindparam("id"))
+_REPLAY_BY_IDS = _REPLAY_ROWS.where(_rovers.c.id.in_(bindparam("ids", expanding=True))).order_by(_rovers.c.id)
+_REPLAY_BY_PLATEAU = _REPLAY_ROWS.where(_rovers.c.plateau_id == bindparam("plateau_id"))
+_REPLAY_FIRST_PAGE = _REPLAY_ROWS.order_by(_rovers.c.id).limit(bindparam("limit", type_=Integer))
+_REPLAY_NEXT_PAGE = (
+    _REPLAY_ROWS.where(_rovers.c.id > bindparam("after_id"))
+    .order_by(_rovers.c.id)
+    .limit(bindparam("limit", type_=Integer))
+)
+_HISTORY_PAGE = (
+    select(
+        _events.c.rover_id,
+        func.sum(_events.c.dx),
+        func.sum(_events.c.dy),
+        func.sum(_events.c.turns),
+        func.max(_events.c.seq),
+    )
+    .where(_events.c.rover_id > bindparam("after_id"))
+    .group_by(_events.c.rover_id)
+    .order_by(_events.c.rover_id)
+    .limit(bindparam("limit", type_=Integer))
+)
+_LOCK_ROWS = (
+    select(_rovers.c.id)
+    .where(_rovers.c.id.in_(bindparam("ids", expanding=True)))
+    .order_by(_rovers.c.id)
+    .with_for_update()
+)
+# Nunca volta um snapshot para trás, mesmo com escritas concorrentes
+_WRITE_SNAPSHOT = (
+    update(_rovers)
+    .where(_rovers.c.id == bindparam("p_id"), _rovers.c.version <= bindparam("p_seq"))
+    .values(x=bindparam("p_x"), y=bindparam("p_y"), direction=bindparam("p_direction"), version=bindparam("p_seq"))
+)
+
+_DIRECTIONS = {direction.value: direction for direction in Direction}
+
+
+class EventSourcedRoverRepository(CoreRoverRepository):
+    """
+    Rover repository backed by an append-only event log.
+
+    Every write appends one `rover_events` row per probe, holding the
+    RoverEvent between the state it read and the state written, under the
+    next sequence number of that probe. The `rovers` row is only a
+    snapshot, whose `version` is the last event folded into it; it is
+    refreshed in the same transaction as every `snapshot_interval`-th event
+    of the rover. Reads run one statement joining each snapshot with
+    the sums of the events after it, so replaying a probe costs at most
+    `snapshot_interval` index entries however long its history is. Rows
+    handed out carry the replayed state, with `version` set to the last
+    event applied.
+
+    All events of a call are appended by one executemany, in primary key
+    order. A concurrent writer that took the same sequence number hits the
+    primary key, so `modify` returns False just as on a lost compare-and-swap;
+    `update_many` retries it up to `retries` times.
+    """
+
+    def __init__(self, session_factory, logger, snapshot_interval: int = 100, retries: int = 5) -> None:
+        super().__init__(session_factory, logger)
+        self._snapshot_interval = max(1, snapshot_interval)
+        self._retries = retries
+
+    def get_by_id(self, id: str) -> Optional[RoverRow]:
+        rows = self._rows(_REPLAY_BY_ID, {"id": id})
+        return rows[0] if rows else None
+
+    def get_all(self):
+        return self._rows(_REPLAY_ROWS, {})
+
+    def get_page(self, after_id: Optional[str], limit: int):
+        if after_id is None:
+            return self._rows(_REPLAY_FIRST_PAGE, {"limit": limit})
+        return self._rows(_REPLAY_NEXT_PAGE, {"after_id": after_id, "limit": limit})
+
+    def get_by_plateau(self, plateau_id: str):
+        return self._rows(_REPLAY_BY_PLATEAU, {"plateau_id": plateau_id})
+
+    def get_many(self, ids):
+        """Returns the rovers with the given ids, replayed, as detached models free to change in memory."""
+        ids = list(dict.fromkeys(ids))
+        with self.session_factory() as session:
+            rows = self._read_ids(session.connection(), ids)
+        return [
+            RoverModel(
+                id=row.id,
+                x=row.x,
+                y=row.y,
+                direction=row.direction,
+                plateau_id=row.plateau_id,
+                version=row.version,
+                plateau=PlateauModel(id=row.plateau_id, max_x=row.plateau_max_x, max_y=row.plateau_max_y),
+            )
+            for row in rows
+        ]
+
+    def iter_states(self, batch_size: int = 10_000) -> Iterator[list[tuple]]:
+        with self.session_factory() as session:
+            stmt = _REPLAY_ROWS.order_by(_rovers.c.id).execution_options(yield_per=batch_size)
+            for partition in session.connection().execute(stmt).partitions():
+                yield [
+                    (row.id, row.x, row.y, row.direction, row.plateau_id)
+                    for row, _ in map(_replayed, partition)
+                ]
+
+    def create(self, values):
+        """Inserts a rover and its launch event."""
+        with self.session_factory() as session:
+            model = self.model(**values)
+            session.add(model)
+            session.flush()
+            session.execute(insert(_events), [_launch(values)])
+            session.commit()
+            return model
+
+    def create_many(self, rows):
+        """Inserts many rovers and their launch events in one transaction."""
+        if not rows:
+            return
+        with self.session_factory() as session:
+            self._insert_rows(session, _rovers, rows)
+            self._insert_rows(session, _events, [_launch(row) for row in rows])
+            session.commit()
+
+    def update(self, pk, values):
+        self.update_many([{"id": pk, **values}])
+
+    def update_many(self, rows):
+        """
+        Appends the events bringing each rover to the state in its row.
+
+        Raises:
+            ConcurrentUpdateError: If other writers took the same sequence
+                numbers on every attempt
+        """
+        if not rows:
+            return
+        targets = {row["id"]: row for row in rows}
+        # Sem compare-and-swap: repete enquanto outro escritor tomar a mesma sequência
+        for _ in range(self._retries + 1):
+            if self.modify(targets, lambda models: [targets[model.id] for model in models]):
+                return
+        raise ConcurrentUpdateError(rows[0]["id"])
+
+    def _read_for_update(self, session, ids, lock: bool) -> list[RoverRow]:
+        """
+        Replays the rovers of `ids` for `modify`; with `lock`, their rows
+        are first locked (`SELECT ... FOR UPDATE`, in id order).
+        """
+        ids = sorted(set(ids))
+        connection = session.connection()
+        if lock:
+            for start in range(0, len(ids), _IDS_PER_QUERY):
+                connection.execute(_LOCK_ROWS, {"ids": ids[start:start + _IDS_PER_QUERY]})
+        return self._read_ids(connection, ids)
+
+    def _write_back(self, session, models, rows) -> bool:
+        """
+        Appends the rows as events, refreshing the snapshot of every rover
+        whose new sequence number is a multiple of `snapshot_interval`;
+        False if another writer appended to any of them meanwhile.
+        """
+        read = {model.id: model for model in models}
+        written = {values["id"]: values for values in rows}
+        events, snapshots = [], []
+        for id in sorted(written):
+            values, model = written[id], read[id]
+            x, y = values.get("x", model.x), values.get("y", model.y)
+            direction = values.get("direction", model.direction)
+            event = RoverEvent.between(
+                (model.x, model.y, _DIRECTIONS[model.direction]), (x, y, _DIRECTIONS[direction])
+            )
+            seq = model.version + 1
+            events.append({"rover_id": id, "seq": seq, **event._asdict()})
+            if seq % self._snapshot_interval == 0:
+                snapshots.append({"p_id": id, "p_x": x, "p_y": y, "p_direction": direction, "p_seq": seq})
+
+        connection = session.connection()
+        if events:
+            try:
+                connection.execute(insert(_events), events)
+            except IntegrityError:
+                return False
+        if snapshots:
+            connection.execute(_WRITE_SNAPSHOT, snapshots)
+        return True
+
+    def rebuild_snapshots(self, from_scratch: bool = False, batch_size: int = 10_000) -> int:
+        """
+        Folds the event log into the snapshots and returns how many were rewritten.
+
+        By default each snapshot absorbs the events after it. With
+        `from_scratch`, every rover is replayed over its whole history,
+        from (0, 0, NORTH) through its launch event, ignoring what the
+        snapshot held. Either way the log is summed by the database, one
+        `GROUP BY` per keyset page of `batch_size` rovers, and each page is
+        written back with one executemany in its own short transaction, so
+        the API can keep appending meanwhile.
+        """
+        after_id = ""
+        rebuilt = 0
+        while True:
+            with self.session_factory() as session:
+                connection = session.connection()
+                params = {"after_id": after_id, "limit": batch_size}
+                if from_scratch:
+                    page = connection.execute(_HISTORY_PAGE, params).all()
+                    if not page:
+                        return rebuilt
+                    after_id = page[-1][0]
+                    snapshots = []
+                    for rover_id, dx, dy, turns, seq in page:
+                        x, y, direction = RoverEvent(dx, dy, turns % 4).apply(0, 0, Direction.NORTH)
+                        snapshots.append(
+                            {"p_id": rover_id, "p_x": x, "p_y": y, "p_direction": direction.value, "p_seq": seq}
+                        )
+                else:
+                    page = [_replayed(row) for row in connection.execute(_REPLAY_NEXT_PAGE, params)]
+                    if not page:
+                        return rebuilt
+                    after_id = page[-1][0].id
+                    snapshots = [
+                        {"p_id": row.id, "p_x": row.x, "p_y": row.y, "p_direction": row.direction, "p_seq": row.version}
+                        for row, snapshot in page
+                        if row.version > snapshot
+                    ]
+                if snapshots:
+                    rebuilt += connection.execute(_WRITE_SNAPSHOT, snapshots).rowcount
+                session.commit()
+
+    def _rows(self, stmt, params: dict) -> list[RoverRow]:
+        with self.session_factory() as session:
+            return [row for row, _ in map(_replayed, session.connection().execute(stmt, params))]
+
+    def _read_ids(self, connection, ids: list[str]) -> list[RoverRow]:
+        rows = []
+        for start in range(0, len(ids), _IDS_PER_QUERY):
+            result = connection.execute(_REPLAY_BY_IDS, {"ids": ids[start:start + _IDS_PER_QUERY]})
+            rows.extend(row for row, _ in map(_replayed, result))
+        return rows
+
+
+def _replayed(row) -> tuple[RoverRow, int]:
+    """Applies the summed tail of a replay row to its snapshot; returns it with the snapshot's version."""
+    *columns, dx, dy, turns, seq = row
+    snapshot = RoverRow._make(columns)
+    if seq == snapshot.version:
+        return snapshot, snapshot.version
+    x, y, direction = RoverEvent(dx, dy, turns % 4).apply(snapshot.x, snapshot.y, _DIRECTIONS[snapshot.direction])
+    return snapshot._replace(x=x, y=y, direction=direction.value, version=seq), snapshot.version
+
+
+def _launch(values: dict) -> dict:
+    event = RoverEvent.launch(values.get("x", 0), values.get("y", 0), _DIRECTIONS[values.get("direction", "NORTH")])
+    return {"rover_id": values["id"], "seq": 0, **event._asdict()}
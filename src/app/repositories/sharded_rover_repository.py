@@ -0,0 +1,276 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from itertools import islice
+from operator import attrgetter, itemgetter
+from threading import Lock
+from typing import Callable, Iterable, Optional, Sequence
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app.infrastructure.hash_ring import HashRing
+from app.infrastructure.logger import Logger
+from app.infrastructure.models import PlateauModel, RoverEventModel, RoverModel
+from app.repositories.plateau_repository import PlateauRepository
+from app.repositories.rover_repository import RoverRepository
+
+# Sondas movidas por transação no rebalanceamento, abaixo do limite de parâmetros do SQLite
+_REBALANCE_BATCH = 500
+
+_rovers = RoverModel.__table__
+_plateaus = PlateauModel.__table__
+_events = RoverEventModel.__table__
+
+
+class ShardedRoverRepository:
+    """
+    Rover repository spread over several databases (shards), each one
+    behind its own RoverRepository.
+
+    Every rover lives on the shard its id hashes to on a consistent hash
+    ring, the shards being named by their position (so new ones must be
+    appended). Operations on one rover only touch its shard; `get_all`,
+    `get_by_plateau` and `get_page` query every shard in parallel and merge
+    the results, pages by id. A `modify` spanning several shards reads and
+    writes on all of them before committing any, so a lost compare-and-swap
+    on one shard writes nothing anywhere; only a failure of the commits
+    themselves can leave the shards apart, and it is logged.
+
+    Plateaus stay in the main database and are copied to a shard the first
+    time one of their rovers is created there.
+    """
+
+    def __init__(
+        self,
+        shards: Sequence[RoverRepository],
+        plateaus: PlateauRepository,
+        logger: Logger,
+        replicas: int = 64,
+    ) -> None:
+        self._shards = list(shards)
+        self._ring = HashRing([(f"shard-{index}", index) for index in range(len(self._shards))], replicas)
+        self._plateaus = plateaus
+        self._logger = logger
+        self._executor = ThreadPoolExecutor(max_workers=len(self._shards), thread_name_prefix="rover-shard")
+        # (shard, plateau) já copiados; protegido por `_lock`
+        self._copied_plateaus: set[tuple[int, str]] = set()
+        self._lock = Lock()
+
+    @property
+    def shards(self) -> list[RoverRepository]:
+        return list(self._shards)
+
+    def shard_of(self, id: str) -> int:
+        """Returns the position of the shard that owns rover `id`."""
+        return self._ring.get(id)
+
+    def get_by_id(self, id: str):
+        return self._shards[self.shard_of(id)].get_by_id(id)
+
+    def get_all(self):
+        return [model for models in self._fan_out(lambda shard: shard.get_all()) for model in models]
+
+    def get_by_plateau(self, plateau_id: str):
+        return [model for models in self._fan_out(lambda shard: shard.get_by_plateau(plateau_id)) for model in models]
+
+    def get_page(self, after_id: Optional[str], limit: int):
+        pages = self._fan_out(lambda shard: shard.get_page(after_id, limit))
+        return list(islice(heapq.merge(*pages, key=attrgetter("id")), limit))
+
+    def iter_states(self, batch_size: int = 10_000):
+        """Merges the id-ordered streams of every shard into one, in batches of `batch_size`."""
+        streams = [
+            (state for batch in shard.iter_states(batch_size) for state in batch)
+            for shard in self._shards
+        ]
+        merged = heapq.merge(*streams, key=itemgetter(0))
+        while batch := list(islice(merged, batch_size)):
+            yield batch
+
+    def get_many(self, ids):
+        groups = self._group(dict.fromkeys(ids), lambda id: id)
+        return [model for models in self._run(groups, lambda shard, ids: shard.get_many(ids)) for model in models]
+
+    def create(self, values):
+        index = self.shard_of(values["id"])
+        self._copy_plateaus(index, [values["plateau_id"]])
+        return self._shards[index].create(values)
+
+    def create_many(self, rows):
+        """
+        Inserts the rows on their shards in parallel, one transaction per
+        shard. If any shard fails, the rows already inserted on the others
+        are deleted before the error is raised.
+        """
+        if not rows:
+            return
+        groups = self._group(rows, itemgetter("id"))
+        for index, group in groups.items():
+            self._copy_plateaus(index, [row["plateau_id"] for row in group])
+        futures = {index: self._executor.submit(self._shards[index].create_many, group) for index, group in groups.items()}
+        failed = [index for index, future in futures.items() if future.exception() is not None]
+        if failed:
+            for index in futures.keys() - set(failed):
+                self._delete(self._shards[index], [row["id"] for row in groups[index]])
+            raise futures[failed[0]].exception()
+
+    def update(self, pk, values):
+        self._shards[self.shard_of(pk)].update(pk, values)
+
+    def update_many(self, rows):
+        self._run(self._group(rows, itemgetter("id")), lambda shard, rows: shard.update_many(rows))
+
+    def modify(self, ids, change, lock: bool = False) -> bool:
+        """
+        Same contract as `RoverRepository.modify`. When the rovers are on
+        one shard the call goes straight to it; otherwise one transaction is
+        opened per shard (in shard order, rows locked in id order on each,
+        so concurrent writers cannot deadlock), all of them are written,
+        and they are committed only if every shard accepted its rows.
+        """
+        groups = self._group(sorted(set(ids)), lambda id: id)
+        if len(groups) == 1:
+            (index, group), = groups.items()
+            return self._shards[index].modify(group, change, lock=lock)
+
+        indexes = sorted(groups)
+        with ExitStack() as stack:
+            sessions = {index: stack.enter_context(self._shards[index].session_factory(shared=True)) for index in indexes}
+            read = {
+                index: self._shards[index]._read_for_update(sessions[index], groups[index], lock)
+                for index in indexes
+            }
+            written = self._group(change([model for index in indexes for model in read[index]]), itemgetter("id"))
+
+            for index in indexes:
+                if not self._shards[index]._write_back(sessions[index], read[index], written.get(index, [])):
+                    for session in sessions.values():
+                        session.rollback()
+                    return False
+
+            for position, index in enumerate(indexes):
+                try:
+                    sessions[index].commit()
+                except Exception:
+                    if position:
+                        self._logger.exception(
+                            f"Commit failed on shard {index} after shards {indexes[:position]} committed"
+                        )
+                    raise
+            return True
+
+    def rebalance(self, drain: Sequence[RoverRepository] = (), batch_size: int = _REBALANCE_BATCH) -> int:
+        """
+        Moves every rover that is not on the shard owning it: the ones
+        left behind after shards were appended, and all the rovers of
+        `drain` (shards being removed). Returns how many were moved.
+
+        Each page of misplaced rovers is copied to its owners, together
+        with its plateaus and events, and only then deleted from where it
+        was; copies already present are skipped, so an interrupted run can
+        simply be repeated. Writes must be stopped meanwhile, or a rover
+        changed on its old shard after being copied loses that change.
+        """
+        moved = 0
+        sources = list(enumerate(self._shards)) + [(None, shard) for shard in drain]
+        for index, source in sources:
+            after_id = ""
+            while True:
+                with source.session_factory() as session:
+                    stmt = select(_rovers.c.id).where(_rovers.c.id > after_id).order_by(_rovers.c.id).limit(batch_size)
+                    ids = session.execute(stmt).scalars().all()
+                if not ids:
+                    break
+                after_id = ids[-1]
+                misplaced = [id for id in ids if self.shard_of(id) != index]
+                if misplaced:
+                    self._move(source, misplaced)
+                    moved += len(misplaced)
+        return moved
+
+    def _move(self, source: RoverRepository, ids: list[str]) -> None:
+        with source.session_factory() as session:
+            rovers = [dict(row._mapping) for row in session.execute(select(_rovers).where(_rovers.c.id.in_(ids)))]
+            events = [dict(row._mapping) for row in session.execute(select(_events).where(_events.c.rover_id.in_(ids)))]
+            plateau_ids = {rover["plateau_id"] for rover in rovers}
+            plateaus = {
+                row.id: dict(row._mapping)
+                for row in session.execute(select(_plateaus).where(_plateaus.c.id.in_(plateau_ids)))
+            }
+
+        for index, group in self._group(rovers, itemgetter("id")).items():
+            target = self._shards[index]
+            with target.session_factory() as session:
+                present = set(session.execute(
+                    select(_rovers.c.id).where(_rovers.c.id.in_([rover["id"] for rover in group]))
+                ).scalars())
+                copies = [rover for rover in group if rover["id"] not in present]
+                if copies:
+                    _insert_missing_plateaus(session, [plateaus[rover["plateau_id"]] for rover in copies])
+                    target._insert_rows(session, _rovers, copies)
+                    copied = {rover["id"] for rover in copies}
+                    history = [event for event in events if event["rover_id"] in copied]
+                    if history:
+                        target._insert_rows(session, _events, history)
+                session.commit()
+
+        self._delete(source, ids)
+
+    def _delete(self, shard: RoverRepository, ids: list[str]) -> None:
+        with shard.session_factory() as session:
+            session.execute(delete(_events).where(_events.c.rover_id.in_(ids)))
+            session.execute(delete(_rovers).where(_rovers.c.id.in_(ids)))
+            session.commit()
+
+    def _copy_plateaus(self, index: int, plateau_ids: Iterable[str]) -> None:
+        """Copies the plateaus of the main database missing from shard `index`."""
+        with self._lock:
+            missing = {id for id in plateau_ids if (index, id) not in self._copied_plateaus}
+        if not missing:
+            return
+        rows = []
+        for id in missing:
+            model = self._plateaus.get_by_id(id)
+            if model is not None:
+                rows.append({"id": model.id, "max_x": model.max_x, "max_y": model.max_y})
+        try:
+            with self._shards[index].session_factory() as session:
+                _insert_missing_plateaus(session, rows)
+                session.commit()
+        except IntegrityError:
+            # Outra instância copiou o mesmo planalto ao mesmo tempo
+            pass
+        with self._lock:
+            self._copied_plateaus.update((index, row["id"]) for row in rows)
+
+    def _group(self, items: Iterable, key: Callable) -> dict[int, list]:
+        """Splits `items` by the shard owning `key(item)`."""
+        groups: dict[int, list] = {}
+        for item in items:
+            groups.setdefault(self.shard_of(key(item)), []).append(item)
+        return groups
+
+    def _run(self, groups: dict[int, list], call: Callable) -> list:
+        """Runs `call(shard, items)` for each group, in parallel when there are several."""
+        if len(groups) == 1:
+            (index, items), = groups.items()
+            return [call(self._shards[index], items)]
+        futures = [self._executor.submit(call, self._shards[index], items) for index, items in groups.items()]
+        return [future.result() for future in futures]
+
+    def _fan_out(self, call: Callable) -> list:
+        """Runs `call(shard)` on every shard in parallel."""
+        return list(self._executor.map(call, self._shards))
+
+
+def _insert_missing_plateaus(session, rows: list[dict]) -> None:
+    rows = list({row["id"]: row for row in rows}.values())
+    if not rows:
+        return
+    present = set(session.execute(
+        select(_plateaus.c.id).where(_plateaus.c.id.in_([row["id"] for row in rows]))
+    ).scalars())
+    absent = [row for row in rows if row["id"] not in present]
+    if absent:
+        session.execute(insert(_plateaus), absent)
@@ -1,9 +1,16 @@
+import io
 from typing import Optional
-from sqlalchemy import select, update
+from sqlalchemy import bindparam, column, insert, select, update, values
 
 from app.infrastructure.postgres_database import Base
 from app.repositories.irepository import IRepository
 
+# A partir desta quantidade de linhas, o Postgres (psycopg2) recebe um COPY
+COPY_THRESHOLD = 1000
+
+# Linhas por UPDATE ... FROM (VALUES ...), abaixo do limite de parâmetros do Postgres
+_ROWS_PER_UPDATE = 5000
+
 
 class SqlRepository(IRepository):
     model = Base
@@ -26,15 +33,121 @@ class SqlRepository(IRepository):
             session.commit()
             return _model
 
+    def create_many(self, rows):
+        """
+        Inserts many rows in one transaction, with a single Core
+        executemany (no ORM objects are built), or a COPY when the database
+        is Postgres through psycopg2 and the batch is large.
+
+        Every row must have the same keys.
+        """
+        if not rows:
+            return
+        with self.session_factory() as session:
+            self._insert_rows(session, self.model.__table__, rows)
+            session.commit()
+
+    def _insert_rows(self, session, table, rows) -> None:
+        """Runs the bulk insert of `create_many` into `table`, in `session`."""
+        dialect = session.get_bind().dialect
+        if len(rows) >= COPY_THRESHOLD and (dialect.name, dialect.driver) == ("postgresql", "psycopg2"):
+            self._copy(session, table, rows)
+        else:
+            session.execute(insert(table), rows)
+
+    def _copy(self, session, table, rows) -> None:
+        """Streams the rows to the table through COPY FROM STDIN (text format)."""
+        columns = list(rows[0])
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(_copy_value(row[column]) for column in columns))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        cursor = session.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
     def update(self, pk, values):
         with self.session_factory() as session:
             session.execute(update(self.model).where(self.model.id == pk).values(**values))
             session.commit()
 
+    def update_many(self, rows):
+        """
+        Updates many rows, each one a dict holding the primary key `id`
+        and the new values, in one transaction.
+
+        On Postgres this is one `UPDATE ... FROM (VALUES ...)` per chunk of
+        rows; elsewhere, one executemany of the UPDATE by primary key.
+        Every row must have the same keys.
+        """
+        if not rows:
+            return
+        with self.session_factory() as session:
+            self._update_rows(session, rows)
+            session.commit()
+
+    def _update_rows(self, session, rows, versioned: bool = False) -> int:
+        """
+        Runs the bulk UPDATE of `update_many` in `session` and returns the
+        number of rows it matched.
+
+        With `versioned`, each row also holds the `version` it was read
+        with: only rows still on that version are updated (compare-and-swap)
+        and their version is incremented.
+        """
+        table = self.model.__table__
+        columns = list(rows[0])
+        changed = [name for name in columns if name not in ("id", "version")]
+        matched = 0
+
+        if session.get_bind().dialect.name == "postgresql":
+            for start in range(0, len(rows), _ROWS_PER_UPDATE):
+                data = values(
+                    *(column(name, table.c[name].type) for name in columns), name="v"
+                ).data([tuple(row[name] for name in columns) for row in rows[start:start + _ROWS_PER_UPDATE]])
+                stmt = (
+                    update(table)
+                    .where(table.c.id == data.c.id)
+                    .values({name: data.c[name] for name in changed})
+                )
+                if versioned:
+                    stmt = stmt.where(table.c.version == data.c.version).values(version=table.c.version + 1)
+                matched += session.execute(stmt).rowcount
+            return matched
+
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("p_id"))
+            .values({name: bindparam(f"p_{name}") for name in changed})
+        )
+        if versioned:
+            stmt = stmt.where(table.c.version == bindparam("p_version")).values(version=table.c.version + 1)
+        result = session.execute(stmt, [{f"p_{name}": row[name] for name in columns} for row in rows])
+        return result.rowcount
+
     def commit(self):
         with self.session_factory() as session:
             session.commit()
 
     def rollback(self):
         with self.session_factory() as session:
-            session.rollback()
\ No newline at end of file
+            session.rollback()
+
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def _copy_value(value) -> str:
+    """Formats a value for a text-format COPY; bytes use the bytea hex format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, (bytes, bytearray)):
+        return "\\\\x" + value.hex()
+    return str(value).translate(_COPY_ESCAPES)
@@ -0,0 +1,86 @@
+from sqlalchemy import func, select
+
+from app.infrastructure.models import TrajectoryModel
+from app.repositories.sql_repository import SqlRepository
+
+
+# Ids por consulta, abaixo do limite de parâmetros do SQLite
+_IDS_PER_QUERY = 500
+
+
+class TrajectoryRepository(SqlRepository):
+    model = TrajectoryModel
+
+    def get_first(self, rover_id: str):
+        with self.session_factory() as session:
+            stmt = (
+                select(self.model)
+                .where(self.model.rover_id == rover_id)
+                .order_by(self.model.first_point, self.model.id)
+                .limit(1)
+            )
+            return session.execute(stmt).scalar_one_or_none()
+
+    def get_last(self, rover_id: str):
+        with self.session_factory() as session:
+            stmt = (
+                select(self.model)
+                .where(self.model.rover_id == rover_id)
+                .order_by(self.model.first_point.desc(), self.model.id.desc())
+                .limit(1)
+            )
+            return session.execute(stmt).scalar_one_or_none()
+
+    def get_next_points(self, rover_ids):
+        """
+        Returns, for each probe with recorded batches, the index its next
+        batch starts at (first_point + points of the last one).
+        """
+        rover_ids = list(dict.fromkeys(rover_ids))
+        next_points = {}
+        with self.session_factory() as session:
+            for start in range(0, len(rover_ids), _IDS_PER_QUERY):
+                stmt = (
+                    select(self.model.rover_id, func.max(self.model.first_point + self.model.points))
+                    .where(self.model.rover_id.in_(rover_ids[start:start + _IDS_PER_QUERY]))
+                    .group_by(self.model.rover_id)
+                )
+                next_points.update({rover_id: point for rover_id, point in session.execute(stmt)})
+        return next_points
+
+    def get_range(self, rover_id: str, start: int, stop: int):
+        """Batches holding any of the path points in [start, stop)."""
+        with self.session_factory() as session:
+            stmt = (
+                select(self.model)
+                .where(
+                    self.model.rover_id == rover_id,
+                    self.model.first_point < stop,
+                    self.model.first_point + self.model.points > start,
+                )
+                .order_by(self.model.first_point, self.model.id)
+            )
+            return session.execute(stmt).scalars().all()
+
+    def get_page(self, rover_id: str, after_id: int, limit: int):
+        """Batches of the probe in recording order, keyset-paginated by id."""
+        with self.session_factory() as session:
+            stmt = (
+                select(self.model)
+                .where(self.model.rover_id == rover_id, self.model.id > after_id)
+                .order_by(self.model.id)
+                .limit(limit)
+            )
+            return session.execute(stmt).scalars().all()
+
+    def get_covering(self, rover_id: str, x: int, y: int):
+        """Batches whose bounding box contains (x, y)."""
+        with self.session_factory() as session:
+            stmt = select(self.model).where(
+                self.model.rover_id == rover_id,
+                self.model.min_x <= x,
+                self.model.max_x >= x,
+                self.model.min_y <= y,
+                self.model.max_y >= y,
+            )
+            return session.execute(stmt).scalars().all()
@@ -0,0 +1,211 @@
+from threading import Event, Lock, RLock, Thread
+from typing import Optional
+
+from app.infrastructure.logger import Logger
+from app.infrastructure.models import RoverModel
+from app.repositories.rover_repository import RoverRepository
+
+# Quantidade de locks entre os quais as sondas são distribuídas
+_STRIPES = 64
+
+# Colunas de estado gravadas a cada descarga
+_STATE_COLUMNS = ("x", "y", "direction")
+
+
+class WriteBehindRoverRepository:
+    """
+    Write-behind layer in front of a RoverRepository.
+
+    Probes touched by `get_by_id` or `modify` are kept in memory, and
+    `modify` only changes that copy and marks it dirty; dirty probes are
+    written to the database in one bulk update per flush. A background
+    thread flushes every `flush_interval` seconds (the staleness window)
+    or as soon as `max_dirty` probes are waiting, and `close` flushes
+    whatever is left. Reads always return the in-memory state.
+
+    Updates are serialized per probe by striped locks instead of row locks
+    or version checks, so this mode assumes a single API process owns the
+    probes. Inserts still go straight to the database.
+    """
+
+    def __init__(
+        self,
+        repository: RoverRepository,
+        logger: Logger,
+        flush_interval: float = 1.0,
+        max_dirty: int = 1000,
+        max_cached: int = 100_000,
+    ) -> None:
+        self._repository = repository
+        self._logger = logger
+        self._flush_interval = flush_interval
+        self._max_dirty = max_dirty
+        self._max_cached = max_cached
+        self._models: dict[str, RoverModel] = {}
+        self._dirty: set[str] = set()
+        # Protege apenas os dicionários acima; nunca é mantido durante I/O
+        self._lock = Lock()
+        self._stripes = [RLock() for _ in range(_STRIPES)]
+        self._flush_lock = Lock()
+        self._wake = Event()
+        self._closed = Event()
+        self._thread = Thread(target=self._run, name="rover-write-behind", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Number of dirty probes waiting to be flushed."""
+        with self._lock:
+            return len(self._dirty)
+
+    def get_by_id(self, id: str) -> Optional[RoverModel]:
+        with self._lock:
+            model = self._models.get(id)
+            if model is not None:
+                return _snapshot(model)
+        # Pelo `get_many`, que sempre devolve modelos do ORM (alteráveis em memória)
+        models = self._load([id])
+        if not models:
+            return None
+        with self._lock:
+            return _snapshot(models[0])
+
+    def get_all(self):
+        return self._overlay(self._repository.get_all())
+
+    def get_by_plateau(self, plateau_id: str):
+        return self._overlay(self._repository.get_by_plateau(plateau_id))
+
+    def get_page(self, after_id: Optional[str], limit: int):
+        return self._overlay(self._repository.get_page(after_id, limit))
+
+    def iter_states(self, batch_size: int = 10_000):
+        for batch in self._repository.iter_states(batch_size):
+            with self._lock:
+                batch = [
+                    (id, model.x, model.y, model.direction, plateau_id)
+                    if (model := self._models.get(id)) is not None
+                    else (id, x, y, direction, plateau_id)
+                    for id, x, y, direction, plateau_id in batch
+                ]
+            yield batch
+
+    def create(self, values):
+        return self._repository.create(values)
+
+    def create_many(self, rows):
+        self._repository.create_many(rows)
+
+    def modify(self, ids, change, lock: bool = False) -> bool:
+        """
+        Same contract as `RoverRepository.modify`, applied to the in-memory
+        state: the probes of `ids` are serialized by their stripe locks
+        instead of row locks, so `lock` is ignored and it never fails.
+        """
+        ids = sorted(set(ids))
+        stripes = sorted({hash(id) % _STRIPES for id in ids})
+        for stripe in stripes:
+            self._stripes[stripe].acquire()
+        try:
+            models = self._load(ids)
+            rows = change(models)
+            with self._lock:
+                for row in rows:
+                    model = self._models[row["id"]]
+                    for name in _STATE_COLUMNS:
+                        setattr(model, name, row[name])
+                    model.version += 1
+                    self._dirty.add(model.id)
+                if len(self._dirty) >= self._max_dirty:
+                    self._wake.set()
+        finally:
+            for stripe in reversed(stripes):
+                self._stripes[stripe].release()
+        return True
+
+    def flush(self) -> int:
+        """Writes every dirty probe to the database; returns how many were written."""
+        with self._flush_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                rows = [
+                    {"id": id, **{name: getattr(self._models[id], name) for name in _STATE_COLUMNS}}
+                    for id in dirty
+                ]
+            try:
+                self._repository.update_many(rows)
+            except Exception:
+                with self._lock:
+                    # Volta para a fila; alterações mais novas continuam valendo
+                    self._dirty |= dirty
+                raise
+            self._evict()
+            return len(rows)
+
+    def close(self) -> None:
+        """Stops the background thread and flushes the pending probes."""
+        self._closed.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+
+    def _load(self, ids: list[str]) -> list[RoverModel]:
+        """Returns the in-memory probes of `ids`, fetching the missing ones in one query."""
+        with self._lock:
+            missing = [id for id in ids if id not in self._models]
+        if missing:
+            fetched = self._repository.get_many(missing)
+            with self._lock:
+                for model in fetched:
+                    self._models.setdefault(model.id, model)
+        with self._lock:
+            return [self._models[id] for id in ids if id in self._models]
+
+    def _overlay(self, models):
+        with self._lock:
+            return [
+                _snapshot(self._models[model.id]) if model.id in self._models else model
+                for model in models
+            ]
+
+    def _evict(self) -> None:
+        """Drops clean probes from memory once the cache is over `max_cached`."""
+        with self._lock:
+            if len(self._models) <= self._max_cached:
+                return
+        # Todas as listras, em ordem, para não remover uma sonda em uso
+        for stripe in self._stripes:
+            stripe.acquire()
+        try:
+            with self._lock:
+                for id in [id for id in self._models if id not in self._dirty]:
+                    if len(self._models) <= self._max_cached:
+                        break
+                    del self._models[id]
+        finally:
+            for stripe in reversed(self._stripes):
+                stripe.release()
+
+    def _run(self) -> None:
+        while not self._closed.is_set():
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            if self._closed.is_set():
+                break
+            try:
+                self.flush()
+            except Exception:
+                self._logger.exception("Write-behind flush failed; probes kept for the next one")
+
+
+def _snapshot(model: RoverModel) -> RoverModel:
+    """Copies a probe so readers never see a half-applied update."""
+    return RoverModel(
+        id=model.id,
+        x=model.x,
+        y=model.y,
+        direction=model.direction,
+        plateau_id=model.plateau_id,
+        version=model.version,
+        plateau=model.plateau,
+    )
@@ -1,29 +1,111 @@
+from contextlib import ExitStack, nullcontext
+from itertools import islice
+from time import monotonic
+from typing import Iterator, Optional
 from uuid import uuid4
 
 from app.domain.direction import Direction
-from app.domain.plateau import Plateau
+from app.domain.plateau import Plateau, PlateauRegistry
+from app.domain.planner import MAX_EXPANSIONS, Plan, PlanCache, plan_path
 from app.domain.rover import Rover
-from app.domain.commands import validate_and_execute_commands
+from app.domain.command_cache import CommandCache
+from app.domain.coverage import CoverageMap, CoverageRegistry
+from app.domain.obstacles import ObstacleMap, ObstacleRegistry
+from app.domain.occupancy import OccupancyIndex, OccupancyRegistry
+from app.domain.trajectory import MAX_TRAJECTORY_RUNS, Trajectory, TrajectoryRecorder
+from app.domain.commands import (
+    CommandStream,
+    apply_envelope,
+    build_envelope,
+    compile_program,
+    execute_program,
+)
+from app.repositories.generation_repository import GenerationRepository
 from app.repositories.sql_repository import SqlRepository
-from app.infrastructure.exceptions import ProbeNotFoundError
+from app.infrastructure.exceptions import (
+    MarsRoverError,
+    CollisionError,
+    ConcurrentUpdateError,
+    InvalidCommandError,
+    ObstacleError,
+    OutOfBoundsError,
+    PlateauNotFoundError,
+    ProbeNotFoundError,
+    TrajectoryTooLongError,
+)
 from app.infrastructure.logger import Logger
 
+# Direção de cada valor gravado no banco, sem passar pela busca do Enum
+_DIRECTIONS = {direction.value: direction for direction in Direction}
+
+
+def _generation_name(plateau: Plateau) -> str:
+    """Name of the shared generation counter of the plateau."""
+    return f"plateau:{plateau.id}"
+
+
 class RoverService:
     """Service responsible for orchestrating probe operations."""
 
-    def __init__(self, rover_repository: SqlRepository, logger: Logger) -> None:
+    def __init__(
+        self,
+        rover_repository: SqlRepository,
+        plateau_repository: SqlRepository,
+        logger: Logger,
+        command_cache: Optional[CommandCache] = None,
+        occupancy_registry: Optional[OccupancyRegistry] = None,
+        plateau_registry: Optional[PlateauRegistry] = None,
+        trajectory_repository: Optional[SqlRepository] = None,
+        record_trajectories: bool = False,
+        trajectory_max_runs: int = MAX_TRAJECTORY_RUNS,
+        coverage_registry: Optional[CoverageRegistry] = None,
+        coverage_repository: Optional[SqlRepository] = None,
+        plan_cache: Optional[PlanCache] = None,
+        planner_max_expansions: int = MAX_EXPANSIONS,
+        obstacle_registry: Optional[ObstacleRegistry] = None,
+        obstacle_repository: Optional[SqlRepository] = None,
+        locking: str = "optimistic",
+        update_retries: int = 5,
+        generation_repository: Optional[GenerationRepository] = None,
+        registry_sync_interval: float = 1.0,
+    ) -> None:
+        if locking not in ("optimistic", "pessimistic"):
+            raise ValueError(f"Modo de concorrência desconhecido: {locking!r}")
         self._repository = rover_repository
+        self._plateau_repository = plateau_repository
+        self._plateaus = plateau_registry if plateau_registry is not None else PlateauRegistry()
         self._logger = logger
+        self._command_cache = command_cache
+        self._occupancy_registry = occupancy_registry
+        self._trajectory_repository = trajectory_repository
+        self._record_trajectories = record_trajectories and trajectory_repository is not None
+        self._trajectory_max_runs = trajectory_max_runs
+        self._coverage_registry = coverage_registry
+        self._coverage_repository = coverage_repository
+        self._plan_cache = plan_cache
+        self._planner_max_expansions = planner_max_expansions
+        self._obstacle_registry = obstacle_registry
+        self._obstacle_repository = obstacle_repository
+        self._row_locking = locking == "pessimistic"
+        self._update_retries = update_retries
+        self._generations = generation_repository
+        self._registry_sync_interval = registry_sync_interval
+        # Geração de cada planalto na última verificação, e até quando ela vale
+        self._synced: dict[str, tuple[int, float]] = {}
 
     def _to_domain(self, model) -> Rover:
-        """Converts the ORM model into a Rover entity."""
-        plateau = Plateau(max_x=model.plateau_max_x, max_y=model.plateau_max_y)
+        """Converts the ORM model (or a Core RoverRow) into a Rover entity."""
+        plateau = self._plateaus.get(model.plateau_id)
+        if plateau is None:
+            plateau = self._plateaus.intern(
+                model.plateau_id, model.plateau.max_x, model.plateau.max_y
+            )
         return Rover(
             id=model.id,
             plateau=plateau,
             x=model.x,
             y=model.y,
-            direction=Direction(model.direction),
+            direction=_DIRECTIONS[model.direction],
         )
 
     def _to_model(self, rover: Rover) -> dict:
@@ -33,13 +115,354 @@ class RoverService:
             "x": rover.x,
             "y": rover.y,
             "direction": rover.direction.value,
-            "plateau_max_x": rover.plateau.max_x,
-            "plateau_max_y": rover.plateau.max_y,
+            "plateau_id": rover.plateau.id,
+        }
+
+    @staticmethod
+    def _state_row(rover: Rover) -> dict:
+        """Returns the mutable state of a rover as an update row."""
+        return {
+            "id": rover.id,
+            "x": rover.x,
+            "y": rover.y,
+            "direction": rover.direction.value,
+        }
+
+    def _write_rovers(self, ids: list[str], change, discard=None):
+        """
+        Runs a read-modify-write of the probes in `ids` as one transaction.
+
+        `change(models, stack)` receives the probes as read and returns the
+        rows to write and a result. The locks it enters on `stack` are held
+        until the transaction ends and handed back still held, so the caller
+        can update in-memory state under them. Probes are read with
+        `SELECT ... FOR UPDATE` in pessimistic mode; in optimistic mode a
+        lost compare-and-swap makes `discard(result)` undo the attempt and
+        the whole read-modify-write is retried, up to `update_retries` times.
+
+        Returns:
+            The result of `change` and the stack holding its locks
+
+        Raises:
+            ConcurrentUpdateError: If every attempt lost the race
+        """
+        for _ in range(self._update_retries + 1):
+            with ExitStack() as stack:
+                attempt = []
+
+                def apply(models):
+                    rows, result = change(models, stack)
+                    attempt.append(result)
+                    return rows
+
+                try:
+                    written = self._repository.modify(ids, apply, lock=self._row_locking)
+                except Exception:
+                    if attempt and discard is not None:
+                        discard(attempt[0])
+                    raise
+                if written:
+                    return attempt[0], stack.pop_all()
+                if discard is not None:
+                    discard(attempt[0])
+        raise ConcurrentUpdateError(ids[0])
+
+    def _resolve_plateau(self, max_x: int, max_y: int) -> Plateau:
+        """Returns the shared plateau with the given dimensions, creating it if needed."""
+        model = self._plateau_repository.get_by_dimensions(max_x, max_y)
+        if model is None:
+            model = self._plateau_repository.create({
+                "id": str(uuid4()),
+                "max_x": max_x,
+                "max_y": max_y,
+            })
+        return self._plateaus.intern(model.id, model.max_x, model.max_y)
+
+    def _resolve_plateaus(
+        self, dimensions: list[tuple[int, int]]
+    ) -> tuple[dict[tuple[int, int], Plateau], set[Plateau]]:
+        """
+        Returns the shared plateau of each (max_x, max_y) pair, looking them
+        all up at once and creating the missing ones with one multi-row insert.
+
+        Returns:
+            The plateau of each pair, and the plateaus that were just created
+        """
+        models = self._plateau_repository.get_by_dimensions_many(dimensions)
+        missing = [
+            {"id": str(uuid4()), "max_x": max_x, "max_y": max_y}
+            for max_x, max_y in dict.fromkeys(dimensions)
+            if (max_x, max_y) not in models
+        ]
+        self._plateau_repository.create_many(missing)
+
+        plateaus = {
+            pair: self._plateaus.intern(model.id, model.max_x, model.max_y)
+            for pair, model in models.items()
+        }
+        created = set()
+        for row in missing:
+            plateau = self._plateaus.intern(row["id"], row["max_x"], row["max_y"])
+            plateaus[(row["max_x"], row["max_y"])] = plateau
+            created.add(plateau)
+        return plateaus, created
+
+    def _get_plateau(self, plateau_id: str) -> Plateau:
+        """Returns the interned plateau, loading it on first use."""
+        plateau = self._plateaus.get(plateau_id)
+        if plateau is None:
+            model = self._plateau_repository.get_by_id(plateau_id)
+            if model is None:
+                raise PlateauNotFoundError(plateau_id)
+            plateau = self._plateaus.intern(model.id, model.max_x, model.max_y)
+        return plateau
+
+    def _sync(self, plateau: Plateau) -> None:
+        """
+        Drops the in-memory state of the plateau (occupancy, obstacles and
+        coverage) when its shared generation moved since the last check,
+        i.e. some instance wrote to it, so it is reloaded from the database.
+        Checked at most once per `registry_sync_interval` seconds, which
+        bounds how stale a write from another instance can be.
+        """
+        if self._generations is None:
+            return
+        now = monotonic()
+        synced = self._synced.get(plateau.id)
+        if synced is not None and now < synced[1]:
+            return
+        generation = self._generations.current(_generation_name(plateau))
+        if synced is None or generation > synced[0]:
+            # Inclui as escritas desta instância: o estado recarregado já as contém
+            for registry in (self._occupancy_registry, self._obstacle_registry, self._coverage_registry):
+                if registry is not None:
+                    registry.discard(plateau)
+        self._synced[plateau.id] = (generation, now + self._registry_sync_interval)
+
+    def _published(self, plateaus) -> None:
+        """Bumps the shared generation of the written plateaus, for the other instances to reload them."""
+        if self._generations is None:
+            return
+        for plateau in plateaus:
+            try:
+                self._generations.bump(_generation_name(plateau))
+            except Exception:
+                self._logger.exception("Plateau generation bump failed; other instances keep their state until the next write")
+
+    def _occupancy(self, plateau: Plateau, fresh: bool = False) -> Optional[OccupancyIndex]:
+        """
+        Returns the occupancy index of the plateau, if collision checks are
+        enabled. A `fresh` plateau was just created, so nothing is loaded.
+        """
+        if self._occupancy_registry is None:
+            return None
+        if not fresh:
+            self._sync(plateau)
+        return self._occupancy_registry.get(
+            plateau,
+            (lambda: []) if fresh else (lambda: self._repository.get_by_plateau(plateau.id)),
+        )
+
+    def _obstacles(self, plateau: Plateau, fresh: bool = False) -> Optional[ObstacleMap]:
+        """Returns the obstacle map of the plateau, if obstacle checks are enabled."""
+        if self._obstacle_registry is None:
+            return None
+        if not fresh:
+            self._sync(plateau)
+        return self._obstacle_registry.get(
+            plateau,
+            (lambda: []) if fresh else (lambda: self._load_obstacles(plateau)),
+        )
+
+    def _load_obstacles(self, plateau: Plateau) -> list[tuple[int, int]]:
+        """Returns the persisted obstacles of the plateau."""
+        if self._obstacle_repository is None:
+            return []
+        return self._obstacle_repository.get_by_plateau(plateau.id)
+
+    def _attach(self, rover: Rover) -> Rover:
+        """Attaches the occupancy index and obstacle map of the rover's plateau."""
+        rover.occupancy = self._occupancy(rover.plateau)
+        rover.obstacles = self._obstacles(rover.plateau)
+        return rover
+
+    @staticmethod
+    def _locked(occupancy: Optional[OccupancyIndex]):
+        """Serializes check-then-commit sequences on the plateau of `occupancy`."""
+        return occupancy.lock if occupancy is not None else nullcontext()
+
+    def _coverage(self, plateau: Plateau, fresh: bool = False) -> Optional[CoverageMap]:
+        """Returns the coverage map of the plateau, if coverage tracking is enabled."""
+        if self._coverage_registry is None:
+            return None
+        if not fresh:
+            self._sync(plateau)
+        return self._coverage_registry.get(
+            plateau,
+            (lambda coverage: None) if fresh else (lambda coverage: self._load_coverage(coverage)),
+        )
+
+    def _load_coverage(self, coverage: CoverageMap) -> None:
+        """Fills a coverage map from its persisted tiles and the probes' current cells."""
+        plateau_id = coverage.plateau.id
+        if self._coverage_repository is not None:
+            for model in self._coverage_repository.get_by_plateau(plateau_id):
+                coverage.load_tile(model.tile_x, model.tile_y, model.data)
+        for model in self._repository.get_by_plateau(plateau_id):
+            coverage.mark_cell(model.x, model.y)
+
+    def _recorder(self, rover: Rover) -> Optional[TrajectoryRecorder]:
+        """Starts tracing a batch from the rover's state, if anything consumes it."""
+        if not self._record_trajectories and self._coverage_registry is None:
+            return None
+        return TrajectoryRecorder(rover.x, rover.y, rover.direction, self._trajectory_max_runs)
+
+    def _record(self, rover: Rover, recorder: Optional[TrajectoryRecorder]) -> None:
+        """Persists the traced batch and marks it on the plateau coverage."""
+        if recorder is None:
+            return
+
+        trajectory = recorder.finish()
+        if self._record_trajectories:
+            self._save_trajectory(rover.id, trajectory)
+
+        coverage = self._coverage(rover.plateau)
+        if coverage is not None:
+            with coverage.lock:
+                coverage.mark(trajectory)
+                tiles = coverage.pop_dirty()
+                if tiles and self._coverage_repository is not None:
+                    self._coverage_repository.save_tiles(rover.plateau.id, tiles)
+
+    def _record_many(
+        self,
+        recorded: list[tuple[Rover, Optional[TrajectoryRecorder]]],
+        next_points: Optional[dict[str, int]] = None,
+    ) -> None:
+        """
+        Persists the traced batches of many rovers with one insert and marks
+        them on the coverage of their plateaus.
+
+        `next_points` holds where the next batch of each rover starts (see
+        `TrajectoryRepository.get_next_points`); rovers missing from it are
+        new, and a rover listed twice gets its batches in order.
+        """
+        trajectories: list[tuple[Rover, Trajectory]] = []
+        for rover, recorder in recorded:
+            if recorder is None:
+                continue
+            trajectories.append((rover, recorder.finish()))
+        if not trajectories:
+            return
+
+        if self._record_trajectories:
+            next_points = dict(next_points or {})
+            rows = []
+            for rover, trajectory in trajectories:
+                first_point = next_points.get(rover.id, 1)
+                rows.append(self._trajectory_row(rover.id, first_point, trajectory))
+                next_points[rover.id] = first_point + trajectory.points
+            self._trajectory_repository.create_many(rows)
+
+        by_plateau: dict[Plateau, list[Trajectory]] = {}
+        for rover, trajectory in trajectories:
+            by_plateau.setdefault(rover.plateau, []).append(trajectory)
+        tiles: list[tuple[str, int, int, bytes]] = []
+        for plateau, marks in by_plateau.items():
+            coverage = self._coverage(plateau)
+            if coverage is None:
+                continue
+            with coverage.lock:
+                coverage.mark_many(marks)
+                tiles.extend((plateau.id, *tile) for tile in coverage.pop_dirty())
+        if tiles and self._coverage_repository is not None:
+            self._coverage_repository.save_tiles_many(tiles)
+
+    def _save_trajectory(self, rover_id: str, trajectory: Trajectory) -> None:
+        """Persists a batch after the rover's last one."""
+        last = self._trajectory_repository.get_last(rover_id)
+        first_point = last.first_point + last.points if last is not None else 1
+        self._trajectory_repository.create(self._trajectory_row(rover_id, first_point, trajectory))
+
+    @staticmethod
+    def _trajectory_row(rover_id: str, first_point: int, trajectory: Trajectory) -> dict:
+        """Converts a Trajectory into a payload compatible with the ORM model."""
+        return {
+            "rover_id": rover_id,
+            "first_point": first_point,
+            "points": trajectory.points,
+            "start_x": trajectory.start_x,
+            "start_y": trajectory.start_y,
+            "end_x": trajectory.end_x,
+            "end_y": trajectory.end_y,
+            "min_x": trajectory.min_x,
+            "max_x": trajectory.max_x,
+            "min_y": trajectory.min_y,
+            "max_y": trajectory.max_y,
+            "data": trajectory.data,
         }
 
+    @staticmethod
+    def _to_trajectory(model) -> Trajectory:
+        """Converts the ORM model into a Trajectory."""
+        return Trajectory(
+            start_x=model.start_x,
+            start_y=model.start_y,
+            end_x=model.end_x,
+            end_y=model.end_y,
+            min_x=model.min_x,
+            max_x=model.max_x,
+            min_y=model.min_y,
+            max_y=model.max_y,
+            points=model.points,
+            data=model.data,
+        )
+
+    def _execute(
+        self,
+        rover: Rover,
+        commands: str,
+        recorder: Optional[TrajectoryRecorder] = None,
+    ) -> None:
+        """
+        Runs commands on the rover atomically.
+
+        Programs with repeat blocks are evaluated by transform composition;
+        plain and compact sequences go through the command cache, when one
+        is configured. Accepted commands are then traced on `recorder`; if
+        the trace overflows, the rover is put back and the batch rejected,
+        so no batch is ever persisted without its path.
+
+        Raises:
+            TrajectoryTooLongError: If the recorder overflowed
+        """
+        start = (rover.x, rover.y, rover.direction)
+        if "(" in commands or ")" in commands:
+            program = compile_program(commands)
+            execute_program(rover, program)
+            if recorder is not None:
+                recorder.add_program(program)
+        else:
+            if self._command_cache is not None:
+                compiled, envelope = self._command_cache.get(commands, rover.direction)
+            else:
+                trajectory = build_envelope(commands)
+                compiled = trajectory.compiled
+                envelope = trajectory.for_direction(rover.direction)
+
+            apply_envelope(rover, compiled, envelope)
+            if recorder is not None:
+                recorder.add_runs(compiled.runs)
+
+        if recorder is not None and recorder.overflowed:
+            rover.x, rover.y, rover.direction = start
+            raise TrajectoryTooLongError(recorder.max_runs)
+
     def launch_probe(self, max_x: int, max_y: int, direction: Direction) -> Rover:
         """
         Launches a new probe on the plateau.
+
+        Probes launched with the same dimensions share the same plateau.
         
         Args:
             max_x: Maximum X coordinate of the plateau
@@ -47,9 +470,13 @@ class RoverService:
             direction: Initial direction of the probe
 
         Returns:
-            The created probe starting at (0, 0)
+            The created probe starting at (0, 0), which it may share with
+            probes launched before and not moved yet
+
+        Raises:
+            ObstacleError: If (0, 0) of the plateau holds an obstacle
         """
-        plateau = Plateau(max_x=max_x, max_y=max_y)
+        plateau = self._resolve_plateau(max_x, max_y)
         rover_id = str(uuid4())
 
         rover = Rover(
@@ -60,44 +487,413 @@ class RoverService:
             direction=direction,
         )
 
-        self._repository.create(self._to_model(rover))
+        obstacles = self._obstacles(plateau)
+        if obstacles is not None and obstacles.is_blocked(rover.x, rover.y):
+            raise ObstacleError(rover.x, rover.y)
+
+        occupancy = self._occupancy(plateau)
+        with self._locked(occupancy):
+            if occupancy is not None:
+                occupancy.place(rover.id, rover.x, rover.y, stack=True)
+            try:
+                self._repository.create(self._to_model(rover))
+            except Exception:
+                if occupancy is not None:
+                    occupancy.remove(rover.id)
+                raise
+            self._record(rover, self._recorder(rover))
+        self._published([plateau])
+
         return rover
 
+    def launch_probes(
+        self,
+        launches: list[tuple[int, int, Direction]],
+    ) -> list[tuple[Optional[Rover], Optional[MarsRoverError]]]:
+        """
+        Launches many probes at once, possibly on different plateaus.
+
+        Plateaus are resolved with a few bulk queries and every launched
+        probe is persisted with one multi-row insert (a COPY on Postgres),
+        in a single transaction. Launches follow the rules of
+        `launch_probe` in order, so probes sent to the same plateau all
+        share its (0, 0); only an obstacle there rejects them.
+
+        Args:
+            launches: (max_x, max_y, initial direction) of each probe
+
+        Returns:
+            One (rover, error) pair per entry, in order: the rover is None
+            and the error set when it could not be launched
+        """
+        plateaus, created = self._resolve_plateaus([(max_x, max_y) for max_x, max_y, _ in launches])
+
+        indexes: dict[Plateau, OccupancyIndex] = {}
+        blocked: dict[Plateau, Optional[ObstacleMap]] = {}
+        for plateau in sorted(set(plateaus.values()), key=lambda plateau: plateau.id):
+            # Planaltos recém-criados não têm nada persistido para carregar
+            fresh = plateau in created
+            # Carregado antes do lote, para não reler as sondas que ele vai inserir
+            self._coverage(plateau, fresh)
+            blocked[plateau] = self._obstacles(plateau, fresh)
+            occupancy = self._occupancy(plateau, fresh)
+            if occupancy is None:
+                # Sem índice compartilhado, o lote ainda enxerga as próprias sondas
+                occupancy = OccupancyIndex(plateau)
+                if not fresh:
+                    occupancy.load(self._repository.get_by_plateau(plateau.id))
+            indexes[plateau] = occupancy
+
+        outcomes: list[tuple[Optional[Rover], Optional[MarsRoverError]]] = []
+        launched: list[tuple[Rover, Optional[TrajectoryRecorder]]] = []
+
+        with ExitStack() as stack:
+            # Locks tomados sempre na mesma ordem (id do planalto)
+            for occupancy in indexes.values():
+                stack.enter_context(occupancy.lock)
+
+            for max_x, max_y, direction in launches:
+                plateau = plateaus[(max_x, max_y)]
+                rover = Rover(id=str(uuid4()), plateau=plateau, direction=direction)
+                obstacles = blocked[plateau]
+                try:
+                    if obstacles is not None and obstacles.is_blocked(rover.x, rover.y):
+                        raise ObstacleError(rover.x, rover.y)
+                    indexes[plateau].place(rover.id, rover.x, rover.y, stack=True)
+                except MarsRoverError as e:
+                    outcomes.append((None, e))
+                    continue
+                outcomes.append((rover, None))
+                launched.append((rover, self._recorder(rover)))
+
+            try:
+                self._repository.create_many([self._to_model(rover) for rover, _ in launched])
+            except Exception:
+                for rover, _ in launched:
+                    indexes[rover.plateau].remove(rover.id)
+                raise
+            self._record_many(launched)
+        self._published({rover.plateau for rover, _ in launched})
+
+        return outcomes
+
     def move_probe(self, rover_id: str, commands: str) -> Rover:
         """
         Executes movement commands on a probe atomically.
         
-        The sequence is validated before execution. If any command
+        The sequence is validated against the plateau through its
+        trajectory envelope before anything is applied. If any command
         fails (e.g., goes out of bounds), no movement is persisted.
+
+        The probe is read and written in one transaction. In pessimistic
+        mode its row is locked with `SELECT ... FOR UPDATE`; in optimistic
+        mode the write is a compare-and-swap on its version, and the whole
+        move is retried when another request updated the probe first.
         
         Args:
             rover_id: Probe ID
-            commands: Command string (M, L, R)
+            commands: Command string (M, L, R), in plain, compact or
+                program syntax
             
         Returns:
             The probe with an updated state
             
         Raises:
             ProbeNotFoundError: If the probe does not exist
-            InvalidCommandError: If an invalid command is found
+            InvalidCommandError: If an invalid command is found, or the path
+                is too long to record (TrajectoryTooLongError)
             OutOfBoundsError: If a movement goes out of bounds
+            CollisionError: If a movement runs into another probe
+            ObstacleError: If a movement runs into an obstacle
+            ConcurrentUpdateError: If the probe kept changing under the
+                update (optimistic mode)
         """
-        model = self._repository.get_by_id(rover_id)
-        
-        if model is None:
-            raise ProbeNotFoundError(rover_id)
+        def change(models, stack):
+            if not models:
+                return [], ProbeNotFoundError(rover_id)
+            rover = self._attach(self._to_domain(models[0]))
+            recorder = self._recorder(rover)
+            stack.enter_context(self._locked(rover.occupancy))
+            try:
+                self._execute(rover, commands, recorder)
+            except (InvalidCommandError, OutOfBoundsError, CollisionError, ObstacleError) as e:
+                return [], e
+            return [self._state_row(rover)], (rover, recorder)
 
-        rover = self._to_domain(model)
-        
-        validate_and_execute_commands(rover, commands)
-        
-        self._repository.update(rover_id, {
-            "x": rover.x,
-            "y": rover.y,
-            "direction": rover.direction.value,
-            "plateau_max_x": rover.plateau.max_x,
-            "plateau_max_y": rover.plateau.max_y,
-        })
+        result, locks = self._write_rovers([rover_id], change)
+        with locks:
+            if isinstance(result, MarsRoverError):
+                raise result
+            rover, recorder = result
+            if rover.occupancy is not None:
+                rover.occupancy.place(rover.id, rover.x, rover.y)
+            self._record(rover, recorder)
+        self._published([rover.plateau])
+
+        return rover
+
+    def move_probes(
+        self,
+        moves: list[tuple[str, str]],
+        atomic: bool = False,
+    ) -> tuple[bool, list[tuple[Optional[Rover], Optional[MarsRoverError]]]]:
+        """
+        Executes commands on many probes, in order.
+
+        Every probe is loaded with one query and run through the same
+        engines as `move_probe`, under the occupancy locks of their
+        plateaus, so each entry sees the moves made before it. The new
+        states are then written back with one bulk update, in the same
+        transaction as the read (see `move_probe` for the locking modes).
+
+        The commands of each entry are atomic, as in `move_probe`. By
+        default an entry that fails leaves its probe as it was while the
+        others are applied; with `atomic`, any failure (a missing probe
+        included) discards the whole batch.
+
+        Args:
+            moves: (probe ID, commands) pairs; a probe may appear more than once
+            atomic: Whether to apply all the moves or none of them
+
+        Returns:
+            Whether the moves were persisted, and one (rover, error) pair per
+            entry: the state of the probe after the entry (None if it does
+            not exist) and the error that rejected its commands, if any
+
+        Raises:
+            ConcurrentUpdateError: If the probes kept changing under the
+                update (optimistic mode)
+        """
+        def change(models, stack):
+            rovers = {model.id: self._attach(self._to_domain(model)) for model in models}
+            origins = {rover.id: (rover.x, rover.y, rover.direction) for rover in rovers.values()}
+            indexes = {rover.plateau: rover.occupancy for rover in rovers.values() if rover.occupancy is not None}
+            # Locks tomados sempre na mesma ordem (id do planalto)
+            for plateau in sorted(indexes, key=lambda plateau: plateau.id):
+                stack.enter_context(indexes[plateau].lock)
+
+            outcomes: list[tuple[Optional[Rover], Optional[MarsRoverError]]] = []
+            recorded: list[tuple[Rover, Optional[TrajectoryRecorder]]] = []
+            for rover_id, commands in moves:
+                rover = rovers.get(rover_id)
+                if rover is None:
+                    outcomes.append((None, ProbeNotFoundError(rover_id)))
+                    continue
+                recorder = self._recorder(rover)
+                error = None
+                try:
+                    self._execute(rover, commands, recorder)
+                    if rover.occupancy is not None:
+                        rover.occupancy.place(rover.id, rover.x, rover.y)
+                    recorded.append((rover, recorder))
+                except (InvalidCommandError, OutOfBoundsError, CollisionError, ObstacleError) as e:
+                    error = e
+                outcomes.append((
+                    Rover(id=rover.id, plateau=rover.plateau, x=rover.x, y=rover.y, direction=rover.direction),
+                    error,
+                ))
+
+            attempt = (rovers, origins, outcomes, recorded)
+            if atomic and any(error is not None for _, error in outcomes):
+                self._restore(attempt)
+                return [], (False, attempt)
+            rows = [
+                self._state_row(rover)
+                for rover in rovers.values()
+                if (rover.x, rover.y, rover.direction) != origins[rover.id]
+            ]
+            return rows, (True, attempt)
+
+        (applied, (_, _, outcomes, recorded)), locks = self._write_rovers(
+            [rover_id for rover_id, _ in moves],
+            change,
+            discard=lambda result: self._restore(result[1]),
+        )
+        with locks:
+            if applied:
+                next_points = None
+                if self._record_trajectories and recorded:
+                    next_points = self._trajectory_repository.get_next_points(rover.id for rover, _ in recorded)
+                self._record_many(recorded, next_points)
+        if applied:
+            self._published({rover.plateau for rover, _ in recorded})
+
+        return applied, outcomes
+
+    @staticmethod
+    def _restore(attempt) -> None:
+        """Puts the rovers moved by a discarded `move_probes` attempt back on their original cells."""
+        rovers, origins, _, _ = attempt
+        for rover in rovers.values():
+            x, y, _ = origins[rover.id]
+            if rover.occupancy is not None and (rover.x, rover.y) != (x, y):
+                rover.occupancy.place(rover.id, x, y)
+
+    def run_mission(
+        self,
+        max_x: int,
+        max_y: int,
+        rovers: list[tuple[Direction, str]],
+    ) -> tuple[Plateau, list[tuple[Optional[Rover], Optional[MarsRoverError]]]]:
+        """
+        Deploys rovers on a plateau one after another, each running its
+        commands before the next is deployed, so every rover sees the final
+        positions of the earlier ones (and of the probes already there).
+
+        The whole mission runs in memory, under the plateau's occupancy lock,
+        with the same compiled engines as `move_probe`. Each rover is
+        launched at (0, 0); one that cannot be deployed there is skipped,
+        and one whose commands fail stays where it was deployed. The final
+        states are then persisted with one multi-row insert.
+
+        Args:
+            max_x: Maximum X coordinate of the plateau
+            max_y: Maximum Y coordinate of the plateau
+            rovers: (initial direction, commands) of each rover, in order
+
+        Returns:
+            The plateau, and one (rover, error) pair per entry, in order:
+            the rover is None when it could not be deployed, and the error
+            is None when its commands were all applied
+        """
+        plateau = self._resolve_plateau(max_x, max_y)
+        obstacles = self._obstacles(plateau)
+        # Carregado antes da missão, para não reler as sondas que ela vai inserir
+        self._coverage(plateau)
+        occupancy = self._occupancy(plateau)
+        if occupancy is None:
+            # Sem índice compartilhado, a missão ainda enxerga as próprias sondas
+            occupancy = OccupancyIndex(plateau)
+            occupancy.load(self._repository.get_by_plateau(plateau.id))
+
+        outcomes: list[tuple[Optional[Rover], Optional[MarsRoverError]]] = []
+        recorded: list[tuple[Rover, Optional[TrajectoryRecorder]]] = []
+
+        with occupancy.lock:
+            for direction, commands in rovers:
+                rover = Rover(
+                    id=str(uuid4()),
+                    plateau=plateau,
+                    direction=direction,
+                    occupancy=occupancy,
+                    obstacles=obstacles,
+                )
+                try:
+                    if obstacles is not None and obstacles.is_blocked(rover.x, rover.y):
+                        raise ObstacleError(rover.x, rover.y)
+                    occupancy.place(rover.id, rover.x, rover.y)
+                except MarsRoverError as e:
+                    outcomes.append((None, e))
+                    continue
+
+                recorder = self._recorder(rover)
+                error = None
+                try:
+                    self._execute(rover, commands, recorder)
+                except (InvalidCommandError, OutOfBoundsError, CollisionError, ObstacleError) as e:
+                    # Execução atômica: a sonda fica onde foi lançada, e só o lançamento é gravado
+                    error = e
+                    recorder = self._recorder(rover)
+                occupancy.place(rover.id, rover.x, rover.y)
+                outcomes.append((rover, error))
+                recorded.append((rover, recorder))
+
+            try:
+                self._repository.create_many([self._to_model(rover) for rover, _ in recorded])
+            except Exception:
+                for rover, _ in recorded:
+                    occupancy.remove(rover.id)
+                raise
+            self._record_many(recorded)
+        self._published([plateau])
+
+        return plateau, outcomes
+
+    def plan_route(self, rover_id: str, x: int, y: int, execute: bool = False) -> tuple[Plan, Rover]:
+        """
+        Plans the shortest command sequence that takes a probe to (x, y),
+        avoiding obstacles and the other probes on its plateau, and
+        optionally runs it.
+
+        Plans are cached per plateau, start state, target and the versions
+        of the occupancy index and obstacle map, so they are recomputed
+        whenever a probe moves or obstacles are added.
+
+        Returns:
+            The plan and the probe (moved, when `execute` is set)
+
+        Raises:
+            ProbeNotFoundError: If the probe does not exist
+            OutOfBoundsError: If the target is outside the plateau
+            NoPathError: If no path to the target was found
+            CollisionError: If another probe blocked the plan before it ran
+        """
+        rover = self._attach(self.get_probe(rover_id))
+
+        with self._locked(rover.occupancy):
+            version = (
+                rover.occupancy.version if rover.occupancy is not None else 0,
+                rover.obstacles.version if rover.obstacles is not None else 0,
+            )
+            key = (rover.plateau, rover.x, rover.y, rover.direction, x, y, version)
+            planner = lambda: plan_path(rover, x, y, self._planner_max_expansions)
+            plan = self._plan_cache.get(key, planner) if self._plan_cache is not None else planner()
+
+        if execute and plan.runs:
+            rover = self.move_probe(rover_id, plan.compact)
+        return plan, rover
+
+    def open_command_stream(self, rover_id: str) -> CommandStream:
+        """
+        Starts a chunked command stream on a probe.
+
+        Chunks are fed to the returned stream as they arrive; nothing is
+        persisted until `commit_command_stream` is called.
+
+        Raises:
+            ProbeNotFoundError: If the probe does not exist
+        """
+        rover = self._attach(self.get_probe(rover_id))
+        return CommandStream(rover, recorder=self._recorder(rover))
+
+    def commit_command_stream(self, stream: CommandStream) -> Rover:
+        """
+        Finishes a command stream and persists the final state.
+
+        Raises:
+            InvalidCommandError: If an invalid command is found, or the path
+                is too long to record (TrajectoryTooLongError)
+            OutOfBoundsError: If a movement goes out of bounds
+            CollisionError: If a movement runs into another probe, or another
+                probe took the final cell while the stream was being read
+            ObstacleError: If a movement runs into an obstacle
+            ProbeNotFoundError: If the probe was deleted meanwhile
+            ConcurrentUpdateError: If the probe was moved by another
+                request while the stream was being read
+        """
+        occupancy = stream.rover.occupancy
+        start = (stream.rover.x, stream.rover.y, stream.rover.direction.value)
+        rover = stream.finish()
+
+        def change(models, stack):
+            stack.enter_context(self._locked(occupancy))
+            if not models:
+                return [], ProbeNotFoundError(rover.id)
+            if (models[0].x, models[0].y, models[0].direction) != start:
+                # Os comandos foram aplicados sobre um estado que já mudou
+                return [], ConcurrentUpdateError(rover.id)
+            if occupancy is not None and occupancy.is_occupied(rover.x, rover.y, rover.id):
+                return [], CollisionError(rover.x, rover.y)
+            return [self._state_row(rover)], None
+
+        error, locks = self._write_rovers([rover.id], change)
+        with locks:
+            if error is not None:
+                raise error
+            if occupancy is not None:
+                occupancy.place(rover.id, rover.x, rover.y)
+            self._record(rover, stream.recorder)
+        self._published([rover.plateau])
 
         return rover
 
@@ -106,6 +902,202 @@ class RoverService:
         models = self._repository.get_all()
         return [self._to_domain(model) for model in models]
 
+    def get_probes_page(self, after: Optional[str], limit: int) -> tuple[list[Rover], Optional[str]]:
+        """
+        Returns up to `limit` probes in id order after the probe `after`,
+        and the cursor of the next page (None on the last one).
+        """
+        return self._page(self._repository.get_page(after, limit + 1), limit)
+
+    def _page(self, models, limit: int) -> tuple[list[Rover], Optional[str]]:
+        rovers = [self._to_domain(model) for model in models[:limit]]
+        return rovers, rovers[-1].id if len(models) > limit else None
+
+    def iter_probe_states(self, chunk_size: int = 10_000) -> Iterator[list[tuple[str, int, int, str, str]]]:
+        """
+        Streams the (id, x, y, direction, plateau_id) of every probe in id
+        order, in chunks of up to `chunk_size`, without loading the fleet.
+        """
+        return self._repository.iter_states(chunk_size)
+
+    def get_plateau_probes(self, plateau_id: str) -> list[Rover]:
+        """
+        Returns the probes on a plateau.
+
+        Raises:
+            PlateauNotFoundError: If the plateau does not exist
+        """
+        self._get_plateau(plateau_id)
+        models = self._repository.get_by_plateau(plateau_id)
+        return [self._to_domain(model) for model in models]
+
+    def add_obstacles(self, plateau_id: str, cells: list[tuple[int, int]]) -> tuple[int, int]:
+        """
+        Adds obstacles to a plateau in bulk, atomically.
+
+        Cells that already hold an obstacle are ignored; the new ones are
+        persisted with a single insert and merged into the plateau's
+        per-row and per-column arrays.
+
+        Returns:
+            The number of obstacles added and the plateau's total
+
+        Raises:
+            PlateauNotFoundError: If the plateau does not exist
+            OutOfBoundsError: If a cell is outside the plateau
+            CollisionError: If a cell is taken by a probe
+        """
+        plateau = self._get_plateau(plateau_id)
+        obstacles = self._obstacles(plateau)
+        if obstacles is None:
+            obstacles = ObstacleMap(plateau)
+            obstacles.add_many(self._load_obstacles(plateau))
+        occupancy = self._occupancy(plateau)
+
+        with obstacles.lock, self._locked(occupancy):
+            new = []
+            seen = set()
+            for x, y in cells:
+                if not plateau.is_within_bounds(x, y):
+                    raise OutOfBoundsError(x, y, plateau.max_x, plateau.max_y)
+                if occupancy is not None and occupancy.is_occupied(x, y):
+                    raise CollisionError(x, y)
+                if (x, y) not in obstacles and (x, y) not in seen:
+                    seen.add((x, y))
+                    new.append((x, y))
+
+            if new and self._obstacle_repository is not None:
+                self._obstacle_repository.add_many(plateau_id, new)
+            obstacles.add_many(new)
+        if new:
+            self._published([plateau])
+        return len(new), len(obstacles)
+
+    def get_obstacles(self, plateau_id: str) -> list[tuple[int, int]]:
+        """
+        Returns the obstacles of a plateau, sorted by (x, y).
+
+        Raises:
+            PlateauNotFoundError: If the plateau does not exist
+        """
+        plateau = self._get_plateau(plateau_id)
+        obstacles = self._obstacles(plateau)
+        if obstacles is None:
+            return sorted(self._load_obstacles(plateau))
+        with obstacles.lock:
+            return sorted(obstacles.cells())
+
+    def get_probe_path(self, rover_id: str, offset: int, limit: int) -> tuple[list[tuple[int, int]], int]:
+        """
+        Returns a page of the cells the probe went through, in order.
+
+        Point 0 is where the recording started (the launch cell); only the
+        batches overlapping the page are fetched and decoded.
+
+        Returns:
+            The points of the page and the total number of points
+
+        Raises:
+            ProbeNotFoundError: If the probe does not exist
+        """
+        rover = self.get_probe(rover_id)
+        first = self._trajectory_repository.get_first(rover_id)
+        if first is None:
+            return [(rover.x, rover.y)][offset:offset + limit], 1
+
+        last = self._trajectory_repository.get_last(rover_id)
+        total = last.first_point + last.points
+
+        points: list[tuple[int, int]] = []
+        if offset == 0 and limit > 0:
+            points.append((first.start_x, first.start_y))
+
+        start = max(offset, 1)
+        for model in self._trajectory_repository.get_range(rover_id, start, offset + limit):
+            trajectory = self._to_trajectory(model)
+            skip = max(0, start - model.first_point)
+            points.extend(islice(trajectory.iter_points(skip), limit - len(points)))
+            if len(points) >= limit:
+                break
+
+        return points, total
+
+    def iter_probe_path(self, rover_id: str, chunk_size: int = 10_000) -> Iterator[list[tuple[int, int]]]:
+        """
+        Streams the whole path of the probe in chunks of up to `chunk_size`
+        points, fetching recorded batches a page at a time.
+
+        Raises:
+            ProbeNotFoundError: If the probe does not exist
+        """
+        rover = self.get_probe(rover_id)
+        return self._iter_path(rover, chunk_size)
+
+    def _iter_path(self, rover: Rover, chunk_size: int) -> Iterator[list[tuple[int, int]]]:
+        after_id = 0
+        started = False
+
+        while True:
+            models = self._trajectory_repository.get_page(rover.id, after_id, 100)
+            if not models:
+                break
+            for model in models:
+                trajectory = self._to_trajectory(model)
+                if not started:
+                    started = True
+                    yield [(trajectory.start_x, trajectory.start_y)]
+                points = trajectory.iter_points()
+                while chunk := list(islice(points, chunk_size)):
+                    yield chunk
+            after_id = models[-1].id
+
+        if not started:
+            yield [(rover.x, rover.y)]
+
+    def has_visited(self, rover_id: str, x: int, y: int) -> bool:
+        """
+        Checks whether the probe ever went through (x, y).
+
+        Only batches whose bounding box contains the cell are decoded, and
+        those are scanned one segment at a time.
+
+        Raises:
+            ProbeNotFoundError: If the probe does not exist
+        """
+        rover = self.get_probe(rover_id)
+        if (rover.x, rover.y) == (x, y):
+            return True
+        return any(
+            self._to_trajectory(model).visits(x, y)
+            for model in self._trajectory_repository.get_covering(rover_id, x, y)
+        )
+
+    def get_plateau_coverage(
+        self, plateau_id: str, width: int, height: int
+    ) -> tuple[int, int, list[list[float]]]:
+        """
+        Returns how much of a plateau has been explored.
+
+        Returns:
+            Visited cells, total cells and a downsampled map with `height`
+            rows of `width` visited fractions, lowest y first
+
+        Raises:
+            PlateauNotFoundError: If the plateau does not exist
+        """
+        plateau = self._get_plateau(plateau_id)
+        coverage = self._coverage(plateau)
+        if coverage is None:
+            coverage = CoverageMap(plateau)
+            self._load_coverage(coverage)
+
+        with coverage.lock:
+            return (
+                coverage.visited_cells,
+                coverage.total_cells,
+                coverage.downsample(width, height).tolist(),
+            )
+
     def get_probe(self, rover_id: str) -> Rover:
         """
         Fetches a probe by ID.
@@ -0,0 +1,73 @@
+"""
+Benchmark of the domain core: per-step cost and per-rover memory.
+
+Run from `src/`:
+
+    python -m benchmarks.bench_domain_core
+"""
+import timeit
+import tracemalloc
+
+from app.domain.commands import execute_commands
+from app.domain.direction import Direction
+from app.domain.plateau import Plateau
+from app.domain.rover import Rover
+
+STEPS = 200_000
+ROVERS = 100_000
+
+
+def per_step_ns() -> dict[str, float]:
+    """Measures the cost of single steps through the step-by-step interpreter."""
+    plateau = Plateau(max_x=10, max_y=10)
+    sequence = "MMMMMRRMMMMMLL" * (STEPS // 14)
+
+    rover = Rover(id="bench", plateau=plateau)
+    interpreter = min(timeit.repeat(
+        lambda: execute_commands(rover, sequence), number=1, repeat=5
+    )) / len(sequence)
+
+    rover = Rover(id="bench", plateau=plateau)
+    move = rover.move
+    turn_right = rover.turn_right
+
+    def walk() -> None:
+        for _ in range(STEPS // 2):
+            move()
+            turn_right()
+            turn_right()
+            move()
+            turn_right()
+            turn_right()
+
+    single = min(timeit.repeat(walk, number=1, repeat=5)) / (STEPS * 3)
+
+    return {"execute_commands": interpreter * 1e9, "move/turn": single * 1e9}
+
+
+def per_rover_bytes() -> float:
+    """Measures the memory held by each Rover (ids and plateau shared)."""
+    plateau = Plateau(max_x=10, max_y=10)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    rovers = [
+        Rover(id="bench", plateau=plateau, x=index % 10, y=index % 7, direction=Direction.EAST)
+        for index in range(ROVERS)
+    ]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del rovers
+    # Desconta a lista que guarda as referências (8 bytes por item)
+    return allocated / ROVERS - 8
+
+
+def main() -> None:
+    for name, value in per_step_ns().items():
+        print(f"{name:>18}: {value:8.1f} ns/step")
+    print(f"{'Rover':>18}: {per_rover_bytes():8.1f} bytes/rover")
+
+
+if __name__ == "__main__":
+    main()
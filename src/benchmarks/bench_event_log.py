@@ -0,0 +1,90 @@
+"""
+Event-sourced probe state: append throughput, replayed reads and the
+snapshot rebuild over a log of `PROBES * EVENTS` events.
+
+The log is seeded straight into a file SQLite database (random moves,
+no snapshots taken), then folded into the snapshots incrementally and
+from scratch; the replayed listing is timed before and after the fold.
+
+Run from `src/`:
+
+    python -m benchmarks.bench_event_log
+"""
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert
+
+from app.infrastructure.logger import Logger
+from app.infrastructure.models import PlateauModel, RoverEventModel
+from app.infrastructure.postgres_database import PostgresDatabase
+from app.repositories.rover_repository import EventSourcedRoverRepository
+
+PROBES = 10_000
+EVENTS = 100
+APPENDS = 2_000
+BATCH = 50_000
+
+
+def seed(database: PostgresDatabase, repository: EventSourcedRoverRepository) -> list[str]:
+    ids = [f"{index:08d}" for index in range(PROBES)]
+    with database.session() as session:
+        session.execute(insert(PlateauModel), [{"id": "bench", "max_x": 1_000_000, "max_y": 1_000_000}])
+    repository.create_many([
+        {"id": id, "x": 500_000, "y": 500_000, "direction": "NORTH", "plateau_id": "bench"} for id in ids
+    ])
+
+    generator = random.Random(1)
+    rows = (
+        {"rover_id": id, "seq": seq, "dx": generator.randint(-3, 3), "dy": generator.randint(-3, 3),
+         "turns": generator.randrange(4)}
+        for seq in range(1, EVENTS + 1)
+        for id in ids
+    )
+    while batch := [row for _, row in zip(range(BATCH), rows)]:
+        with database.session() as session:
+            session.execute(insert(RoverEventModel), batch)
+    return ids
+
+
+def timed(label: str, function):
+    started = time.perf_counter()
+    result = function()
+    print(f"{label:<28} {time.perf_counter() - started:8.3f} s")
+    return result
+
+
+def run(path: Path) -> None:
+    database = PostgresDatabase(f"sqlite:///{path}", Logger(name="bench"))
+    database.create_database()
+    repository = EventSourcedRoverRepository(database.session, Logger(name="bench"), snapshot_interval=EVENTS)
+    ids = timed(f"seed {PROBES * EVENTS:,} events", lambda: seed(database, repository))
+
+    timed("listing, tails of 100", repository.get_all)
+    timed("rebuild (incremental)", repository.rebuild_snapshots)
+    timed("listing, no tails", repository.get_all)
+    timed("rebuild (from scratch)", lambda: repository.rebuild_snapshots(from_scratch=True))
+
+    generator = random.Random(2)
+
+    def append() -> None:
+        for _ in range(APPENDS):
+            id = generator.choice(ids)
+            repository.modify([id], lambda models: [{"id": id, "x": models[0].x + 1}])
+
+    timed(f"{APPENDS} single appends", append)
+    timed(f"one append of {PROBES}", lambda: repository.modify(
+        ids, lambda models: [{"id": model.id, "y": model.y + 1} for model in models]
+    ))
+    database.close()
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        run(Path(directory) / "bench.db")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark of collision checks with 100k probes on one plateau.
+
+Compares the occupancy index (dense bitmap and sparse hash) against
+scanning every probe, for single-step and run-level checks.
+
+Run from `src/`:
+
+    python -m benchmarks.bench_occupancy
+"""
+import random
+import timeit
+
+from app.domain.occupancy import OccupancyIndex
+from app.domain.plateau import Plateau
+from app.domain.rover import Rover
+
+ROVERS = 100_000
+LOOKUPS = 10_000
+
+
+def build(plateau: Plateau, dense_cell_limit: int) -> tuple[OccupancyIndex, list[Rover]]:
+    generator = random.Random(1)
+    index = OccupancyIndex(plateau, dense_cell_limit=dense_cell_limit)
+    rovers = []
+    while len(rovers) < ROVERS:
+        x = generator.randint(0, plateau.max_x)
+        y = generator.randint(0, plateau.max_y)
+        if not index.is_occupied(x, y):
+            rover_id = str(len(rovers))
+            index.place(rover_id, x, y)
+            rovers.append(Rover(id=rover_id, plateau=plateau, x=x, y=y))
+    return index, rovers
+
+
+def main() -> None:
+    generator = random.Random(2)
+
+    for name, plateau, dense_cell_limit in (
+        ("dense 1000x1000", Plateau(max_x=999, max_y=999), 1 << 24),
+        ("sparse 100000x100000", Plateau(max_x=99_999, max_y=99_999), 0),
+    ):
+        index, rovers = build(plateau, dense_cell_limit)
+        cells = [
+            (generator.randint(0, plateau.max_x), generator.randint(0, plateau.max_y))
+            for _ in range(LOOKUPS)
+        ]
+
+        indexed = min(timeit.repeat(
+            lambda: [index.is_occupied(x, y, "probe") for x, y in cells], number=1, repeat=5
+        )) / LOOKUPS
+        scan_cells = cells[:20]
+        scanned = min(timeit.repeat(
+            lambda: [any(r.x == x and r.y == y for r in rovers) for x, y in scan_cells],
+            number=1,
+            repeat=3,
+        )) / len(scan_cells)
+        run = min(timeit.repeat(
+            lambda: [index.first_collision("probe", x, 0, 0, 1, plateau.max_y) for x, _ in cells[:20]],
+            number=1,
+            repeat=3,
+        )) / 20
+
+        print(f"{name}:")
+        print(f"  index lookup   {indexed * 1e9:12.1f} ns/step")
+        print(f"  full scan      {scanned * 1e9:12.1f} ns/step")
+        print(f"  run check      {run * 1e6:12.1f} us/run of {plateau.max_y} steps")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Write and listing throughput of the hash-sharded probe repository for
+1, 2 and 4 shards, each a file SQLite database (one writer at a time per
+file, like a single Postgres primary under heavy write load).
+
+`THREADS` threads run single-probe read-modify-writes on random probes;
+the listing is one fan-out `get_all`.
+
+Run from `src/`:
+
+    python -m benchmarks.bench_sharding
+"""
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from sqlalchemy import insert
+
+from app.infrastructure.logger import Logger
+from app.infrastructure.models import PlateauModel
+from app.infrastructure.postgres_database import PostgresDatabase
+from app.repositories.plateau_repository import PlateauRepository
+from app.repositories.rover_repository import CoreRoverRepository
+from app.repositories.sharded_rover_repository import ShardedRoverRepository
+
+PROBES = 20_000
+WRITES = 4_000
+THREADS = 16
+SHARDS = (1, 2, 4)
+
+
+def build(directory: Path, shards: int) -> ShardedRoverRepository:
+    logger = Logger(name="bench")
+    main = PostgresDatabase(f"sqlite:///{directory / 'main.db'}", logger)
+    main.create_database()
+    with main.session() as session:
+        session.execute(insert(PlateauModel), [{"id": "bench", "max_x": 1_000_000, "max_y": 10}])
+
+    repositories = []
+    for index in range(shards):
+        database = PostgresDatabase(f"sqlite:///{directory / f'shard{index}.db'}", logger)
+        database.create_database()
+        repositories.append(CoreRoverRepository(database.session, logger))
+    repository = ShardedRoverRepository(repositories, PlateauRepository(main.session, logger), logger)
+    repository.create_many([
+        {"id": f"{index:08d}", "x": index, "y": 0, "direction": "NORTH", "plateau_id": "bench"}
+        for index in range(PROBES)
+    ])
+    return repository
+
+
+def run(directory: Path, shards: int) -> None:
+    repository = build(directory, shards)
+    generator = random.Random(1)
+    targets = [f"{generator.randrange(PROBES):08d}" for _ in range(WRITES)]
+
+    def write(id: str) -> None:
+        while not repository.modify([id], lambda models: [{"id": id, "y": models[0].y + 1}]):
+            pass
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        list(executor.map(write, targets))
+    writes = WRITES / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    assert len(repository.get_all()) == PROBES
+    listing = time.perf_counter() - started
+    print(f"{shards} shard(s): {writes:8.0f} writes/s   get_all {listing * 1000:7.1f} ms")
+
+
+def main() -> None:
+    for shards in SHARDS:
+        with tempfile.TemporaryDirectory() as directory:
+            run(Path(directory), shards)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,39 +5,50 @@ The tests use in-memory SQLite for isolation and speed.
 """
 import pytest
 from contextlib import contextmanager
+from contextvars import ContextVar
 from dependency_injector import providers
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session, Session
+from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 
 from main import create_app
+from app.config import Config
 from app.containers import Container
 from app.infrastructure.postgres_database import Base
 from app.infrastructure.idatabase import IDatabase
 from app.infrastructure.logger import Logger
-from app.repositories.rover_repository import RoverRepository
+from app.repositories.generation_repository import GenerationRepository
+from app.repositories.plateau_repository import PlateauRepository
+from app.repositories.read_through_repository import ReadThroughRepository
+from app.repositories.rover_repository import CoreRoverRepository, EventSourcedRoverRepository, RoverRepository
+from app.repositories.sharded_rover_repository import ShardedRoverRepository
+from app.repositories.write_behind_repository import WriteBehindRoverRepository
 # Importar modelos para registrá-los no Base.metadata
-from app.infrastructure.models import RoverModel  # noqa: F401
+from app.infrastructure.models import CacheGenerationModel, CoverageTileModel, ObstacleModel, PlateauModel, RoverEventModel, RoverModel, TrajectoryModel  # noqa: F401
+
+# Mesmo caminho de leitura que o container usa
+ROVER_REPOSITORY = CoreRoverRepository if Config.SQL_CORE_READS else RoverRepository
 
 
 class SQLiteTestDatabase(IDatabase):
     """SQLite database implementation for tests."""
     
-    def __init__(self, logger: Logger):
+    def __init__(self, logger: Logger, url: str = "sqlite:///:memory:"):
+        # Em memória, todas as sessões compartilham a mesma conexão; em
+        # arquivo, cada thread usa a sua, como no Postgres
         self._engine = create_engine(
-            "sqlite:///:memory:",
+            url,
             echo=False,
-            connect_args={"check_same_thread": False},
-            poolclass=StaticPool,
+            connect_args={"check_same_thread": False, "timeout": 30},
+            poolclass=StaticPool if url.endswith(":memory:") else None,
         )
-        self._session_factory = scoped_session(
-            sessionmaker(
-                bind=self._engine,
-                expire_on_commit=False,
-                class_=Session,
-            )
+        self._session_factory = sessionmaker(
+            bind=self._engine,
+            expire_on_commit=False,
+            class_=Session,
         )
+        self._shared = ContextVar("shared_session", default=None)
         self._logger = logger
         Base.metadata.create_all(bind=self._engine)
 
@@ -49,8 +60,14 @@ class SQLiteTestDatabase(IDatabase):
         self._engine.dispose()
 
     @contextmanager
-    def session(self):
+    def session(self, shared: bool = False):
+        # Chamada aninhada em uma sessão `shared`: participa da transação externa, como no Postgres
+        joined = self._shared.get()
+        if joined is not None:
+            yield joined
+            return
         session: Session = self._session_factory()
+        token = self._shared.set(session) if shared else None
         try:
             yield session
             session.commit()
@@ -59,8 +76,9 @@ class SQLiteTestDatabase(IDatabase):
             session.rollback()
             raise
         finally:
+            if token is not None:
+                self._shared.reset(token)
             session.close()
-            self._session_factory.remove()
 
 
 @pytest.fixture(scope="function")
@@ -80,6 +98,110 @@ def test_db():
 @pytest.fixture
 def client(test_db):
     """Creates a test client wired to the test database."""
+    return _create_client(test_db)
+
+
+@pytest.fixture
+def file_client(tmp_path):
+    """
+    Creates a test client on a file SQLite database, with one connection
+    per thread, for tests that run requests in parallel.
+    """
+    db = SQLiteTestDatabase(logger=Logger(name="test_logger"), url=f"sqlite:///{tmp_path / 'test.db'}")
+
+    yield _create_client(db)
+
+    db.close()
+
+
+@pytest.fixture
+def write_behind_client(test_db):
+    """
+    Creates a test client whose probe state goes through the write-behind
+    layer. Flushes only happen when the test triggers them.
+    """
+    client = _create_client(test_db)
+    store = WriteBehindRoverRepository(
+        repository=RoverRepository(session_factory=test_db.session, logger=Logger(name="test_logger")),
+        logger=Logger(name="test_logger"),
+        flush_interval=3600,
+        max_dirty=1_000_000,
+    )
+    client.app.container.rover_repository.override(providers.Object(store))
+
+    yield client
+
+    store.close()
+
+
+@pytest.fixture
+def read_cache_client(test_db):
+    """Creates a test client whose probe reads go through the read-through cache."""
+    client = _create_client(test_db)
+    test_logger = Logger(name="test_logger")
+    cache = ReadThroughRepository(
+        repository=RoverRepository(session_factory=test_db.session, logger=test_logger),
+        generations=GenerationRepository(session_factory=test_db.session, logger=test_logger),
+        logger=test_logger,
+    )
+    client.app.container.rover_cache.override(providers.Object(cache))
+    client.app.container.rover_repository.override(providers.Object(cache))
+
+    return client
+
+
+@pytest.fixture
+def event_client(test_db):
+    """
+    Creates a test client whose probe state is event-sourced, with a
+    snapshot every 3 events.
+    """
+    client = _create_client(test_db)
+    client.app.container.rover_repository.override(
+        providers.Singleton(
+            EventSourcedRoverRepository,
+            session_factory=test_db.session,
+            logger=Logger(name="test_logger"),
+            snapshot_interval=3,
+        )
+    )
+
+    return client
+
+
+@pytest.fixture
+def shard_databases(tmp_path):
+    """Three file SQLite databases standing in for the rover shards."""
+    databases = [
+        SQLiteTestDatabase(logger=Logger(name="test_logger"), url=f"sqlite:///{tmp_path / f'shard{index}.db'}")
+        for index in range(3)
+    ]
+
+    yield databases
+
+    for database in databases:
+        database.close()
+
+
+@pytest.fixture
+def sharded_client(test_db, shard_databases):
+    """
+    Creates a test client whose probes are hash-sharded over the shard
+    databases; plateaus and everything else stay in the test database.
+    """
+    client = _create_client(test_db)
+    test_logger = Logger(name="test_logger")
+    repository = ShardedRoverRepository(
+        shards=[ROVER_REPOSITORY(session_factory=database.session, logger=test_logger) for database in shard_databases],
+        plateaus=PlateauRepository(session_factory=test_db.session, logger=test_logger),
+        logger=test_logger,
+    )
+    client.app.container.rover_repository.override(providers.Object(repository))
+
+    return client
+
+
+def _create_client(test_db):
     app = create_app()
     
     test_logger = Logger(name="test_logger")
@@ -90,11 +212,16 @@ def client(test_db):
 
     app.container.rover_repository.override(
         providers.Singleton(
-            RoverRepository,
+            ROVER_REPOSITORY,
             session_factory=test_db.session,
             logger=test_logger,
         )
     )
+    # Recursos opcionais, desligados por padrão, ligados para serem exercitados pelos testes
+    app.container.rover_service.add_kwargs(
+        record_trajectories=True,
+        coverage_registry=app.container.coverage_registry,
+    )
     
     return TestClient(app)
 
@@ -110,7 +237,7 @@ def container(test_db):
     
     container.rover_repository.override(
         providers.Singleton(
-            RoverRepository,
+            ROVER_REPOSITORY,
             session_factory=test_db.session,
             logger=test_logger,
         )
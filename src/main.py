@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 import uvicorn
 
@@ -5,6 +7,14 @@ from app.config import Config
 from app.containers import Container
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if Config.WRITE_BEHIND:
+        # Grava as sondas pendentes antes de encerrar
+        app.container.rover_store().close()
+
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Mars Rover API",
@@ -12,7 +22,8 @@ def create_app() -> FastAPI:
         version="1.0.0",
         openapi_url="/openapi.json",
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        lifespan=lifespan,
     )
 
     container = Container()
@@ -21,6 +32,9 @@ def create_app() -> FastAPI:
     from app.endpoints.rover import controllers as rover_module
     rover_module.configure(app)
 
+    from app.endpoints.plateau import controllers as plateau_module
+    plateau_module.configure(app)
+
     from app.endpoints.health import controllers as health_module
     health_module.configure(app)
 
@@ -0,0 +1,42 @@
+"""
+Moves the probes that are not on the shard owning them, after SHARD_URLS changed.
+
+Run from `src/`, with the new SHARD_URLS and no API instance writing:
+
+    python rebalance_shards.py                          # after appending shards
+    python rebalance_shards.py --drain URL [URL ...]    # also empties removed shards
+"""
+import argparse
+import time
+
+from app.config import Config
+from app.containers import Container, create_rover_shards
+from app.repositories.sharded_rover_repository import ShardedRoverRepository
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Move as sondas para o shard dono de cada uma")
+    parser.add_argument(
+        "--drain",
+        nargs="+",
+        default=[],
+        metavar="URL",
+        help="shards removidos de SHARD_URLS, cujas sondas são todas movidas",
+    )
+    parser.add_argument("--batch-size", type=int, default=500, help="sondas por transação")
+    args = parser.parse_args(argv)
+    if not Config.SHARD_URLS:
+        parser.error("SHARD_URLS não está configurada")
+
+    container = Container()
+    repository = container.rover_repository()
+    if not isinstance(repository, ShardedRoverRepository):
+        parser.error("o repositório de sondas configurado não é particionado")
+    drain = create_rover_shards(args.drain, container.logger())
+    started = time.perf_counter()
+    moved = repository.rebalance(drain=drain, batch_size=args.batch_size)
+    print(f"{moved} sondas movidas em {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
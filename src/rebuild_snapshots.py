@@ -0,0 +1,39 @@
+"""
+Rebuilds the probe snapshots (the `rovers` rows) from the rover_events log.
+
+Run from `src/`, with the same DATABASE_URL as the API:
+
+    python rebuild_snapshots.py                  # folds the events past each snapshot
+    python rebuild_snapshots.py --from-scratch   # replays every probe from its launch
+"""
+import argparse
+import time
+
+from app.config import Config
+from app.containers import Container
+from app.repositories.rover_repository import EventSourcedRoverRepository
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Reconstrói os snapshots das sondas a partir do log de eventos")
+    parser.add_argument(
+        "--from-scratch",
+        action="store_true",
+        help="reproduz todo o histórico de cada sonda, ignorando o snapshot atual",
+    )
+    parser.add_argument("--batch-size", type=int, default=10_000, help="sondas por transação")
+    args = parser.parse_args(argv)
+
+    container = Container()
+    repository = EventSourcedRoverRepository(
+        session_factory=container.postgres_database().session,
+        logger=container.logger(),
+        snapshot_interval=Config.EVENT_SNAPSHOT_INTERVAL,
+    )
+    started = time.perf_counter()
+    rebuilt = repository.rebuild_snapshots(from_scratch=args.from_scratch, batch_size=args.batch_size)
+    print(f"{rebuilt} snapshots reconstruídos em {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,31 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from uuid import UUID
+
+import pytest
+from dependency_injector import providers
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.domain.coverage import CoverageMap, CoverageRegistry
+from app.domain.obstacles import ObstacleRegistry
+from app.domain.occupancy import OccupancyRegistry
+from app.domain.plateau import Plateau
+from app.infrastructure.exceptions import ConcurrentUpdateError
+from app.infrastructure.hash_ring import HashRing
+from app.infrastructure.logger import Logger
+from app.infrastructure.models import RoverEventModel, RoverModel
+from app.repositories.coverage_repository import CoverageRepository
+from app.repositories.generation_repository import GenerationRepository
+from app.repositories.plateau_repository import PlateauRepository
+from app.repositories.read_through_repository import ReadThroughRepository
+from app.repositories.sharded_rover_repository import ShardedRoverRepository
+from app.repositories.rover_repository import CoreRoverRepository, EventSourcedRoverRepository, RoverRepository
+from app.repositories.write_behind_repository import WriteBehindRoverRepository
+
+
 class TestLaunchProbe:
     """Tests for the POST /probes endpoint."""
 
@@ -42,6 +70,67 @@ class TestLaunchProbe:
         assert response.status_code == 422
 
 
+class TestLaunchProbes:
+    """Tests for the POST /probes/batch endpoint."""
+
+    def test_launches_on_each_plateau_and_returns_ids(self, client):
+        response = client.post("/probes/batch", json={"probes": [
+            {"x": 5, "y": 5, "direction": "NORTH"},
+            {"x": 7, "y": 3, "direction": "EAST"},
+            {"x": 5, "y": 5, "direction": "SOUTH"},
+        ]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["launched"] == 3
+        assert [result["status"] for result in data["results"]] == ["OK", "OK", "OK"]
+        assert data["ids"] == [result["probe"]["id"] for result in data["results"]]
+
+        probes = {probe["id"]: probe for probe in client.get("/probes").json()["probes"]}
+        assert set(probes) == set(data["ids"])
+        assert probes[data["ids"][1]]["direction"] == "EAST"
+        assert probes[data["ids"][0]]["plateau_id"] != probes[data["ids"][1]]["plateau_id"]
+        assert probes[data["ids"][0]]["plateau_id"] == probes[data["ids"][2]]["plateau_id"]
+
+    def test_launches_a_batch_on_the_same_plateau(self, client):
+        data = client.post("/probes/batch", json={"probes": [
+            {"x": 5, "y": 5, "direction": direction}
+            for direction in ("NORTH", "EAST", "SOUTH", "WEST", "NORTH")
+        ]}).json()
+        assert data["launched"] == 5
+        assert [result["status"] for result in data["results"]] == ["OK"] * 5
+        assert len({result["probe"]["plateau_id"] for result in data["results"]}) == 1
+
+        # Cada sonda deixa a origem por conta própria; a última a sair a libera
+        first, second = data["ids"][:2]
+        assert client.put(f"/probes/{first}/commands", json={"commands": "M"}).status_code == 200
+        assert client.put(f"/probes/{second}/commands", json={"commands": "LM"}).status_code == 409
+        assert client.put(f"/probes/{second}/commands", json={"commands": "M"}).status_code == 200
+
+    def test_reuses_existing_plateaus_and_their_state(self, client):
+        moved = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        client.put(f"/probes/{moved['id']}/commands", json={"commands": "M"})
+        client.post(f"/plateaus/{moved['plateau_id']}/obstacles", json={"obstacles": [{"x": 0, "y": 0}]})
+        parked = client.post("/probes", json={"x": 3, "y": 3, "direction": "NORTH"}).json()
+
+        data = client.post("/probes/batch", json={"probes": [
+            {"x": 5, "y": 5, "direction": "EAST"},
+            {"x": 3, "y": 3, "direction": "EAST"},
+            {"x": 4, "y": 4, "direction": "EAST"},
+        ]}).json()
+        assert [result["status"] for result in data["results"]] == ["OBSTACLE", "OK", "OK"]
+        assert "(0, 0)" in data["results"][0]["detail"]
+
+        client.put(f"/probes/{parked['id']}/commands", json={"commands": "M"})
+        data = client.post("/probes/batch", json={"probes": [{"x": 3, "y": 3, "direction": "EAST"}]}).json()
+        assert data["results"][0]["probe"]["plateau_id"] == parked["plateau_id"]
+        response = client.put(f"/probes/{data['ids'][0]}/commands", json={"commands": "LM"})
+        assert response.status_code == 409
+
+    def test_empty_batch_is_rejected(self, client):
+        response = client.post("/probes/batch", json={"probes": []})
+        assert response.status_code == 422
+
+
 class TestMoveProbe:
     """Tests for the PUT /probes/{id}/commands endpoint."""
 
@@ -112,6 +201,722 @@ class TestMoveProbe:
         )
         assert response.status_code == 400
 
+    def test_move_probe_with_compact_commands(self, client):
+        launch_response = client.post(
+            "/probes",
+            json={"x": 5, "y": 5, "direction": "NORTH"},
+        )
+        probe_id = launch_response.json()["id"]
+
+        response = client.put(
+            f"/probes/{probe_id}/commands",
+            json={"commands": "M2R1M3"},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["x"] == 3
+        assert data["y"] == 2
+        assert data["direction"] == "EAST"
+
+    def test_move_probe_with_repeat_blocks(self, client):
+        launch_response = client.post(
+            "/probes",
+            json={"x": 5, "y": 5, "direction": "NORTH"},
+        )
+        probe_id = launch_response.json()["id"]
+
+        response = client.put(
+            f"/probes/{probe_id}/commands",
+            json={"commands": "(MR(M)2L)2"},
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["x"] == 4
+        assert data["y"] == 2
+        assert data["direction"] == "NORTH"
+
+    def test_move_probe_with_oversized_count_returns_400(self, client):
+        probe_id = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()["id"]
+
+        response = client.put(f"/probes/{probe_id}/commands", json={"commands": "M" + "9" * 5000})
+        assert response.status_code == 400
+
+    def test_move_probe_with_too_long_compact_commands_returns_422(self, client):
+        probe_id = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()["id"]
+
+        response = client.put(f"/probes/{probe_id}/commands", json={"commands": "M1" * 5_001})
+        assert response.status_code == 422
+
+    def test_move_probe_with_long_plain_commands(self, client):
+        probe_id = client.post("/probes", json={"x": 5, "y": 20_000, "direction": "NORTH"}).json()["id"]
+
+        response = client.put(f"/probes/{probe_id}/commands", json={"commands": "M" * 15_000})
+        assert response.status_code == 200
+        assert response.json()["y"] == 15_000
+
+    def test_move_probe_with_unbalanced_block_returns_400(self, client):
+        launch_response = client.post(
+            "/probes",
+            json={"x": 5, "y": 5, "direction": "NORTH"},
+        )
+        probe_id = launch_response.json()["id"]
+
+        response = client.put(
+            f"/probes/{probe_id}/commands",
+            json={"commands": "(MR"},
+        )
+        assert response.status_code == 400
+
+
+class TestMoveProbes:
+    """Tests for the PUT /probes/commands endpoint."""
+
+    def _launch(self, client, x):
+        return client.post("/probes", json={"x": x, "y": 5, "direction": "NORTH"}).json()
+
+    def _state(self, client, probe_id):
+        return next(probe for probe in client.get("/probes").json()["probes"] if probe["id"] == probe_id)
+
+    def test_moves_are_applied_in_order_with_per_probe_outcomes(self, client):
+        first, second = self._launch(client, 5), self._launch(client, 6)
+
+        response = client.put("/probes/commands", json={"moves": [
+            {"probe_id": first["id"], "commands": "MM"},
+            {"probe_id": second["id"], "commands": "M9"},
+            {"probe_id": "nonexistent", "commands": "M"},
+            {"probe_id": first["id"], "commands": "RM"},
+            {"probe_id": second["id"], "commands": "RM3"},
+        ]})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["applied"] is True
+        assert [result["status"] for result in data["results"]] == [
+            "OK", "OUT_OF_BOUNDS", "NOT_FOUND", "OK", "OK",
+        ]
+        assert data["succeeded"] == 3
+        assert (data["results"][0]["probe"]["x"], data["results"][0]["probe"]["y"]) == (0, 2)
+        assert (data["results"][1]["probe"]["x"], data["results"][1]["probe"]["y"]) == (0, 0)
+        assert data["results"][2]["probe"] is None
+
+        state = self._state(client, first["id"])
+        assert (state["x"], state["y"], state["direction"]) == (1, 2, "EAST")
+        state = self._state(client, second["id"])
+        assert (state["x"], state["y"], state["direction"]) == (3, 0, "EAST")
+        assert client.get(f"/probes/{first['id']}/path").json()["total"] == 4
+
+    def test_later_moves_see_earlier_ones(self, client):
+        first = self._launch(client, 5)
+        client.put(f"/probes/{first['id']}/commands", json={"commands": "M"})
+        second = self._launch(client, 5)
+
+        data = client.put("/probes/commands", json={"moves": [
+            {"probe_id": first["id"], "commands": "RM"},
+            {"probe_id": second["id"], "commands": "MRM"},
+        ]}).json()
+        assert [result["status"] for result in data["results"]] == ["OK", "COLLISION"]
+        assert "(1, 1)" in data["results"][1]["detail"]
+
+    def test_atomic_batch_is_discarded_on_any_failure(self, client):
+        first = self._launch(client, 5)
+        client.put(f"/probes/{first['id']}/commands", json={"commands": "M"})
+        second = self._launch(client, 5)
+
+        data = client.put("/probes/commands", json={"atomic": True, "moves": [
+            {"probe_id": first["id"], "commands": "M3"},
+            {"probe_id": second["id"], "commands": "LM"},
+        ]}).json()
+        assert data["applied"] is False
+        assert [result["status"] for result in data["results"]] == ["OK", "OUT_OF_BOUNDS"]
+
+        state = self._state(client, first["id"])
+        assert (state["x"], state["y"]) == (0, 1)
+        # A posição original continua reservada no índice de ocupação
+        response = client.put(f"/probes/{second['id']}/commands", json={"commands": "M"})
+        assert response.status_code == 409
+
+        data = client.put("/probes/commands", json={"atomic": True, "moves": [
+            {"probe_id": first["id"], "commands": "M3"},
+            {"probe_id": second["id"], "commands": "RM"},
+        ]}).json()
+        assert data["applied"] is True
+        state = self._state(client, second["id"])
+        assert (state["x"], state["y"]) == (1, 0)
+
+    def test_empty_batch_is_rejected(self, client):
+        response = client.put("/probes/commands", json={"moves": []})
+        assert response.status_code == 422
+
+
+class TestConcurrentMoves:
+    """Tests for parallel PUT /probes/{id}/commands on the same probe."""
+
+    def test_parallel_moves_lose_no_updates(self, file_client):
+        probe = file_client.post("/probes", json={"x": 5, "y": 200, "direction": "NORTH"}).json()
+
+        def move(_):
+            return file_client.put(f"/probes/{probe['id']}/commands", json={"commands": "M"}).status_code
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            codes = list(executor.map(move, range(80)))
+
+        assert set(codes) <= {200, 409}
+        moved = codes.count(200)
+        assert moved > 0
+        state = file_client.get("/probes").json()["probes"][0]
+        assert (state["x"], state["y"]) == (0, moved)
+        assert file_client.get(f"/probes/{probe['id']}/path").json()["total"] == moved + 1
+
+
+    def test_reads_nested_in_modify_keep_its_transaction(self, client):
+        probe_id = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()["id"]
+        repository = client.app.container.rover_repository()
+        commits = []
+
+        def count(session):
+            commits.append(session)
+
+        def change(models):
+            # Como os carregadores de ocupação e obstáculos dentro de `_write_rovers`
+            assert [model.id for model in repository.get_by_plateau(models[0].plateau_id)] == [probe_id]
+            assert commits == []
+            return [{"id": probe_id, "y": 1}]
+
+        event.listen(Session, "after_commit", count)
+        try:
+            assert repository.modify([probe_id], change, lock=True)
+        finally:
+            event.remove(Session, "after_commit", count)
+        assert commits
+        assert client.get("/probes").json()["probes"][0]["y"] == 1
+
+    def test_streams_resumed_on_another_thread_leave_no_session_behind(self, client, test_db):
+        for _ in range(3):
+            client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"})
+        repository = client.app.container.rover_repository()
+
+        # Como no StreamingResponse de `GET /probes/stream`, que avança o gerador no threadpool:
+        # aberto nesta thread, consumido e fechado em outra
+        chunks = repository.iter_states(1)
+        states = [next(chunks)]
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while (chunk := executor.submit(next, chunks, None).result()) is not None:
+                states.append(chunk)
+        assert len(states) == 3
+
+        sessions = []
+        for _ in range(2):
+            with test_db.session() as session:
+                sessions.append(session)
+        assert sessions[0] is not sessions[1]
+        probe_id = states[0][0][0]
+        assert client.put(f"/probes/{probe_id}/commands", json={"commands": "M"}).status_code == 200
+
+
+class TestWriteBehind:
+    """Tests for the write-behind layer in front of the probe repository."""
+
+    def _stored(self, client, probe_id):
+        store = client.app.container.rover_repository()
+        return store._repository.get_by_id(probe_id)
+
+    def test_reads_see_memory_and_flush_writes_in_batch(self, write_behind_client):
+        client = write_behind_client
+        store = client.app.container.rover_repository()
+        first = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        second = client.post("/probes", json={"x": 6, "y": 5, "direction": "NORTH"}).json()
+
+        client.put(f"/probes/{first['id']}/commands", json={"commands": "MM"})
+        client.put(f"/probes/{first['id']}/commands", json={"commands": "RM"})
+        client.put(f"/probes/{second['id']}/commands", json={"commands": "M"})
+
+        states = {probe["id"]: probe for probe in client.get("/probes").json()["probes"]}
+        assert (states[first["id"]]["x"], states[first["id"]]["y"], states[first["id"]]["direction"]) == (1, 2, "EAST")
+        assert (self._stored(client, first["id"]).x, self._stored(client, first["id"]).y) == (0, 0)
+        assert store.pending == 2
+
+        assert store.flush() == 2
+        stored = self._stored(client, first["id"])
+        assert (stored.x, stored.y, stored.direction) == (1, 2, "EAST")
+        assert self._stored(client, second["id"]).y == 1
+        assert store.pending == 0
+
+    def test_collisions_use_the_in_memory_state(self, write_behind_client):
+        client = write_behind_client
+        first = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        client.put(f"/probes/{first['id']}/commands", json={"commands": "M"})
+        second = client.post("/probes", json={"x": 5, "y": 5, "direction": "EAST"}).json()
+
+        response = client.put(f"/probes/{second['id']}/commands", json={"commands": "LM"})
+        assert response.status_code == 409
+
+    def test_flushes_once_enough_probes_are_dirty(self, client):
+        ids = [client.post("/probes", json={"x": x, "y": 5, "direction": "NORTH"}).json()["id"] for x in (5, 6)]
+        repository = client.app.container.rover_repository()
+        store = WriteBehindRoverRepository(repository, Logger(name="test_logger"), flush_interval=3600, max_dirty=2)
+
+        def north(models):
+            return [{"id": model.id, "x": model.x, "y": model.y + 1, "direction": model.direction} for model in models]
+
+        store.modify(ids[:1], north)
+        time.sleep(0.1)
+        assert store.pending == 1
+        store.modify(ids, north)
+        deadline = time.monotonic() + 5
+        while store.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        store.close()
+        assert [repository.get_by_id(id).y for id in ids] == [2, 1]
+
+    def test_paged_and_streamed_listings_see_memory(self, write_behind_client):
+        client = write_behind_client
+        probe = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        client.put(f"/probes/{probe['id']}/commands", json={"commands": "MM"})
+
+        assert client.get("/probes", params={"limit": 1}).json()["probes"][0]["y"] == 2
+        assert json.loads(client.get("/probes/stream").text)["y"] == 2
+
+    def test_close_flushes_pending_probes(self, write_behind_client):
+        client = write_behind_client
+        store = client.app.container.rover_repository()
+        probe = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        client.put(f"/probes/{probe['id']}/commands", json={"commands": "M3"})
+
+        store.close()
+        assert self._stored(client, probe["id"]).y == 3
+
+
+class TestReadCache:
+    """Tests for the read-through cache in front of the probe repository."""
+
+    def _states(self, client):
+        return {probe["id"]: (probe["x"], probe["y"]) for probe in client.get("/probes").json()["probes"]}
+
+    def test_listing_is_served_from_the_snapshot_until_a_write(self, read_cache_client):
+        client = read_cache_client
+        probe = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+
+        self._states(client)
+        self._states(client)
+        stats = client.get("/health/read-cache").json()
+        assert (stats["snapshot_misses"], stats["snapshot_hits"]) == (1, 1)
+
+        client.put(f"/probes/{probe['id']}/commands", json={"commands": "MM"})
+        assert self._states(client)[probe["id"]] == (0, 2)
+        assert client.get("/health/read-cache").json()["snapshot_misses"] == 2
+
+    def test_write_drops_only_the_probes_it_touched(self, read_cache_client):
+        client = read_cache_client
+        cache = client.app.container.rover_repository()
+        first = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()["id"]
+        client.put(f"/probes/{first}/commands", json={"commands": "M"})
+        ids = [first, client.post("/probes", json={"x": 5, "y": 5, "direction": "EAST"}).json()["id"]]
+        for id in ids:
+            cache.get_by_id(id)
+
+        client.put(f"/probes/{ids[0]}/commands", json={"commands": "M"})
+        assert cache.get_by_id(ids[1]) is not None
+        assert cache.get_by_id(ids[0]).y == 2
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["invalidations"]) == (1, 3, 0)
+
+    def test_writes_from_another_instance_invalidate_the_cache(self, read_cache_client, test_db):
+        client = read_cache_client
+        probe = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        assert self._states(client)[probe["id"]] == (0, 0)
+
+        logger = Logger(name="test_logger")
+        other = ReadThroughRepository(
+            RoverRepository(session_factory=test_db.session, logger=logger),
+            GenerationRepository(session_factory=test_db.session, logger=logger),
+            logger,
+        )
+        other.update(probe["id"], {"y": 4})
+
+        assert self._states(client)[probe["id"]] == (0, 4)
+        assert client.get("/health/read-cache").json()["invalidations"] == 1
+
+    def test_entries_expire_after_the_ttl(self, client, test_db):
+        probe_id = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()["id"]
+        logger = Logger(name="test_logger")
+        cache = ReadThroughRepository(
+            RoverRepository(session_factory=test_db.session, logger=logger),
+            GenerationRepository(session_factory=test_db.session, logger=logger),
+            logger,
+            ttl=0.05,
+        )
+
+        cache.get_by_id(probe_id)
+        cache.get_by_id(probe_id)
+        time.sleep(0.1)
+        cache.get_by_id(probe_id)
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 2, 1)
+
+
+class TestCoreReads:
+    """Tests for the Core read path of the probe repository."""
+
+    def _state(self, model):
+        return (
+            model.id, model.x, model.y, model.direction, model.plateau_id, model.version,
+            model.plateau.max_x, model.plateau.max_y,
+        )
+
+    def test_rows_match_the_orm_models(self, client, test_db):
+        first = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        client.put(f"/probes/{first['id']}/commands", json={"commands": "MMR"})
+        second = client.post("/probes", json={"x": 3, "y": 4, "direction": "WEST"}).json()
+        logger = Logger(name="test_logger")
+        orm = RoverRepository(session_factory=test_db.session, logger=logger)
+        core = CoreRoverRepository(session_factory=test_db.session, logger=logger)
+
+        assert self._state(core.get_by_id(first["id"])) == self._state(orm.get_by_id(first["id"]))
+        assert core.get_by_id("missing") is None
+        assert sorted(map(self._state, core.get_all())) == sorted(map(self._state, orm.get_all()))
+        assert list(map(self._state, core.get_page(None, 1))) == list(map(self._state, orm.get_page(None, 1)))
+        after = min(first["id"], second["id"])
+        assert list(map(self._state, core.get_page(after, 5))) == list(map(self._state, orm.get_page(after, 5)))
+        plateau_id = second["plateau_id"]
+        assert list(map(self._state, core.get_by_plateau(plateau_id))) == list(map(self._state, orm.get_by_plateau(plateau_id)))
+
+
+class TestEventSourcing:
+    """Tests for the event-sourced probe repository."""
+
+    def _snapshot(self, test_db, probe_id):
+        with test_db.session() as session:
+            model = session.get(RoverModel, probe_id)
+            return model.x, model.y, model.direction, model.version
+
+    def _events(self, test_db, probe_id):
+        with test_db.session() as session:
+            events = session.query(RoverEventModel).filter_by(rover_id=probe_id).order_by(RoverEventModel.seq)
+            return [(event.seq, event.dx, event.dy, event.turns) for event in events]
+
+    def test_reads_replay_the_events_past_the_snapshot(self, event_client, test_db):
+        client = event_client
+        probe = client.post("/probes", json={"x": 5, "y": 5, "direction": "EAST"}).json()
+        client.put(f"/probes/{probe['id']}/commands", json={"commands": "MM"})
+        client.put(f"/probes/{probe['id']}/commands", json={"commands": "LM"})
+
+        assert self._events(test_db, probe["id"]) == [(0, 0, 0, 1), (1, 2, 0, 0), (2, 0, 1, 3)]
+        assert self._snapshot(test_db, probe["id"]) == (0, 0, "EAST", 0)
+        state = client.get("/probes").json()["probes"][0]
+        assert (state["x"], state["y"], state["direction"]) == (2, 1, "NORTH")
+        assert client.app.container.rover_repository().get_by_id(probe["id"]).version == 2
+
+    def test_snapshot_is_refreshed_every_interval(self, event_client, test_db):
+        client = event_client
+        probe = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        for _ in range(4):
+            client.put(f"/probes/{probe['id']}/commands", json={"commands": "M"})
+
+        assert self._snapshot(test_db, probe["id"]) == (0, 3, "NORTH", 3)
+        assert client.app.container.rover_repository().get_by_id(probe["id"]).y == 4
+
+    def test_batch_moves_append_one_event_per_probe(self, event_client, test_db):
+        client = event_client
+        first = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        client.put(f"/probes/{first['id']}/commands", json={"commands": "M"})
+        second = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+
+        client.put("/probes/commands", json={"moves": [
+            {"probe_id": first["id"], "commands": "M"},
+            {"probe_id": second["id"], "commands": "RM"},
+            {"probe_id": first["id"], "commands": "M"},
+        ]})
+
+        assert self._events(test_db, first["id"])[-1] == (2, 0, 2, 0)
+        assert self._events(test_db, second["id"])[-1] == (1, 1, 0, 1)
+
+    def test_conflicting_append_fails_the_write(self, file_client):
+        database = file_client.app.container.postgres_database()
+        repository = EventSourcedRoverRepository(session_factory=database.session, logger=Logger(name="test_logger"))
+        file_client.app.container.rover_repository.override(providers.Object(repository))
+        probe_id = file_client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()["id"]
+
+        def append():
+            with database.session() as session:
+                session.add(RoverEventModel(rover_id=probe_id, seq=1, dx=1, dy=0, turns=0))
+
+        def change(models):
+            # Outro escritor grava a mesma sequência antes desta escrita
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(append).result()
+            return [{"id": probe_id, "x": 0, "y": 1, "direction": "NORTH"}]
+
+        assert repository.modify([probe_id], change) is False
+        assert repository.get_by_id(probe_id).x == 1
+
+    def test_update_gives_up_after_the_retries(self, event_client, test_db):
+        probe_id = event_client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()["id"]
+        repository = EventSourcedRoverRepository(
+            session_factory=test_db.session, logger=Logger(name="test_logger"), retries=2
+        )
+        attempts = []
+
+        def modify(ids, change, lock=False):
+            # Toda tentativa perde a sequência para outro escritor
+            attempts.append(list(ids))
+            return False
+
+        repository.modify = modify
+        with pytest.raises(ConcurrentUpdateError):
+            repository.update_many([{"id": probe_id, "x": 1, "y": 0, "direction": "NORTH"}])
+        assert len(attempts) == 3
+
+    def test_rebuild_folds_the_log_into_the_snapshots(self, event_client, test_db):
+        client = event_client
+        probe = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        client.put(f"/probes/{probe['id']}/commands", json={"commands": "MRM"})
+        repository = EventSourcedRoverRepository(session_factory=test_db.session, logger=Logger(name="test_logger"))
+
+        assert repository.rebuild_snapshots(batch_size=1) == 1
+        assert self._snapshot(test_db, probe["id"]) == (1, 1, "EAST", 1)
+        assert repository.rebuild_snapshots() == 0
+
+        with test_db.session() as session:
+            session.get(RoverModel, probe["id"]).x = 4
+            session.commit()
+        assert repository.rebuild_snapshots(from_scratch=True) == 1
+        assert self._snapshot(test_db, probe["id"]) == (1, 1, "EAST", 1)
+
+
+class TestSharding:
+    """Tests for the hash-sharded probe repository."""
+
+    def _launch(self, client, per_shard):
+        """
+        Creates `per_shard` probes on each shard, all at (0, 0) of one
+        plateau, with fixed ids: the first UUIDs, in numeric order, that the
+        ring assigns to each shard. Returns their ids grouped by shard.
+        """
+        repository = client.app.container.rover_repository()
+        owned = [[] for _ in repository.shards]
+        for number in count():
+            if all(len(ids) == per_shard for ids in owned):
+                break
+            id = str(UUID(int=number))
+            if len(owned[repository.shard_of(id)]) < per_shard:
+                owned[repository.shard_of(id)].append(id)
+
+        client.app.container.plateau_repository().create({"id": "sharded", "max_x": 5, "max_y": 5})
+        repository.create_many([
+            {"id": id, "x": 0, "y": 0, "direction": "NORTH", "plateau_id": "sharded"}
+            for ids in owned for id in ids
+        ])
+        return owned
+
+    def test_probes_live_on_their_shard_and_listings_merge(self, sharded_client):
+        client = sharded_client
+        repository = client.app.container.rover_repository()
+        ids = [id for shard_ids in self._launch(client, 4) for id in shard_ids]
+
+        for id in ids:
+            owner = repository.shard_of(id)
+            assert [shard.get_by_id(id) is not None for shard in repository.shards] == [
+                index == owner for index in range(3)
+            ]
+
+        listed = [probe["id"] for probe in client.get("/probes").json()["probes"]]
+        assert listed == sorted(ids)
+        pages, after = [], None
+        while True:
+            params = {"limit": 5} if after is None else {"limit": 5, "after": after}
+            data = client.get("/probes", params=params).json()
+            pages.extend(probe["id"] for probe in data["probes"])
+            after = data["next_after"]
+            if after is None:
+                break
+        assert pages == sorted(ids)
+        streamed = [json.loads(line)["id"] for line in client.get("/probes/stream").text.splitlines()]
+        assert streamed == sorted(ids)
+
+    def test_batch_moves_span_shards(self, sharded_client):
+        client = sharded_client
+        repository = client.app.container.rover_repository()
+        owned = self._launch(client, 1)
+        first, second = owned[0][0], owned[1][0]
+
+        response = client.put("/probes/commands", json={"moves": [
+            {"probe_id": first, "commands": "MM"},
+            {"probe_id": second, "commands": "RM"},
+        ]})
+        assert response.json()["succeeded"] == 2
+        assert (repository.get_by_id(first).y, repository.get_by_id(second).x) == (2, 1)
+
+    def test_lost_race_on_one_shard_writes_no_shard(self, sharded_client):
+        repository = sharded_client.app.container.rover_repository()
+        owned = self._launch(sharded_client, 1)
+        first, second = owned[0][0], owned[1][0]
+
+        def change(models):
+            # Outro escritor altera a segunda sonda entre a leitura e a escrita
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                executor.submit(
+                    repository.modify, [second], lambda models: [{"id": second, "x": 3, "y": 0, "direction": "NORTH"}]
+                ).result()
+            return [{"id": model.id, "x": model.x, "y": 1, "direction": "NORTH"} for model in models]
+
+        assert repository.modify([first, second], change) is False
+        assert (repository.get_by_id(first).y, repository.get_by_id(second).x) == (0, 3)
+
+    def test_rebalance_drains_a_removed_shard(self, sharded_client, test_db, shard_databases):
+        repository = sharded_client.app.container.rover_repository()
+        owned = self._launch(sharded_client, 5)
+        ids = [id for shard_ids in owned for id in shard_ids]
+        logger = Logger(name="test_logger")
+        remaining = ShardedRoverRepository(
+            shards=repository.shards[:2],
+            plateaus=PlateauRepository(session_factory=test_db.session, logger=logger),
+            logger=logger,
+        )
+
+        assert remaining.rebalance(drain=repository.shards[2:], batch_size=3) == len(owned[2])
+        assert repository.shards[2].get_all() == []
+        assert sorted(probe.id for probe in remaining.get_all()) == sorted(ids)
+        assert all(remaining.shard_of(id) == repository.shard_of(id) for id in ids if repository.shard_of(id) != 2)
+        assert remaining.rebalance() == 0
+
+    def test_adding_a_node_moves_keys_only_to_it(self):
+        keys = [f"probe-{index}" for index in range(4000)]
+        before = HashRing([(f"shard-{index}", index) for index in range(4)])
+        after = HashRing([(f"shard-{index}", index) for index in range(5)])
+
+        moved = [key for key in keys if before.get(key) != after.get(key)]
+        assert {after.get(key) for key in moved} == {4}
+        assert 0.1 < len(moved) / len(keys) < 0.3
+
+
+class TestCollisions:
+    """Tests for collision avoidance between probes on the same plateau."""
+
+    def test_launches_share_the_origin_of_the_same_plateau(self, client):
+        first = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"})
+        second = client.post("/probes", json={"x": 5, "y": 5, "direction": "EAST"})
+        assert (first.status_code, second.status_code) == (201, 201)
+        assert first.json()["plateau_id"] == second.json()["plateau_id"]
+
+        # A origem continua ocupada pela outra sonda enquanto ela não sair
+        moved = client.put(f"/probes/{second.json()['id']}/commands", json={"commands": "M"})
+        assert moved.status_code == 200
+        back = client.put(f"/probes/{second.json()['id']}/commands", json={"commands": "LLM"})
+        assert back.status_code == 409
+
+    def test_launch_after_origin_is_released(self, client):
+        probe_id = client.post(
+            "/probes", json={"x": 5, "y": 5, "direction": "NORTH"}
+        ).json()["id"]
+        client.put(f"/probes/{probe_id}/commands", json={"commands": "MM"})
+
+        response = client.post("/probes", json={"x": 5, "y": 5, "direction": "EAST"})
+        assert response.status_code == 201
+
+    def test_move_into_other_probe_returns_409_and_persists_nothing(self, client):
+        first_id = client.post(
+            "/probes", json={"x": 5, "y": 5, "direction": "NORTH"}
+        ).json()["id"]
+        client.put(f"/probes/{first_id}/commands", json={"commands": "MM"})
+        second_id = client.post(
+            "/probes", json={"x": 5, "y": 5, "direction": "NORTH"}
+        ).json()["id"]
+
+        response = client.put(f"/probes/{second_id}/commands", json={"commands": "MMM"})
+        assert response.status_code == 409
+
+        probes = {probe["id"]: probe for probe in client.get("/probes").json()["probes"]}
+        assert (probes[second_id]["x"], probes[second_id]["y"]) == (0, 0)
+
+    def test_probes_on_different_plateaus_do_not_collide(self, client):
+        client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"})
+
+        response = client.post("/probes", json={"x": 3, "y": 3, "direction": "NORTH"})
+        assert response.status_code == 201
+
+    def test_moves_from_another_instance_are_seen_with_registry_sync(self, client):
+        container = client.app.container
+        container.rover_service.add_kwargs(
+            generation_repository=container.generation_repository,
+            registry_sync_interval=0,
+        )
+        first = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        second = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+
+        # Outra instância, com o próprio estado em memória, move a primeira sonda
+        other = container.rover_service(
+            occupancy_registry=OccupancyRegistry(),
+            obstacle_registry=ObstacleRegistry(),
+            coverage_registry=CoverageRegistry(),
+        )
+        other.move_probe(first["id"], "M")
+
+        response = client.put(f"/probes/{second['id']}/commands", json={"commands": "M"})
+        assert response.status_code == 409
+
+
+class TestStreamMoveProbe:
+    """Tests for the PUT /probes/{id}/commands/stream endpoint."""
+
+    def _launch(self, client, x=5, y=5):
+        response = client.post(
+            "/probes",
+            json={"x": x, "y": y, "direction": "NORTH"},
+        )
+        return response.json()["id"]
+
+    def test_stream_applies_commands_split_across_chunks(self, client):
+        probe_id = self._launch(client, x=20, y=20)
+
+        response = client.put(
+            f"/probes/{probe_id}/commands/stream",
+            content=iter([b"M1", b"0R", b"m", b"M", b"1", b"1"]),
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["x"] == 12
+        assert data["y"] == 10
+        assert data["direction"] == "EAST"
+
+    def test_stream_failure_persists_nothing(self, client):
+        probe_id = self._launch(client)
+
+        response = client.put(
+            f"/probes/{probe_id}/commands/stream",
+            content=iter([b"MMRMM", b"M" * 10]),
+        )
+        assert response.status_code == 400
+
+        probes = client.get("/probes").json()["probes"]
+        assert (probes[0]["x"], probes[0]["y"], probes[0]["direction"]) == (0, 0, "NORTH")
+
+    def test_stream_with_invalid_command_returns_400(self, client):
+        probe_id = self._launch(client)
+
+        response = client.put(
+            f"/probes/{probe_id}/commands/stream",
+            content=b"MMX",
+        )
+        assert response.status_code == 400
+
+    def test_stream_with_endless_count_returns_400(self, client):
+        probe_id = self._launch(client)
+
+        response = client.put(
+            f"/probes/{probe_id}/commands/stream",
+            content=iter([b"M"] + [b"9" * 1000] * 1000),
+        )
+        assert response.status_code == 400
+
+    def test_stream_empty_body_returns_422(self, client):
+        probe_id = self._launch(client)
+
+        response = client.put(f"/probes/{probe_id}/commands/stream", content=b"")
+        assert response.status_code == 422
+
+    def test_stream_probe_not_found_returns_404(self, client):
+        response = client.put("/probes/missing/commands/stream", content=b"M")
+        assert response.status_code == 404
+
 
 class TestListProbes:
     """Tests for the GET /probes endpoint."""
@@ -167,3 +972,396 @@ class TestListProbes:
         assert probe["y"] == 1
         assert probe["direction"] == "EAST"
 
+    def test_list_probes_is_paginated_by_cursor(self, client):
+        ids = sorted(
+            client.post("/probes", json={"x": 5 + i, "y": 5, "direction": "NORTH"}).json()["id"]
+            for i in range(5)
+        )
+
+        pages, after = [], None
+        while True:
+            params = {"limit": 2} if after is None else {"limit": 2, "after": after}
+            data = client.get("/probes", params=params).json()
+            pages.append([probe["id"] for probe in data["probes"]])
+            after = data["next_after"]
+            if after is None:
+                break
+        assert pages == [ids[:2], ids[2:4], ids[4:]]
+
+    def test_stream_probes_returns_every_probe_as_ndjson(self, client):
+        ids = sorted(
+            client.post("/probes", json={"x": 5 + i, "y": 5, "direction": "NORTH"}).json()["id"]
+            for i in range(3)
+        )
+        client.put(f"/probes/{ids[1]}/commands", json={"commands": "MMR"})
+
+        response = client.get("/probes/stream")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["id"] for line in lines] == ids
+        assert (lines[1]["x"], lines[1]["y"], lines[1]["direction"]) == (0, 2, "EAST")
+
+
+class TestPlateaus:
+    """Tests for the shared plateau entity and GET /plateaus/{plateau_id}/probes."""
+
+    def test_probes_with_same_dimensions_share_plateau(self, client):
+        first = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        client.put(f"/probes/{first['id']}/commands", json={"commands": "M"})
+        second = client.post("/probes", json={"x": 5, "y": 5, "direction": "EAST"}).json()
+        other = client.post("/probes", json={"x": 3, "y": 3, "direction": "EAST"}).json()
+
+        assert first["plateau_id"] is not None
+        assert second["plateau_id"] == first["plateau_id"]
+        assert other["plateau_id"] != first["plateau_id"]
+
+    def test_list_plateau_probes(self, client):
+        first = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()
+        client.put(f"/probes/{first['id']}/commands", json={"commands": "M"})
+        client.post("/probes", json={"x": 5, "y": 5, "direction": "EAST"})
+        client.post("/probes", json={"x": 3, "y": 3, "direction": "EAST"})
+
+        response = client.get(f"/plateaus/{first['plateau_id']}/probes")
+        assert response.status_code == 200
+        probes = response.json()["probes"]
+        assert len(probes) == 2
+        assert {probe["plateau_id"] for probe in probes} == {first["plateau_id"]}
+
+    def test_list_probes_of_unknown_plateau(self, client):
+        response = client.get("/plateaus/nonexistent/probes")
+        assert response.status_code == 404
+        assert "não encontrado" in response.json()["detail"]
+
+
+class TestObstacles:
+    """Tests for the obstacle endpoints and obstacle checks on moves."""
+
+    def _launch(self, client, direction="NORTH"):
+        return client.post("/probes", json={"x": 5, "y": 5, "direction": direction}).json()
+
+    def test_add_and_list_obstacles(self, client):
+        plateau_id = self._launch(client)["plateau_id"]
+
+        response = client.post(
+            f"/plateaus/{plateau_id}/obstacles",
+            json={"obstacles": [{"x": 3, "y": 3}, {"x": 1, "y": 2}, {"x": 3, "y": 3}]},
+        )
+        assert response.status_code == 200
+        assert response.json() == {"plateau_id": plateau_id, "added": 2, "total": 2}
+
+        again = client.post(f"/plateaus/{plateau_id}/obstacles", json={"obstacles": [{"x": 1, "y": 2}]})
+        assert again.json()["added"] == 0
+
+        client.app.container.obstacle_registry().clear()
+        obstacles = client.get(f"/plateaus/{plateau_id}/obstacles").json()["obstacles"]
+        assert obstacles == [{"x": 1, "y": 2}, {"x": 3, "y": 3}]
+
+    def test_move_into_obstacle_is_rejected(self, client):
+        probe = self._launch(client)
+        client.post(f"/plateaus/{probe['plateau_id']}/obstacles", json={"obstacles": [{"x": 0, "y": 3}]})
+
+        response = client.put(f"/probes/{probe['id']}/commands", json={"commands": "M5"})
+        assert response.status_code == 400
+        assert "(0, 3)" in response.json()["detail"]
+        assert "obstáculo" in response.json()["detail"]
+
+        probes = client.get("/probes").json()["probes"]
+        assert (probes[0]["x"], probes[0]["y"]) == (0, 0)
+
+    def test_invalid_obstacles(self, client):
+        probe = self._launch(client)
+        plateau_id = probe["plateau_id"]
+
+        out_of_bounds = client.post(f"/plateaus/{plateau_id}/obstacles", json={"obstacles": [{"x": 6, "y": 0}]})
+        assert out_of_bounds.status_code == 400
+        on_probe = client.post(f"/plateaus/{plateau_id}/obstacles", json={"obstacles": [{"x": 0, "y": 0}]})
+        assert on_probe.status_code == 409
+        unknown = client.post("/plateaus/nonexistent/obstacles", json={"obstacles": [{"x": 0, "y": 0}]})
+        assert unknown.status_code == 404
+        assert client.get(f"/plateaus/{plateau_id}/obstacles").json()["obstacles"] == []
+
+    def test_plan_routes_around_obstacles(self, client):
+        probe = self._launch(client)
+        client.post(f"/plateaus/{probe['plateau_id']}/obstacles", json={"obstacles": [{"x": 0, "y": 1}]})
+
+        data = client.post(f"/probes/{probe['id']}/plan", json={"x": 0, "y": 2, "execute": True}).json()
+        assert data["commands"] == "RMLM2LM"
+        assert (data["probe"]["x"], data["probe"]["y"]) == (0, 2)
+
+
+class TestProbePath:
+    """Tests for the path and visited endpoints."""
+
+    def _launch_and_move(self, client, *sequences):
+        probe_id = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()["id"]
+        for sequence in sequences:
+            client.put(f"/probes/{probe_id}/commands", json={"commands": sequence})
+        return probe_id
+
+    def test_path_lists_every_cell(self, client):
+        probe_id = self._launch_and_move(client, "MMR", "M", "(LM)1")
+
+        response = client.get(f"/probes/{probe_id}/path")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 5
+        assert data["next_offset"] is None
+        assert [(p["x"], p["y"]) for p in data["points"]] == [(0, 0), (0, 1), (0, 2), (1, 2), (1, 3)]
+
+    def test_path_pages(self, client):
+        probe_id = self._launch_and_move(client, "MMR", "M", "LM")
+
+        page = client.get(f"/probes/{probe_id}/path", params={"offset": 2, "limit": 2}).json()
+        assert [(p["x"], p["y"]) for p in page["points"]] == [(0, 2), (1, 2)]
+        assert page["next_offset"] == 4
+
+    def test_failed_move_is_not_recorded(self, client):
+        probe_id = self._launch_and_move(client, "M", "MMMMMM")
+
+        data = client.get(f"/probes/{probe_id}/path").json()
+        assert data["total"] == 2
+
+    def test_stream_path(self, client):
+        probe_id = self._launch_and_move(client, "MRM")
+        client.put(f"/probes/{probe_id}/commands/stream", content=iter([b"LM"]))
+
+        response = client.get(f"/probes/{probe_id}/path/stream")
+        assert response.status_code == 200
+        lines = response.text.splitlines()
+        assert lines == ['{"x": 0, "y": 0}', '{"x": 0, "y": 1}', '{"x": 1, "y": 1}', '{"x": 1, "y": 2}']
+
+    def test_visited(self, client):
+        probe_id = self._launch_and_move(client, "MMRMM")
+
+        visited = client.get(f"/probes/{probe_id}/visited", params={"x": 1, "y": 2}).json()
+        assert visited["visited"] is True
+        not_visited = client.get(f"/probes/{probe_id}/visited", params={"x": 1, "y": 1}).json()
+        assert not_visited["visited"] is False
+
+    def test_batch_too_long_to_record_is_rejected(self, client):
+        client.app.container.rover_service.add_kwargs(trajectory_max_runs=20)
+        probe_id = self._launch_and_move(client, "M")
+
+        response = client.put(f"/probes/{probe_id}/commands", json={"commands": "(MRMRMRMR)30"})
+        assert response.status_code == 400
+        streamed = client.put(f"/probes/{probe_id}/commands/stream", content=iter([b"MR" * 30]))
+        assert streamed.status_code == 400
+        client.put(f"/probes/{probe_id}/commands", json={"commands": "RM"})
+
+        data = client.get(f"/probes/{probe_id}/path").json()
+        assert [(p["x"], p["y"]) for p in data["points"]] == [(0, 0), (0, 1), (1, 1)]
+
+    def test_path_of_unknown_probe(self, client):
+        assert client.get("/probes/nonexistent/path").status_code == 404
+        assert client.get("/probes/nonexistent/path/stream").status_code == 404
+        assert client.get("/probes/nonexistent/visited", params={"x": 0, "y": 0}).status_code == 404
+
+class TestPlateauCoverage:
+    """Tests for the GET /plateaus/{plateau_id}/coverage endpoint."""
+
+    def test_coverage_after_moves(self, client):
+        probe = client.post("/probes", json={"x": 1, "y": 1, "direction": "NORTH"}).json()
+        client.put(f"/probes/{probe['id']}/commands", json={"commands": "MR"})
+        client.put(f"/probes/{probe['id']}/commands", json={"commands": "MMMM"})
+
+        response = client.get(f"/plateaus/{probe['plateau_id']}/coverage")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["visited_cells"] == 2
+        assert data["total_cells"] == 4
+        assert data["coverage"] == 50.0
+        assert data["map"] == [[1.0, 0.0], [1.0, 0.0]]
+
+    def test_coverage_is_persisted(self, client):
+        probe = client.post("/probes", json={"x": 5, "y": 5, "direction": "EAST"}).json()
+        client.put(f"/probes/{probe['id']}/commands", json={"commands": "M5LM5"})
+        client.app.container.coverage_registry().clear()
+
+        data = client.get(f"/plateaus/{probe['plateau_id']}/coverage", params={"width": 1, "height": 1}).json()
+        assert data["visited_cells"] == 11
+        assert data["map"] == [[11 / 36]]
+
+    def test_tiles_written_by_another_instance_are_merged(self, client, test_db):
+        probe = client.post("/probes", json={"x": 5, "y": 5, "direction": "EAST"}).json()
+        client.put(f"/probes/{probe['id']}/commands", json={"commands": "M5"})
+
+        # Outra instância grava o mesmo bloco a partir do próprio mapa, que só viu a coluna x = 0
+        other = CoverageMap(Plateau(5, 5, probe["plateau_id"]))
+        for y in range(6):
+            other.mark_cell(0, y)
+        CoverageRepository(session_factory=test_db.session, logger=Logger(name="test_logger")).save_tiles(
+            probe["plateau_id"], other.pop_dirty()
+        )
+        client.app.container.coverage_registry().clear()
+
+        data = client.get(f"/plateaus/{probe['plateau_id']}/coverage").json()
+        assert data["visited_cells"] == 11
+
+    def test_coverage_of_unknown_plateau(self, client):
+        assert client.get("/plateaus/nonexistent/coverage").status_code == 404
+
+class TestMissions:
+    """Tests for the POST /probes/missions endpoint."""
+
+    def test_each_rover_sees_the_earlier_ones(self, client):
+        response = client.post("/probes/missions", json={
+            "x": 5,
+            "y": 5,
+            "rovers": [
+                {"direction": "NORTH", "commands": "MMRMM"},
+                {"direction": "EAST", "commands": "MMLM"},
+                {"direction": "NORTH", "commands": "M5"},
+            ],
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert (data["deployed"], data["succeeded"]) == (3, 3)
+        positions = [(r["probe"]["x"], r["probe"]["y"], r["probe"]["direction"]) for r in data["results"]]
+        assert positions == [(2, 2, "EAST"), (2, 1, "NORTH"), (0, 5, "NORTH")]
+
+        probes = client.get(f"/plateaus/{data['plateau_id']}/probes").json()["probes"]
+        assert len(probes) == 3
+        path = client.get(f"/probes/{data['results'][0]['probe']['id']}/path").json()
+        assert path["total"] == 5
+
+    def test_failed_rover_stays_at_launch_and_blocks_the_next(self, client):
+        data = client.post("/probes/missions", json={
+            "x": 5,
+            "y": 5,
+            "rovers": [
+                {"direction": "NORTH", "commands": "M2"},
+                {"direction": "NORTH", "commands": "M3"},
+                {"direction": "EAST", "commands": "M"},
+            ],
+        }).json()
+
+        statuses = [result["status"] for result in data["results"]]
+        assert statuses == ["OK", "COLLISION", "COLLISION"]
+        assert (data["results"][1]["probe"]["x"], data["results"][1]["probe"]["y"]) == (0, 0)
+        assert "(0, 2)" in data["results"][1]["detail"]
+        assert data["results"][2]["probe"] is None
+        assert (data["deployed"], data["succeeded"]) == (2, 1)
+
+    def test_errors_are_reported_per_rover(self, client):
+        plateau_id = client.post("/probes", json={"x": 5, "y": 5, "direction": "NORTH"}).json()["plateau_id"]
+
+        data = client.post("/probes/missions", json={
+            "x": 5,
+            "y": 5,
+            "rovers": [
+                {"direction": "EAST", "commands": "M"},
+                {"direction": "EAST", "commands": "M"},
+            ],
+        }).json()
+        assert [result["status"] for result in data["results"]] == ["COLLISION", "COLLISION"]
+
+        client.put(f"/probes/{client.get('/probes').json()['probes'][0]['id']}/commands", json={"commands": "M5"})
+        data = client.post("/probes/missions", json={
+            "x": 5,
+            "y": 5,
+            "rovers": [
+                {"direction": "EAST", "commands": "M9"},
+                {"direction": "EAST", "commands": "M3"},
+            ],
+        }).json()
+        assert data["plateau_id"] == plateau_id
+        assert [result["status"] for result in data["results"]] == ["OUT_OF_BOUNDS", "COLLISION"]
+        assert "(6, 0)" in data["results"][0]["detail"]
+
+    def test_invalid_command_and_obstacle(self, client):
+        data = client.post("/probes/missions", json={
+            "x": 5,
+            "y": 5,
+            "rovers": [
+                {"direction": "EAST", "commands": "(MM"},
+                {"direction": "EAST", "commands": "M"},
+            ],
+        }).json()
+        assert [result["status"] for result in data["results"]] == ["INVALID_COMMAND", "COLLISION"]
+        client.put(f"/probes/{data['results'][0]['probe']['id']}/commands", json={"commands": "MMR"})
+        client.post(f"/plateaus/{data['plateau_id']}/obstacles", json={"obstacles": [{"x": 2, "y": 3}]})
+
+        data = client.post("/probes/missions", json={
+            "x": 5,
+            "y": 5,
+            "rovers": [
+                {"direction": "NORTH", "commands": "M3RM3"},
+                {"direction": "NORTH", "commands": "M4RM9"},
+            ],
+        }).json()
+        assert [result["status"] for result in data["results"]] == ["OBSTACLE", "COLLISION"]
+
+    def test_empty_mission_is_rejected(self, client):
+        response = client.post("/probes/missions", json={"x": 5, "y": 5, "rovers": []})
+        assert response.status_code == 422
+
+
+class TestPlanRoute:
+    """Tests for the POST /probes/{id}/plan endpoint."""
+
+    def _launch(self, client, direction="NORTH"):
+        response = client.post("/probes", json={"x": 5, "y": 5, "direction": direction})
+        return response.json()["id"]
+
+    def test_plan_without_executing(self, client):
+        probe_id = self._launch(client)
+
+        response = client.post(f"/probes/{probe_id}/plan", json={"x": 3, "y": 2})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["commands"] == "M2RM3"
+        assert data["length"] == 6
+        assert data["executed"] is False
+        assert (data["probe"]["x"], data["probe"]["y"]) == (0, 0)
+
+    def test_plan_and_execute(self, client):
+        probe_id = self._launch(client)
+
+        data = client.post(f"/probes/{probe_id}/plan", json={"x": 3, "y": 2, "execute": True}).json()
+        assert data["executed"] is True
+        assert (data["probe"]["x"], data["probe"]["y"]) == (3, 2)
+        assert client.get(f"/probes/{probe_id}/path").json()["total"] == 6
+
+    def test_plan_avoids_other_probes(self, client):
+        blocker = self._launch(client)
+        client.put(f"/probes/{blocker}/commands", json={"commands": "M"})
+        probe_id = self._launch(client, direction="EAST")
+
+        data = client.post(f"/probes/{probe_id}/plan", json={"x": 0, "y": 2, "execute": True}).json()
+        assert data["length"] == 6
+        assert (data["probe"]["x"], data["probe"]["y"]) == (0, 2)
+
+    def test_plan_to_occupied_cell(self, client):
+        blocker = self._launch(client)
+        client.put(f"/probes/{blocker}/commands", json={"commands": "M"})
+        probe_id = self._launch(client)
+
+        response = client.post(f"/probes/{probe_id}/plan", json={"x": 0, "y": 1})
+        assert response.status_code == 409
+
+    def test_plan_unknown_probe(self, client):
+        response = client.post("/probes/unknown/plan", json={"x": 0, "y": 0})
+        assert response.status_code == 404
+
+    def test_plan_out_of_bounds(self, client):
+        probe_id = self._launch(client)
+        response = client.post(f"/probes/{probe_id}/plan", json={"x": 6, "y": 0})
+        assert response.status_code == 400
+
+
+class TestCommandCacheStats:
+    """Tests for the GET /health/command-cache endpoint."""
+
+    def test_repeated_commands_are_served_from_cache(self, client):
+        probe_id = client.post(
+            "/probes",
+            json={"x": 5, "y": 5, "direction": "NORTH"},
+        ).json()["id"]
+        client.put(f"/probes/{probe_id}/commands", json={"commands": "MRM"})
+        client.put(f"/probes/{probe_id}/commands", json={"commands": "LM"})
+        client.put(f"/probes/{probe_id}/commands", json={"commands": "mrm"})
+
+        stats = client.get("/health/command-cache").json()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 2
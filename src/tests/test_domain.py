@@ -1,12 +1,45 @@
+import contextlib
+import random
+import time
+from collections import deque
+from dataclasses import replace
+
 import pytest
 
+from app.domain.batch import BatchStatus, Fleet
+from app.domain.command_cache import CommandCache
+from app.domain.coverage import CoverageMap
 from app.domain.direction import Direction
-from app.domain.plateau import Plateau
+from app.domain.envelope import Envelope
+from app.domain.events import RoverEvent, fold
+from app.domain.obstacles import ObstacleMap
+from app.domain.occupancy import OccupancyIndex
+from app.domain.planner import PlanCache, plan_path
+from app.domain.plateau import Plateau, PlateauRegistry
 from app.domain.rover import Rover
-from app.domain.commands import execute_commands, validate_and_execute_commands
+from app.domain.trajectory import TrajectoryRecorder
+from app.domain.commands import (
+    CommandRun,
+    CommandStream,
+    CommandStreamParser,
+    MAX_COUNT_DIGITS,
+    apply_envelope,
+    build_envelope,
+    compile_commands,
+    compile_program,
+    execute_program,
+    execute_commands,
+    execute_compiled,
+    iter_command_runs,
+    validate_and_execute_commands,
+)
 from app.infrastructure.exceptions import (
+    CollisionError,
     InvalidCommandError,
+    NoPathError,
+    ObstacleError,
     OutOfBoundsError,
+    TrajectoryTooLongError,
 )
 
 
@@ -49,6 +82,15 @@ class TestDirection:
     def test_movement_delta_west(self):
         assert Direction.WEST.movement_delta == (-1, 0)
 
+    def test_codes_follow_clockwise_order(self):
+        assert [Direction.NORTH.code, Direction.EAST.code, Direction.SOUTH.code, Direction.WEST.code] == [0, 1, 2, 3]
+        assert all(Direction.from_code(direction.code) is direction for direction in Direction)
+        assert Direction.from_code(5) == Direction.EAST
+
+    def test_rotate_by_quarter_turns(self):
+        assert Direction.NORTH.rotate(3) == Direction.WEST
+        assert Direction.SOUTH.rotate(-1) == Direction.EAST
+
 
 class TestPlateau:
     """Tests for the Plateau class."""
@@ -85,6 +127,29 @@ class TestPlateau:
         assert plateau.is_within_bounds(0, 6) is False
 
 
+class TestPlateauRegistry:
+    """Tests for the interned plateau registry."""
+
+    def test_intern_returns_shared_instance(self):
+        registry = PlateauRegistry()
+        first = registry.intern("p1", 5, 5)
+        assert registry.intern("p1", 5, 5) is first
+        assert registry.get("p1") is first
+        assert len(registry) == 1
+
+    def test_plateaus_with_same_dimensions_are_distinct_by_id(self):
+        registry = PlateauRegistry()
+        assert registry.intern("p1", 5, 5) != registry.intern("p2", 5, 5)
+        assert Plateau(5, 5) == Plateau(5, 5)
+
+    def test_unknown_plateau(self):
+        registry = PlateauRegistry()
+        assert registry.get("missing") is None
+        registry.intern("p1", 5, 5)
+        registry.clear()
+        assert registry.get("p1") is None
+
+
 class TestRover:
     """Tests for the Rover class."""
 
@@ -137,6 +202,24 @@ class TestRover:
         rover.turn_right()
         assert rover.direction == Direction.EAST
 
+    def test_move_multiple_steps(self, rover):
+        rover.move(4)
+        assert rover.x == 0
+        assert rover.y == 4
+
+    def test_move_multiple_steps_stops_on_last_valid_cell(self, rover):
+        with pytest.raises(OutOfBoundsError) as exc_info:
+            rover.move(8)
+        assert (exc_info.value.x, exc_info.value.y) == (0, 6)
+        assert rover.y == 5
+
+    def test_rotate_by_quarter_turns(self, rover):
+        rover.rotate(-3)
+        assert rover.direction == Direction.EAST
+
+    def test_rover_has_no_instance_dict(self, rover):
+        assert not hasattr(rover, "__dict__")
+
     def test_get_position_returns_correct_dict(self, rover):
         position = rover.get_position()
         assert position == {
@@ -279,3 +362,937 @@ class TestAtomicCommands:
         assert rover.x == 0
         assert rover.y == 0
 
+
+
+class TestCompiledCommands:
+    """Tests for the run-length compiled execution engine."""
+
+    @pytest.fixture
+    def rover(self):
+        plateau = Plateau(max_x=5, max_y=5)
+        return Rover(id="test", plateau=plateau)
+
+    def test_compile_collapses_runs(self):
+        compiled = compile_commands("MMMlrRRMm")
+        assert compiled.runs == (
+            CommandRun("M", 3),
+            CommandRun("R", 2),
+            CommandRun("M", 2),
+        )
+        assert compiled.invalid_command is None
+
+    def test_compile_drops_rotations_that_cancel_out(self):
+        assert compile_commands("MLRRLM").runs == (CommandRun("M", 2),)
+
+    def test_compile_stops_at_invalid_command(self):
+        compiled = compile_commands("MMXR")
+        assert compiled.runs == (CommandRun("M", 2),)
+        assert compiled.invalid_command == "X"
+
+    def test_out_of_bounds_before_invalid_command_wins(self, rover):
+        with pytest.raises(OutOfBoundsError):
+            execute_compiled(rover, compile_commands("LLMX"))
+
+    def test_reports_first_offending_coordinate(self, rover):
+        with pytest.raises(OutOfBoundsError) as exc_info:
+            execute_compiled(rover, compile_commands("RMMMMMMMMM"))
+        assert (exc_info.value.x, exc_info.value.y) == (6, 0)
+
+    def test_matches_step_by_step_interpreter(self):
+        generator = random.Random(42)
+        plateau = Plateau(max_x=7, max_y=4)
+
+        for _ in range(500):
+            start = Rover(
+                id="test",
+                plateau=plateau,
+                x=generator.randint(0, plateau.max_x),
+                y=generator.randint(0, plateau.max_y),
+                direction=generator.choice(list(Direction)),
+            )
+            sequence = "".join(
+                generator.choice("MMMLRX" if generator.random() < 0.1 else "MMMLR")
+                for _ in range(generator.randint(0, 30))
+            )
+            expected, actual = replace(start), replace(start)
+
+            try:
+                execute_commands(expected, sequence)
+                expected_error = None
+            except (InvalidCommandError, OutOfBoundsError) as e:
+                expected_error = (type(e), str(e))
+            try:
+                execute_compiled(actual, compile_commands(sequence))
+                actual_error = None
+            except (InvalidCommandError, OutOfBoundsError) as e:
+                actual_error = (type(e), str(e))
+
+            assert actual_error == expected_error
+            assert actual.get_position() == expected.get_position()
+
+
+class TestTrajectoryEnvelope:
+    """Tests for the position-independent trajectory envelope."""
+
+    def test_envelope_from_north(self):
+        envelope = build_envelope("MMRMMRMRRM").for_direction(Direction.NORTH)
+        assert envelope == Envelope(
+            dx=2, dy=2, direction=Direction.NORTH, min_x=0, max_x=2, min_y=0, max_y=2
+        )
+
+    def test_envelope_is_rotated_for_other_directions(self):
+        envelope = build_envelope("MMRM").for_direction(Direction.WEST)
+        assert envelope == Envelope(
+            dx=-2, dy=1, direction=Direction.NORTH, min_x=-2, max_x=0, min_y=0, max_y=1
+        )
+
+    def test_fits_is_a_bounds_comparison(self):
+        envelope = build_envelope("MMMM").for_direction(Direction.EAST)
+        plateau = Plateau(max_x=5, max_y=5)
+        assert envelope.fits(plateau, 1, 3) is True
+        assert envelope.fits(plateau, 2, 3) is False
+
+    def test_apply_envelope_reports_first_failing_step(self):
+        rover = Rover(id="test", plateau=Plateau(max_x=5, max_y=5), x=3, y=3)
+        trajectory = build_envelope("RMMMMLM")
+        with pytest.raises(OutOfBoundsError) as exc_info:
+            apply_envelope(rover, trajectory.compiled, trajectory.for_direction(rover.direction))
+        assert (exc_info.value.x, exc_info.value.y) == (6, 3)
+        assert (rover.x, rover.y, rover.direction) == (3, 3, Direction.NORTH)
+
+    def test_matches_step_by_step_interpreter_for_every_start(self):
+        generator = random.Random(7)
+        plateau = Plateau(max_x=6, max_y=3)
+
+        for _ in range(300):
+            sequence = "".join(
+                generator.choice("MMLR") for _ in range(generator.randint(0, 25))
+            )
+            trajectory = build_envelope(sequence)
+            for direction in Direction:
+                start = Rover(
+                    id="test",
+                    plateau=plateau,
+                    x=generator.randint(0, plateau.max_x),
+                    y=generator.randint(0, plateau.max_y),
+                    direction=direction,
+                )
+                expected = replace(start)
+                try:
+                    execute_commands(expected, sequence)
+                    expected_state = expected.get_position()
+                except OutOfBoundsError as e:
+                    expected_state = str(e)
+
+                actual = replace(start)
+                try:
+                    apply_envelope(actual, trajectory.compiled, trajectory.for_direction(direction))
+                    actual_state = actual.get_position()
+                except OutOfBoundsError as e:
+                    actual_state = str(e)
+                    assert actual.get_position() == start.get_position()
+
+                assert actual_state == expected_state
+
+
+class TestCommandCache:
+    """Tests for the LRU cache of compiled command transforms."""
+
+    def test_repeated_sequence_is_a_hit(self):
+        cache = CommandCache(max_size=4)
+        first = cache.get("mrm", Direction.NORTH)
+        second = cache.get("MRM", Direction.NORTH)
+        assert second is first
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_key_includes_starting_direction(self):
+        cache = CommandCache(max_size=4)
+        north = cache.get("MRM", Direction.NORTH)
+        east = cache.get("MRM", Direction.EAST)
+        assert (north.envelope.dx, north.envelope.dy) == (1, 1)
+        assert (east.envelope.dx, east.envelope.dy) == (1, -1)
+        assert cache.stats()["misses"] == 2
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = CommandCache(max_size=2)
+        cache.get("M", Direction.NORTH)
+        cache.get("L", Direction.NORTH)
+        cache.get("M", Direction.NORTH)
+        cache.get("R", Direction.NORTH)
+        cache.get("M", Direction.NORTH)
+        stats = cache.stats()
+        assert stats["size"] == 2
+        assert stats["evictions"] == 1
+        assert stats["hits"] == 2
+
+    def test_long_sequences_are_not_stored(self):
+        cache = CommandCache(max_size=4, max_sequence_length=3)
+        cache.get("MMMM", Direction.NORTH)
+        cache.get("MMMM", Direction.NORTH)
+        stats = cache.stats()
+        assert stats["size"] == 0
+        assert stats["bypasses"] == 2
+        assert stats["hits"] == 0
+
+
+class TestFleetBatch:
+    """Tests for the vectorized batch simulator."""
+
+    def test_shared_sequence_is_applied_to_every_rover(self):
+        plateau = Plateau(max_x=5, max_y=5)
+        fleet = Fleet.from_rovers([
+            Rover(id="a", plateau=plateau),
+            Rover(id="b", plateau=plateau, x=2, y=3, direction=Direction.EAST),
+        ])
+        result = fleet.execute("MRM")
+        assert result.succeeded.tolist() == [True, True]
+        assert fleet.x.tolist() == [1, 3]
+        assert fleet.y.tolist() == [1, 2]
+        assert fleet.get_direction(0) == Direction.EAST
+        assert fleet.get_direction(1) == Direction.SOUTH
+
+    def test_failed_rover_is_left_untouched(self):
+        fleet = Fleet.from_rovers([Rover(id="a", plateau=Plateau(max_x=5, max_y=5))])
+        result = fleet.execute(["MMLLMMM"])
+        assert result.status[0] == BatchStatus.OUT_OF_BOUNDS
+        assert result.error_index[0] == 6
+        assert (result.error_x[0], result.error_y[0]) == (0, -1)
+        assert (fleet.x[0], fleet.y[0], fleet.get_direction(0)) == (0, 0, Direction.NORTH)
+
+    @pytest.mark.parametrize("chunk_cells", [1 << 20, 1000])
+    def test_matches_validate_and_execute_commands(self, monkeypatch, chunk_cells):
+        monkeypatch.setattr("app.domain.batch._CHUNK_CELLS", chunk_cells)
+        generator = random.Random(3)
+        rovers, sequences = [], []
+        for index in range(400):
+            plateau = Plateau(max_x=generator.randint(0, 8), max_y=generator.randint(0, 8))
+            rovers.append(Rover(
+                id=str(index),
+                plateau=plateau,
+                x=generator.randint(0, plateau.max_x),
+                y=generator.randint(0, plateau.max_y),
+                direction=generator.choice(list(Direction)),
+            ))
+            sequences.append("".join(
+                generator.choice("MMMLRmlr" if generator.random() < 0.95 else "MLRX")
+                for _ in range(generator.randint(0, 40))
+            ))
+
+        fleet = Fleet.from_rovers(rovers)
+        result = fleet.execute(sequences)
+
+        for index, (rover, sequence) in enumerate(zip(rovers, sequences)):
+            try:
+                validate_and_execute_commands(rover, sequence)
+                assert result.status[index] == BatchStatus.OK
+            except OutOfBoundsError as e:
+                assert result.status[index] == BatchStatus.OUT_OF_BOUNDS
+                assert (result.error_x[index], result.error_y[index]) == (e.x, e.y)
+            except InvalidCommandError as e:
+                assert result.status[index] == BatchStatus.INVALID_COMMAND
+                assert sequence.upper()[result.error_index[index]] == e.command
+            assert (fleet.x[index], fleet.y[index]) == (rover.x, rover.y)
+            assert fleet.get_direction(index) == rover.direction
+
+
+class TestCompactSyntax:
+    """Tests for the compact command syntax and its streaming tokenizer."""
+
+    def test_counts_repeat_the_previous_command(self):
+        assert list(iter_command_runs("M3R2m2")) == [
+            CommandRun("M", 3),
+            CommandRun("R", 2),
+            CommandRun("M", 2),
+        ]
+
+    def test_count_applies_only_to_the_last_letter(self):
+        assert list(iter_command_runs("LR3M")) == [CommandRun("R", 2), CommandRun("M", 1)]
+
+    def test_equivalent_to_the_expanded_sequence(self):
+        assert compile_commands("M2L5MMR0M10") == compile_commands(
+            "MM" + "L" * 5 + "MM" + "M" * 10
+        )
+
+    def test_runs_are_never_expanded(self):
+        rover = Rover(id="test", plateau=Plateau(max_x=5, max_y=10**12))
+        validate_and_execute_commands(rover, f"M{10**12}RR")
+        assert rover.y == 10**12
+        assert rover.direction == Direction.SOUTH
+
+    def test_runs_before_an_invalid_command_are_yielded(self):
+        runs = iter_command_runs("M4R2X")
+        assert next(runs) == CommandRun("M", 4)
+        assert next(runs) == CommandRun("R", 2)
+        with pytest.raises(InvalidCommandError) as exc_info:
+            next(runs)
+        assert exc_info.value.command == "X"
+
+    def test_leading_count_is_an_invalid_command(self):
+        assert compile_commands("3M").invalid_command == "3"
+
+    @pytest.mark.parametrize("suffix", ["", "R"], ids=["at-the-end", "before-a-command"])
+    def test_counts_longer_than_the_limit_are_invalid(self, suffix):
+        runs = iter_command_runs("RM" + "9" * 5000 + suffix)
+        assert next(runs) == CommandRun("R", 1)
+        assert next(runs) == CommandRun("M", 1)
+        with pytest.raises(InvalidCommandError) as exc_info:
+            next(runs)
+        assert exc_info.value.command == "9" * (MAX_COUNT_DIGITS + 1)
+
+    def test_count_at_the_limit_is_accepted(self):
+        count = "9" * MAX_COUNT_DIGITS
+        assert list(iter_command_runs(f"M{count}")) == [CommandRun("M", int(count))]
+
+    def test_out_of_bounds_error_reports_first_offending_coordinate(self):
+        rover = Rover(id="test", plateau=Plateau(max_x=5, max_y=5))
+        with pytest.raises(OutOfBoundsError) as exc_info:
+            validate_and_execute_commands(rover, "R1M100")
+        assert (exc_info.value.x, exc_info.value.y) == (6, 0)
+
+    def test_batch_simulator_accepts_compact_syntax(self):
+        fleet = Fleet.from_rovers([Rover(id="a", plateau=Plateau(max_x=5, max_y=5))])
+        result = fleet.execute(["M3R1M9"])
+        assert result.status[0] == BatchStatus.OUT_OF_BOUNDS
+        assert result.error_index[0] == 9
+
+    def test_batch_simulator_never_expands_past_the_limit(self, monkeypatch):
+        monkeypatch.setattr("app.domain.batch.MAX_EXPANDED_STEPS", 100)
+        plateau = Plateau(max_x=5, max_y=10**6)
+        fleet = Fleet.from_rovers([Rover(id=str(index), plateau=plateau) for index in range(3)])
+        result = fleet.execute(["M" + "9" * 18, "RM" + "9" * 18, "M50R2M48"])
+        assert list(result.status) == [BatchStatus.INVALID_COMMAND, BatchStatus.OUT_OF_BOUNDS, BatchStatus.OK]
+        assert list(result.error_index) == [100, 6, -1]
+
+
+class TestCommandStream:
+    """Tests for chunked command parsing and execution."""
+
+    def test_chunks_can_be_split_anywhere(self):
+        sequence = "MM12RL3M7LLRM10"
+        for split in range(len(sequence) + 1):
+            parser = CommandStreamParser()
+            runs = list(parser.feed(sequence[:split]))
+            runs += list(parser.feed(sequence[split:]))
+            runs += list(parser.close())
+            assert tuple(runs) == compile_commands(sequence).runs
+
+    def test_partial_count_is_bounded(self):
+        parser = CommandStreamParser()
+        assert list(parser.feed("M" + "9" * MAX_COUNT_DIGITS)) == []
+        with pytest.raises(InvalidCommandError):
+            list(parser.feed("9"))
+
+    def test_original_rover_changes_only_on_finish(self):
+        rover = Rover(id="test", plateau=Plateau(max_x=5, max_y=5))
+        stream = CommandStream(rover)
+        stream.feed("MM")
+        stream.feed("RM")
+        assert (rover.x, rover.y) == (0, 0)
+        stream.finish()
+        assert (rover.x, rover.y, rover.direction) == (1, 2, Direction.EAST)
+
+    def test_out_of_bounds_is_raised_while_feeding(self):
+        rover = Rover(id="test", plateau=Plateau(max_x=5, max_y=5))
+        stream = CommandStream(rover)
+        with pytest.raises(OutOfBoundsError):
+            stream.feed("M9RM")
+        assert (rover.x, rover.y) == (0, 0)
+
+
+class TestCommandPrograms:
+    """Tests for programs with repeat blocks evaluated by transform composition."""
+
+    @staticmethod
+    def _random_program(generator, depth=0):
+        parts = []
+        for _ in range(generator.randint(1, 4)):
+            if depth < 3 and generator.random() < 0.3:
+                body, expanded = TestCommandPrograms._random_program(generator, depth + 1)
+                count = generator.randint(0, 4)
+                parts.append((f"({body}){count}", expanded * count))
+            else:
+                command = generator.choice("MMMLR")
+                count = generator.randint(1, 3)
+                parts.append((f"{command}{count}", command * count))
+        return "".join(p[0] for p in parts), "".join(p[1] for p in parts)
+
+    def test_repeat_block_composes_transforms(self):
+        program = compile_program("(MMRMMR)2")
+        assert program.envelope == Envelope(
+            dx=0, dy=0, direction=Direction.NORTH, min_x=0, max_x=2, min_y=0, max_y=2
+        )
+
+    def test_huge_repeat_counts_cost_log_time(self):
+        rover = Rover(id="test", plateau=Plateau(max_x=10, max_y=10**15))
+        execute_program(rover, compile_program(f"((M)1000RRRR){10**12}"))
+        assert rover.y == 10**15
+        assert rover.direction == Direction.NORTH
+
+    def test_failure_reports_first_offending_coordinate(self):
+        rover = Rover(id="test", plateau=Plateau(max_x=5, max_y=5))
+        with pytest.raises(OutOfBoundsError) as exc_info:
+            execute_program(rover, compile_program("(MR(M)2L)1000"))
+        assert (exc_info.value.x, exc_info.value.y) == (6, 3)
+        assert (rover.x, rover.y, rover.direction) == (0, 0, Direction.NORTH)
+
+    def test_failing_huge_repeat_count_is_found_quickly(self):
+        count = "9" * MAX_COUNT_DIGITS
+        rover = Rover(id="test", plateau=Plateau(max_x=10**6, max_y=10**6))
+        started = time.perf_counter()
+        with pytest.raises(OutOfBoundsError) as exc_info:
+            execute_program(rover, compile_program(f"((MRML)1000){count}"))
+        assert time.perf_counter() - started < 1
+        assert (exc_info.value.x, exc_info.value.y) == (10**6, 10**6 + 1)
+
+    def test_block_count_longer_than_the_limit_is_invalid(self):
+        with pytest.raises(InvalidCommandError):
+            compile_program("(M)" + "9" * (MAX_COUNT_DIGITS + 1))
+
+    @pytest.mark.parametrize("program", ["(MM", "MM)", "(M)(", "(X)2", "((M)"])
+    def test_syntax_errors_raise_invalid_command(self, program):
+        with pytest.raises(InvalidCommandError):
+            compile_program(program)
+
+    def test_nesting_depth_is_limited(self):
+        with pytest.raises(InvalidCommandError):
+            compile_program("(" * 100 + "M" + ")" * 100)
+
+    def test_matches_expanded_sequence(self):
+        generator = random.Random(11)
+        plateau = Plateau(max_x=6, max_y=6)
+
+        for _ in range(300):
+            program, expanded = self._random_program(generator)
+            start = Rover(
+                id="test",
+                plateau=plateau,
+                x=generator.randint(0, plateau.max_x),
+                y=generator.randint(0, plateau.max_y),
+                direction=generator.choice(list(Direction)),
+            )
+            expected, actual = replace(start), replace(start)
+            try:
+                validate_and_execute_commands(expected, expanded)
+                expected_state = expected.get_position()
+            except OutOfBoundsError as e:
+                expected_state = str(e)
+            try:
+                execute_program(actual, compile_program(program))
+                actual_state = actual.get_position()
+            except OutOfBoundsError as e:
+                actual_state = str(e)
+                assert actual.get_position() == start.get_position()
+
+            assert actual_state == expected_state
+
+
+class TestOccupancy:
+    """Tests for the per-plateau occupancy index and collision checks."""
+
+    @pytest.fixture(params=[1 << 24, 0], ids=["dense", "sparse"])
+    def occupancy(self, request):
+        index = OccupancyIndex(Plateau(max_x=9, max_y=9), dense_cell_limit=request.param)
+        index.place("other", 0, 3)
+        return index
+
+    def test_place_rejects_taken_cell(self, occupancy):
+        with pytest.raises(CollisionError):
+            occupancy.place("rover", 0, 3)
+
+    def test_own_cell_is_not_a_collision(self, occupancy):
+        assert occupancy.is_occupied(0, 3, "other") is False
+        assert occupancy.is_occupied(0, 3, "rover") is True
+
+    def test_stacked_probes_keep_the_cell_until_the_last_leaves(self, occupancy):
+        occupancy.load([Rover(id=id, plateau=occupancy.plateau) for id in ("a", "b")])
+        occupancy.place("c", 0, 0, stack=True)
+        assert occupancy.count(occupancy.key(0, 0)) == 3
+        assert occupancy.is_occupied(0, 0, "a")
+
+        occupancy.remove("a")
+        occupancy.place("b", 1, 0)
+        assert occupancy.is_occupied(0, 0)
+        assert not occupancy.is_occupied(0, 0, "c")
+        assert occupancy.first_collision("b", 1, 0, -1, 0, 1) == 1
+        occupancy.remove("c")
+        assert not occupancy.is_occupied(0, 0)
+        assert occupancy.first_collision("b", 1, 0, -1, 0, 1) == 0
+
+    def test_place_releases_previous_cell(self, occupancy):
+        occupancy.place("other", 5, 5)
+        assert occupancy.is_occupied(0, 3) is False
+        assert occupancy.is_occupied(5, 5) is True
+
+    def test_move_stops_before_other_probe(self, occupancy):
+        rover = Rover(id="rover", plateau=occupancy.plateau, occupancy=occupancy)
+        with pytest.raises(CollisionError) as exc_info:
+            rover.move(5)
+        assert (exc_info.value.x, exc_info.value.y) == (0, 3)
+        assert rover.y == 2
+
+    def test_long_run_scans_occupied_cells(self, occupancy):
+        rover = Rover(id="rover", plateau=occupancy.plateau, occupancy=occupancy)
+        assert occupancy.first_collision("rover", 0, 0, 0, 1, 9) == 3
+        assert occupancy.first_collision("rover", 0, 4, 0, 1, 5) == 0
+        rover.direction = Direction.EAST
+        rover.move(9)
+        assert rover.x == 9
+
+    def test_envelope_path_detects_collisions(self, occupancy):
+        rover = Rover(id="rover", plateau=occupancy.plateau, occupancy=occupancy)
+        with pytest.raises(CollisionError):
+            validate_and_execute_commands(rover, "MMMRM")
+        assert (rover.x, rover.y) == (0, 0)
+
+    def test_box_with_probe_off_the_path_is_still_accepted(self, occupancy):
+        rover = Rover(id="rover", plateau=occupancy.plateau, x=1, occupancy=occupancy)
+        validate_and_execute_commands(rover, "M5LM")
+        assert (rover.x, rover.y, rover.direction) == (0, 5, Direction.WEST)
+
+    def test_program_detects_collisions(self, occupancy):
+        rover = Rover(id="rover", plateau=occupancy.plateau, occupancy=occupancy)
+        with pytest.raises(CollisionError):
+            execute_program(rover, compile_program("(M)5"))
+
+    def test_run_and_box_checks_match_cell_scans(self):
+        generator = random.Random(2)
+        for _ in range(100):
+            plateau = Plateau(max_x=generator.randint(0, 12), max_y=generator.randint(0, 12))
+            occupancy = OccupancyIndex(plateau, dense_cell_limit=generator.choice([0, 1 << 24]))
+            for _ in range(generator.randint(0, 40)):
+                with contextlib.suppress(CollisionError):
+                    occupancy.place(
+                        f"r{generator.randint(0, 20)}",
+                        generator.randint(0, plateau.max_x),
+                        generator.randint(0, plateau.max_y),
+                    )
+
+            for _ in range(20):
+                rover_id = f"r{generator.randint(0, 25)}"
+                x, y = generator.randint(-2, plateau.max_x + 2), generator.randint(-2, plateau.max_y + 2)
+                dx, dy = generator.choice(list(Direction)).movement_delta
+                steps = generator.randint(0, 15)
+                expected = next(
+                    (step for step in range(1, steps + 1) if occupancy.is_occupied(x + dx * step, y + dy * step, rover_id)),
+                    0,
+                )
+                assert occupancy.first_collision(rover_id, x, y, dx, dy, steps) == expected
+
+                min_x, max_x = sorted(generator.randint(-2, 14) for _ in range(2))
+                min_y, max_y = sorted(generator.randint(-2, 14) for _ in range(2))
+                expected = any(
+                    occupancy.is_occupied(cell_x, cell_y, rover_id)
+                    for cell_x in range(min_x, max_x + 1)
+                    for cell_y in range(min_y, max_y + 1)
+                )
+                assert occupancy.any_in_box(rover_id, min_x, max_x, min_y, max_y) == expected
+
+    def test_periodic_program_around_probe_is_accepted(self, occupancy):
+        rover = Rover(
+            id="rover", plateau=occupancy.plateau, y=2, direction=Direction.EAST, occupancy=occupancy
+        )
+        execute_program(rover, compile_program(f"(MLM2LMLLMRM2RMRR){10**9}"))
+        assert (rover.x, rover.y, rover.direction) == (0, 2, Direction.EAST)
+
+    def test_batch_simulator_matches_rover_collisions(self):
+        generator = random.Random(5)
+        plateau = Plateau(max_x=7, max_y=7)
+        for dense_cell_limit in (1 << 24, 0):
+            occupancy = OccupancyIndex(plateau, dense_cell_limit=dense_cell_limit)
+            rovers = []
+            for index in range(30):
+                x, y = generator.randint(0, 7), generator.randint(0, 7)
+                if not occupancy.is_occupied(x, y):
+                    occupancy.place(str(index), x, y)
+                    rovers.append(Rover(
+                        id=str(index), plateau=plateau, x=x, y=y,
+                        direction=generator.choice(list(Direction)), occupancy=occupancy,
+                    ))
+            sequences = [
+                "".join(generator.choice("MMLR") for _ in range(generator.randint(0, 12)))
+                for _ in rovers
+            ]
+
+            fleet = Fleet.from_rovers(rovers)
+            result = fleet.execute(sequences, occupancy=occupancy)
+
+            for index, (rover, sequence) in enumerate(zip(rovers, sequences)):
+                try:
+                    validate_and_execute_commands(rover, sequence)
+                    assert result.status[index] == BatchStatus.OK
+                except OutOfBoundsError:
+                    assert result.status[index] == BatchStatus.OUT_OF_BOUNDS
+                except CollisionError as e:
+                    assert result.status[index] == BatchStatus.COLLISION
+                    assert (result.error_x[index], result.error_y[index]) == (e.x, e.y)
+                assert (fleet.x[index], fleet.y[index]) == (rover.x, rover.y)
+
+
+class TestObstacles:
+    """Tests for the per-plateau obstacle map and run-level obstacle checks."""
+
+    @pytest.fixture
+    def obstacles(self):
+        obstacles = ObstacleMap(Plateau(max_x=9, max_y=9))
+        obstacles.add_many([(0, 3), (4, 0), (4, 7)])
+        return obstacles
+
+    def test_add_many_keeps_lines_sorted_and_skips_duplicates(self, obstacles):
+        added = obstacles.add_many([(4, 5), (4, 2), (4, 5), (0, 3)])
+        assert added == [(4, 5), (4, 2)]
+        assert list(obstacles.column(4)) == [0, 2, 5, 7]
+        assert list(obstacles.row(3)) == [0]
+        assert len(obstacles) == 5
+        assert obstacles.add(4, 2) is False
+
+    def test_add_many_is_atomic(self, obstacles):
+        version = obstacles.version
+        with pytest.raises(OutOfBoundsError):
+            obstacles.add_many([(1, 1), (10, 1)])
+        assert not obstacles.is_blocked(1, 1)
+        assert obstacles.version == version
+
+    def test_first_obstacle_matches_step_by_step_scan(self):
+        generator = random.Random(5)
+        plateau = Plateau(max_x=30, max_y=30)
+        obstacles = ObstacleMap(plateau)
+        obstacles.add_many(
+            (generator.randint(0, 30), generator.randint(0, 30)) for _ in range(150)
+        )
+        for _ in range(500):
+            x, y = generator.randint(0, 30), generator.randint(0, 30)
+            dx, dy = generator.choice(list(Direction)).movement_delta
+            steps = generator.randint(0, 40)
+            expected = next(
+                (step for step in range(1, steps + 1) if obstacles.is_blocked(x + dx * step, y + dy * step)),
+                0,
+            )
+            assert obstacles.first_obstacle(x, y, dx, dy, steps) == expected
+
+    def test_any_in_box_matches_cell_scan(self):
+        generator = random.Random(9)
+        obstacles = ObstacleMap(Plateau(max_x=20, max_y=20))
+        obstacles.add_many((generator.randint(0, 20), generator.randint(0, 20)) for _ in range(15))
+        for _ in range(300):
+            min_x, max_x = sorted(generator.randint(-2, 22) for _ in range(2))
+            min_y, max_y = sorted(generator.randint(-2, 22) for _ in range(2))
+            expected = any(
+                min_x <= x <= max_x and min_y <= y <= max_y for x, y in obstacles.cells()
+            )
+            assert obstacles.any_in_box(min_x, max_x, min_y, max_y) == expected
+
+    def test_move_stops_before_obstacle(self, obstacles):
+        rover = Rover(id="rover", plateau=obstacles.plateau, obstacles=obstacles)
+        with pytest.raises(ObstacleError) as exc_info:
+            rover.move(5)
+        assert (exc_info.value.x, exc_info.value.y) == (0, 3)
+        assert rover.y == 2
+
+    def test_nearest_of_obstacle_and_probe_wins(self, obstacles):
+        occupancy = OccupancyIndex(obstacles.plateau)
+        occupancy.place("other", 0, 2)
+        rover = Rover(id="rover", plateau=obstacles.plateau, occupancy=occupancy, obstacles=obstacles)
+        with pytest.raises(CollisionError):
+            rover.move(5)
+
+        rover = Rover(
+            id="rover", plateau=obstacles.plateau, x=9, direction=Direction.WEST,
+            occupancy=occupancy, obstacles=obstacles,
+        )
+        occupancy.place("other", 1, 0)
+        with pytest.raises(ObstacleError) as exc_info:
+            rover.move(9)
+        assert (exc_info.value.x, rover.x) == (4, 5)
+
+    def test_envelope_and_program_paths_detect_obstacles(self, obstacles):
+        rover = Rover(id="rover", plateau=obstacles.plateau, obstacles=obstacles)
+        with pytest.raises(ObstacleError):
+            validate_and_execute_commands(rover, "RM9")
+        with pytest.raises(ObstacleError):
+            execute_program(rover, compile_program("(M)5"))
+        assert (rover.x, rover.y) == (0, 0)
+
+        validate_and_execute_commands(rover, "RM3LM9")
+        assert (rover.x, rover.y) == (3, 9)
+
+    def test_fleet_reports_obstacles(self, obstacles):
+        plateau = obstacles.plateau
+        fleet = Fleet.from_rovers([
+            Rover(id="a", plateau=plateau),
+            Rover(id="b", plateau=plateau, x=1, direction=Direction.EAST),
+        ])
+        result = fleet.execute(["MMM", "MMMM"], obstacles=obstacles)
+        assert result.status.tolist() == [BatchStatus.OBSTACLE, BatchStatus.OBSTACLE]
+        assert result.error_index.tolist() == [2, 2]
+        assert (result.error_x.tolist(), result.error_y.tolist()) == ([0, 4], [3, 0])
+
+    def test_planner_routes_around_obstacles(self):
+        plateau = Plateau(max_x=9_999, max_y=9_999)
+        obstacles = ObstacleMap(plateau)
+        obstacles.add_many((5_000, y) for y in range(9_000))
+        rover = Rover(id="r", plateau=plateau, obstacles=obstacles)
+
+        assert plan_path(rover, 9_999, 0).compact == "M9000RM9999RM9000"
+        with pytest.raises(NoPathError):
+            plan_path(rover, 5_000, 0)
+
+
+class TestTrajectory:
+    """Tests for compact trajectory recording."""
+
+    def _record(self, sequence, direction=Direction.NORTH, x=0, y=0):
+        recorder = TrajectoryRecorder(x, y, direction)
+        if "(" in sequence:
+            recorder.add_program(compile_program(sequence))
+        else:
+            recorder.add_runs(compile_commands(sequence).runs)
+        return recorder.finish()
+
+    def test_points_match_step_by_step_execution(self):
+        rng = random.Random(11)
+        for _ in range(50):
+            sequence = "".join(rng.choice("MMLR") for _ in range(40))
+            rover = Rover(id="r", plateau=Plateau(max_x=100, max_y=100), x=50, y=50)
+            expected = []
+            for command in sequence:
+                execute_commands(rover, command)
+                if command == "M":
+                    expected.append((rover.x, rover.y))
+
+            trajectory = self._record(sequence, x=50, y=50)
+            assert list(trajectory.iter_points()) == expected
+            assert (trajectory.end_x, trajectory.end_y) == (rover.x, rover.y)
+
+    def test_straight_runs_are_merged_into_one_segment(self):
+        trajectory = self._record("M1000000LRM5")
+        assert list(trajectory.segments()) == [(0, 1, 1000005)]
+        assert len(trajectory.data) <= 4
+
+    def test_iter_points_skips_without_expanding(self):
+        trajectory = self._record("M3RM2")
+        assert list(trajectory.iter_points(3)) == [(1, 3), (2, 3)]
+
+    def test_visits(self):
+        trajectory = self._record("MMRM", x=1, y=1)
+        assert trajectory.visits(1, 1)
+        assert trajectory.visits(1, 3)
+        assert trajectory.visits(2, 3)
+        assert not trajectory.visits(2, 1)
+        assert not trajectory.visits(3, 3)
+
+    def test_program_is_expanded(self):
+        trajectory = self._record("(MR)5")
+        assert list(trajectory.iter_points()) == [(0, 1), (1, 1), (1, 0), (0, 0), (0, 1)]
+
+    def test_rotation_only_block_is_not_expanded(self):
+        trajectory = self._record("(R)1000000000M", direction=Direction.EAST)
+        assert list(trajectory.iter_points()) == [(1, 0)]
+
+    def test_oversized_program_overflows(self):
+        recorder = TrajectoryRecorder(0, 0, Direction.NORTH, max_runs=100)
+        recorder.add_program(compile_program("(MRML)1000000"))
+        assert recorder.overflowed
+
+
+    def test_overflowing_stream_is_rejected(self):
+        rover = Rover(id="test", plateau=Plateau(max_x=5, max_y=5))
+        stream = CommandStream(rover, recorder=TrajectoryRecorder(0, 0, Direction.NORTH, max_runs=10))
+        with pytest.raises(TrajectoryTooLongError):
+            stream.feed("MR" * 20)
+
+
+class TestRoverEvents:
+    """Tests for the events of the probe log."""
+
+    def test_replaying_the_log_matches_execution(self):
+        rng = random.Random(5)
+        rover = Rover(id="r", plateau=Plateau(max_x=100, max_y=100), x=50, y=50, direction=Direction.EAST)
+        events = [RoverEvent.launch(rover.x, rover.y, rover.direction)]
+        for _ in range(30):
+            before = (rover.x, rover.y, rover.direction)
+            execute_commands(rover, "".join(rng.choice("MMLR") for _ in range(rng.randint(0, 12))))
+            events.append(RoverEvent.between(before, (rover.x, rover.y, rover.direction)))
+
+        assert fold(events).apply(0, 0, Direction.NORTH) == (rover.x, rover.y, rover.direction)
+        middle = fold(events[:12]).apply(0, 0, Direction.NORTH)
+        assert fold(events[12:]).apply(*middle) == (rover.x, rover.y, rover.direction)
+
+    def test_turns_are_right_quarter_turns(self):
+        assert RoverEvent.between((0, 0, Direction.NORTH), (0, 0, Direction.WEST)) == (0, 0, 3)
+        assert RoverEvent.launch(2, 3, Direction.SOUTH) == (2, 3, 2)
+        assert fold([RoverEvent(1, 0, 3), RoverEvent(0, 2, 3)]) == (1, 2, 2)
+
+
+class TestCoverage:
+    """Tests for the plateau coverage map."""
+
+    def _trajectory(self, sequence, x=0, y=0):
+        recorder = TrajectoryRecorder(x, y, Direction.NORTH)
+        recorder.add_runs(compile_commands(sequence).runs)
+        return recorder.finish()
+
+    @pytest.mark.parametrize("tile_size", [3, 256])
+    def test_marks_every_visited_cell_once(self, tile_size):
+        coverage = CoverageMap(Plateau(max_x=9, max_y=9), tile_size=tile_size)
+        trajectory = self._trajectory("MMMRMMRMMRM")
+        coverage.mark(trajectory)
+
+        expected = {(0, 0), *trajectory.iter_points()}
+        assert coverage.visited_cells == len(expected)
+        assert all(coverage.is_visited(x, y) for x, y in expected)
+        assert not coverage.is_visited(5, 5)
+
+    def test_long_runs_are_marked_by_slices(self):
+        coverage = CoverageMap(Plateau(max_x=1_999_999, max_y=1_999_999))
+        coverage.mark(self._trajectory("M1999999RM100"))
+        assert coverage.visited_cells == 2_000_100
+        assert coverage.is_visited(0, 1_999_999)
+        assert coverage.is_visited(100, 1_999_999)
+        assert not coverage.is_visited(100, 0)
+
+    def test_tiles_round_trip(self):
+        plateau = Plateau(max_x=600, max_y=10)
+        coverage = CoverageMap(plateau)
+        coverage.mark(self._trajectory("RM600LM10"))
+        restored = CoverageMap(plateau)
+        for tile_x, tile_y, data in coverage.pop_dirty():
+            restored.load_tile(tile_x, tile_y, data)
+
+        assert restored.visited_cells == coverage.visited_cells == 611
+        assert coverage.pop_dirty() == []
+
+    def test_mark_many_matches_marking_one_by_one(self):
+        generator = random.Random(4)
+        plateau = Plateau(max_x=40, max_y=40)
+        trajectories = []
+        for _ in range(30):
+            x, y = generator.randint(10, 30), generator.randint(10, 30)
+            sequence = "".join(generator.choice("MMMLR") for _ in range(generator.randint(0, 12)))
+            trajectories.append(self._trajectory(sequence, x, y))
+
+        together = CoverageMap(plateau, tile_size=8)
+        together.mark_many(trajectories)
+        one_by_one = CoverageMap(plateau, tile_size=8)
+        for trajectory in trajectories:
+            one_by_one.mark(trajectory)
+
+        assert together.visited_cells == one_by_one.visited_cells
+        assert (together.downsample(41, 41) == one_by_one.downsample(41, 41)).all()
+
+    def test_downsample(self):
+        coverage = CoverageMap(Plateau(max_x=3, max_y=3))
+        coverage.mark(self._trajectory("MMM"))
+        grid = coverage.downsample(2, 2)
+        assert grid.tolist() == [[0.5, 0.0], [0.5, 0.0]]
+        assert coverage.ratio == 0.25
+
+
+class TestPlanner:
+    """Tests for the shortest-command path planner."""
+
+    @staticmethod
+    def _shortest(rover, target_x, target_y):
+        """Reference breadth-first search over single commands."""
+        start = (rover.x, rover.y, rover.direction)
+        distances = {start: 0}
+        queue = deque([start])
+        while queue:
+            state = queue.popleft()
+            x, y, direction = state
+            if (x, y) == (target_x, target_y):
+                return distances[state]
+            dx, dy = direction.movement_delta
+            successors = [(x, y, direction.turn_left()), (x, y, direction.turn_right())]
+            if rover.plateau.is_within_bounds(x + dx, y + dy) and not rover.occupancy.is_occupied(
+                x + dx, y + dy, rover.id
+            ):
+                successors.append((x + dx, y + dy, direction))
+            for successor in successors:
+                if successor not in distances:
+                    distances[successor] = distances[state] + 1
+                    queue.append(successor)
+        return None
+
+    def test_closed_form_on_empty_plateau(self):
+        rover = Rover(id="r", plateau=Plateau(max_x=9_999, max_y=9_999), direction=Direction.SOUTH)
+        plan = plan_path(rover, 9_999, 9_999)
+        assert plan.compact == "LM9999LM9999"
+        assert plan.length == 1 + 9_999 + 1 + 9_999
+
+    def test_straight_and_turn_only_plans(self):
+        rover = Rover(id="r", plateau=Plateau(max_x=5, max_y=5), x=2, y=2, direction=Direction.NORTH)
+        assert plan_path(rover, 2, 5).commands == "MMM"
+        assert plan_path(rover, 0, 2).commands == "LMM"
+        assert plan_path(rover, 2, 2).commands == ""
+
+    def test_matches_exhaustive_search_around_probes(self):
+        rng = random.Random(7)
+        for _ in range(200):
+            plateau = Plateau(max_x=rng.randint(0, 9), max_y=rng.randint(0, 9))
+            occupancy = OccupancyIndex(plateau)
+            rover = Rover(
+                id="r",
+                plateau=plateau,
+                x=rng.randint(0, plateau.max_x),
+                y=rng.randint(0, plateau.max_y),
+                direction=Direction.from_code(rng.randrange(4)),
+                occupancy=occupancy,
+            )
+            occupancy.place("r", rover.x, rover.y)
+            for index in range(rng.randint(0, 30)):
+                x, y = rng.randint(0, plateau.max_x), rng.randint(0, plateau.max_y)
+                if not occupancy.is_occupied(x, y):
+                    occupancy.place(f"p{index}", x, y)
+            target_x, target_y = rng.randint(0, plateau.max_x), rng.randint(0, plateau.max_y)
+
+            expected = None if occupancy.is_occupied(target_x, target_y, "r") else self._shortest(rover, target_x, target_y)
+            if expected is None:
+                with pytest.raises(NoPathError):
+                    plan_path(rover, target_x, target_y)
+                continue
+
+            plan = plan_path(rover, target_x, target_y)
+            assert plan.length == expected
+            simulation = replace(rover)
+            execute_commands(simulation, plan.commands)
+            assert (simulation.x, simulation.y) == (target_x, target_y)
+
+    def test_routes_around_a_wall_on_a_large_plateau(self):
+        plateau = Plateau(max_x=9_999, max_y=9_999)
+        occupancy = OccupancyIndex(plateau, dense_cell_limit=0)
+        rover = Rover(id="r", plateau=plateau, occupancy=occupancy)
+        occupancy.place("r", 0, 0)
+        for y in range(9_000):
+            occupancy.place(f"wall{y}", 5_000, y)
+
+        plan = plan_path(rover, 9_999, 0)
+        assert plan.compact == "M9000RM9999RM9000"
+
+    def test_unreachable_and_out_of_bounds_targets(self):
+        plateau = Plateau(max_x=5, max_y=5)
+        occupancy = OccupancyIndex(plateau)
+        rover = Rover(id="r", plateau=plateau, occupancy=occupancy)
+        occupancy.place("r", 0, 0)
+        occupancy.place("a", 4, 5)
+        occupancy.place("b", 5, 4)
+
+        with pytest.raises(NoPathError):
+            plan_path(rover, 5, 5)
+        with pytest.raises(OutOfBoundsError):
+            plan_path(rover, 6, 0)
+
+    def test_plan_cache(self):
+        cache = PlanCache(max_size=1)
+        rover = Rover(id="r", plateau=Plateau(max_x=5, max_y=5))
+        calls = []
+
+        def planner():
+            calls.append(1)
+            return plan_path(rover, 3, 3)
+
+        first = cache.get(("p", 3, 3), planner)
+        assert cache.get(("p", 3, 3), planner) is first
+        cache.get(("p", 1, 1), planner)
+        assert len(calls) == 2
+        assert len(cache) == 1